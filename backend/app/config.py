@@ -8,12 +8,62 @@ class Settings(BaseSettings):
     postgres_host: str = "localhost"
     postgres_port: int = 5432
     postgres_driver: str = "psycopg"
+    postgres_async_pool_size: int = 20
     seed_sample_data: bool = False
     mongo_url: str = "mongodb://localhost:27017"
     mongo_db: str = "dlms"
+    mongo_max_pool_size: int = 100
+    mongo_write_batch_size: int = 500
+    mongo_flush_interval_seconds: float = 0.5
+    mongo_write_queue_size: int = 50_000
+    mongo_write_put_timeout_seconds: float = 1.0
+
+    page_default_limit: int = 100
+    page_max_limit: int = 1000
+
+    discovery_recent_scans: int = 20
+    discovery_scan_max_targets: int = 65_536
+    reachability_ttl_seconds: float = 86_400.0
+    reachability_max_backoff_exponent: int = 5
+    reachability_cache_size: int = 200_000
+    discovery_min_timeout_seconds: float = 0.02
+    discovery_max_timeout_seconds: float = 3.0
+    discovery_retry_backoff_seconds: float = 0.1
+    discovery_retry_backoff_cap_seconds: float = 2.0
+    discovery_shard_size: int = 4096
+    discovery_shard_workers: int = 0
+    discovery_checkpoint_dir: str = "/tmp/dlms-scan-checkpoints"
+    scan_job_max_running: int = 4
+    scan_job_probe_budget: int = 4000
+    scan_job_history: int = 100
+    fingerprint_cache_size: int = 4096
+    vendor_min_confidence: float = 0.3
+    vendor_classify_max_batch: int = 100_000
+    profile_map_cache_size: int = 10_000
+    profile_ingest_batch_size: int = 1000
+    profile_ingest_flush_interval_seconds: float = 0.25
+    profile_ingest_queue_size: int = 50_000
+    batch_max_concurrency: int = 256
+    response_cache_entries: int = 64
+
+    emulator_max_fleet_size: int = 1_000_000
+    emulator_server_autostart: bool = False
+    emulator_server_bind_host: str | None = None
 
     api_key: str | None = None
     dlms_adapter_url: str | None = None
+    dlms_adapter_timeout_seconds: float = 10.0
+    dlms_adapter_pool_size: int = 100
+    dlms_adapter_per_host_limit: int = 50
+    dlms_adapter_retries: int = 2
+    dlms_adapter_backoff_seconds: float = 0.2
+
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_cprofile: bool = True
+    profiling_dir: str = "traces"
+    profiling_max_traces: int = 100
+    profiling_max_spans: int = 10_000
 
     @property
     def postgres_dsn(self) -> str:
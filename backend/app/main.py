@@ -1,29 +1,55 @@
 
-from datetime import datetime
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timezone
+from uuid import uuid4
 
-from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 
 from app.config import settings
 from app.models.core import (
     AssociationObjectList,
     AssociationReport,
+    BatchRequest,
+    DiscoveryLog,
     DiscoveryRequest,
+    DiscoveryResult,
+    EmulatorServerConfig,
+    EmulatorServerStatus,
+    Fingerprint,
+    FingerprintCacheStats,
+    FleetProvisionRequest,
+    FleetProvisionResult,
     MeterInstance,
+    MeterProfile,
     MeterTemplate,
     ObisNormalizationResult,
+    ScanJobStatus,
+    ScanStats,
     VendorClassification,
+    VendorClassifyBatchRequest,
 )
+from app.services import metrics, mongo
 from app.services.association import AssociationNegotiator
-from app.services.discovery import DiscoveryEngine
+from app.services.batch import BatchOnboarder
+from app.services.discovery import DiscoveryEngine, ScanRunningError
 from app.services.dlms_client import DlmsClient
-from app.services.emulator import EmulatorRegistry, seed_registry
+from app.services.emulator import AddressInUseError, EmulatorRegistry, InvalidPortError, seed_registry
+from app.services.emulator_server import EmulatorServer
 from app.services.fingerprinting import FingerprintLog, FingerprintingEngine
 from app.services.obis import ObisNormalizer
+from app.services.pagination import InvalidCursorError, Page, PageQuery
 from app.services.profiles import ProfileGenerator, ProfileRepository
-from app.services.vendor import VendorClassifier
+from app.services.responses import BodyCache, json_body, versioned_json
+from app.services.scan_jobs import ScanScheduler
+from app.services.targets import count_targets
+from app.services.tracing import ProfilingMiddleware, TraceStore
+from app.services.vendor import SimilarityVendorClassifier, VendorClassifier
 
-app = FastAPI(title="DLMS Auto-Discovery Platform", version="0.1.0")
+app = FastAPI(title="DLMS Auto-Discovery Platform", version="0.1.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,11 +58,23 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+trace_store = TraceStore(settings.profiling_dir, settings.profiling_max_traces)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, store=trace_store, sample_rate=settings.profiling_sample_rate)
+
 registry = EmulatorRegistry()
 seed_registry(registry)
 
+emulator_server = EmulatorServer(registry)
 discovery_engine = DiscoveryEngine(registry)
+scan_scheduler = ScanScheduler(
+    discovery_engine,
+    settings.scan_job_max_running,
+    settings.scan_job_probe_budget,
+    settings.scan_job_history,
+)
 fingerprinting_engine = FingerprintingEngine()
+registry.add_template_listener(fingerprinting_engine.invalidate_template)
 fingerprint_log = FingerprintLog()
 profile_generator = ProfileGenerator()
 profile_repo = ProfileRepository()
@@ -44,14 +82,28 @@ profile_repo = ProfileRepository()
 association_negotiator = AssociationNegotiator()
 obis_normalizer = ObisNormalizer()
 vendor_classifier = VendorClassifier()
+similarity_classifier = SimilarityVendorClassifier(registry)
 dlms_client = DlmsClient()
+batch_onboarder = BatchOnboarder(registry, association_negotiator, obis_normalizer, dlms_client)
+
+# Lists are dumped straight from the models with pydantic-core, skipping
+# FastAPI's re-validation and jsonable_encoder pass.
+response_bodies = BodyCache(settings.response_cache_entries)
+TEMPLATE_LIST = TypeAdapter(list[MeterTemplate])
+INSTANCE_LIST = TypeAdapter(list[MeterInstance])
+FINGERPRINT_PAGE = TypeAdapter(Page[Fingerprint])
+PROFILE_PAGE = TypeAdapter(Page[MeterProfile])
+LOG_PAGE = TypeAdapter(Page[DiscoveryLog])
+RESULT_PAGE = TypeAdapter(Page[DiscoveryResult])
+metrics.RESPONSE_CACHE_LOOKUPS.set_function(lambda: response_bodies.hits, ("hit",))
+metrics.RESPONSE_CACHE_LOOKUPS.set_function(lambda: response_bodies.misses, ("miss",))
 
 
 @app.on_event("startup")
 def seed_sample_data() -> None:
     if not settings.seed_sample_data:
         return
-    if registry.list_instances():
+    if registry.count_instances():
         return
     for index, template in enumerate(registry.list_templates()):
         instance = registry.create_instance(
@@ -66,7 +118,63 @@ def seed_sample_data() -> None:
         profile_repo.store(profile)
 
 
-def require_api_key(x_api_key: str | None = Header(default=None)) -> None:
+@app.on_event("startup")
+async def start_emulator_server() -> None:
+    if settings.emulator_server_autostart:
+        await emulator_server.start(EmulatorServerConfig(bind_host=settings.emulator_server_bind_host))
+
+
+@app.on_event("shutdown")
+async def stop_emulator_server() -> None:
+    await emulator_server.stop()
+
+
+@app.on_event("shutdown")
+async def cancel_scan_jobs() -> None:
+    await scan_scheduler.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_dlms_client() -> None:
+    await dlms_client.aclose()
+    dlms_client.close()
+
+
+@app.on_event("shutdown")
+def flush_mongo_writes() -> None:
+    mongo.shutdown()
+
+
+@app.on_event("shutdown")
+def flush_profile_writes() -> None:
+    profile_repo.close()
+
+
+@app.on_event("shutdown")
+async def close_async_clients() -> None:
+    await profile_repo.aclose()
+    await mongo.aclose()
+
+
+async def page_query(
+    limit: int = Query(default=settings.page_default_limit, ge=1, le=settings.page_max_limit),
+    cursor: str | None = None,
+    meter_id: str | None = None,
+    vendor: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> PageQuery:
+    return PageQuery(
+        limit=limit,
+        cursor=cursor,
+        meter_id=meter_id,
+        vendor=vendor,
+        created_from=_naive_utc(created_from),
+        created_to=_naive_utc(created_to),
+    )
+
+
+async def require_api_key(x_api_key: str | None = Header(default=None)) -> None:
     if not settings.api_key:
         return
     if x_api_key != settings.api_key:
@@ -75,48 +183,195 @@ def require_api_key(x_api_key: str | None = Header(default=None)) -> None:
 
 @app.get("/health", dependencies=[Depends(require_api_key)])
 
-def health() -> dict[str, str]:
+async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_api_key)])
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/traces", dependencies=[Depends(require_api_key)])
+async def list_traces() -> list[dict[str, object]]:
+    return trace_store.list()
+
+
+@app.get("/debug/traces/{trace_id}", dependencies=[Depends(require_api_key)])
+async def get_trace(trace_id: str) -> dict[str, object]:
+    trace = await asyncio.to_thread(trace_store.get, trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="trace_not_found")
+    return trace
+
+
+@app.get("/debug/traces/{trace_id}/profile", dependencies=[Depends(require_api_key)])
+async def download_trace_profile(trace_id: str) -> FileResponse:
+    if await asyncio.to_thread(trace_store.get, trace_id) is None:
+        raise HTTPException(status_code=404, detail="trace_not_found")
+    path = trace_store.profile_path(trace_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="profile_not_captured")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
 @app.get("/emulators/templates", response_model=list[MeterTemplate], dependencies=[Depends(require_api_key)])
 
-def list_templates() -> list[MeterTemplate]:
-    return registry.list_templates()
+def list_templates(request: Request) -> Response:
+    return versioned_json(
+        request,
+        response_bodies,
+        ("templates",),
+        registry.templates_version,
+        lambda: TEMPLATE_LIST.dump_json(registry.list_templates()),
+    )
 
 
 
 @app.post("/emulators/instances", response_model=MeterInstance, dependencies=[Depends(require_api_key)])
 
 def create_instance(vendor: str, model: str, ip_address: str, port: int = 4059) -> MeterInstance:
-    return registry.create_instance(vendor, model, ip_address, port)
+    try:
+        return registry.create_instance(vendor, model, ip_address, port)
+    except AddressInUseError as exc:
+        raise HTTPException(status_code=409, detail="address_in_use") from exc
+    except InvalidPortError as exc:
+        raise HTTPException(status_code=400, detail="invalid_port") from exc
 
 
 
 @app.get("/emulators/instances", response_model=list[MeterInstance], dependencies=[Depends(require_api_key)])
 
-def list_instances() -> list[MeterInstance]:
-    return registry.list_instances()
+def list_instances(request: Request, vendor: str | None = None, model: str | None = None) -> Response:
+    by_model = bool(vendor and model)
+
+    def build() -> bytes:
+        return INSTANCE_LIST.dump_json(registry.find_by_model(vendor, model) if by_model else registry.list_instances())
+
+    key = ("instances", vendor, model) if by_model else ("instances",)
+    return versioned_json(request, response_bodies, key, registry.instances_version, build)
+
+
+@app.post("/emulators/fleets", response_model=FleetProvisionResult, dependencies=[Depends(require_api_key)])
+def provision_fleet(request: FleetProvisionRequest) -> FleetProvisionResult:
+    if count_targets(request.ip_range, request.ports) > settings.emulator_max_fleet_size:
+        raise HTTPException(status_code=400, detail="fleet_too_large")
+    try:
+        return registry.provision_fleet(request.templates, request.ip_range, request.ports)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail="template_not_found") from exc
+    except InvalidPortError as exc:
+        raise HTTPException(status_code=400, detail="invalid_port") from exc
+
+
+@app.post("/emulators/server/start", response_model=EmulatorServerStatus, dependencies=[Depends(require_api_key)])
+async def start_server(config: EmulatorServerConfig | None = None) -> EmulatorServerStatus:
+    try:
+        return await emulator_server.start(config)
+    except OSError as exc:
+        raise HTTPException(status_code=409, detail=f"bind_failed: {exc.strerror}") from exc
+
+
+@app.post("/emulators/server/stop", response_model=EmulatorServerStatus, dependencies=[Depends(require_api_key)])
+async def stop_server() -> EmulatorServerStatus:
+    return await emulator_server.stop()
+
+
+@app.get("/emulators/server", response_model=EmulatorServerStatus, dependencies=[Depends(require_api_key)])
+async def server_status() -> EmulatorServerStatus:
+    return emulator_server.status()
+
+
+@app.delete("/emulators/instances/{meter_id}", dependencies=[Depends(require_api_key)])
+def delete_instance(meter_id: str) -> dict[str, str]:
+    if not registry.delete_instance(meter_id):
+        raise HTTPException(status_code=404, detail="meter_not_found")
+    return {"status": "deleted"}
 
 
 
 @app.post("/discovery/scan", dependencies=[Depends(require_api_key)])
 
-def scan(request: DiscoveryRequest) -> dict[str, object]:
-    results = discovery_engine.scan(request)
-    return {"count": len(results), "results": results}
+async def scan(request: DiscoveryRequest) -> dict[str, object]:
+    # The whole result list is built in memory; larger ranges go through /discovery/scan/stream or /discovery/jobs.
+    if count_targets(request.ip_range, request.ports) > settings.discovery_scan_max_targets:
+        raise HTTPException(status_code=400, detail="scan_too_large")
+    scan_id = str(uuid4())
+    stats = ScanStats()
+    results = await discovery_engine.scan(request, scan_id, stats)
+    return {"scan_id": scan_id, "count": len(results), "stats": stats, "results": results}
+
+
+@app.post("/discovery/scan/stream", dependencies=[Depends(require_api_key)])
+async def scan_stream(request: DiscoveryRequest) -> StreamingResponse:
+    scan_id = str(uuid4())
+    return _ndjson(discovery_engine.iter_scan(request, scan_id), headers={"X-Scan-Id": scan_id})
+
+
+@app.post("/discovery/jobs", status_code=202, dependencies=[Depends(require_api_key)])
+async def submit_scan_job(request: DiscoveryRequest) -> ScanJobStatus:
+    return scan_scheduler.submit(request).snapshot()
+
+
+@app.get("/discovery/jobs", dependencies=[Depends(require_api_key)])
+async def list_scan_jobs() -> dict[str, object]:
+    jobs = [job.snapshot() for job in scan_scheduler.list()]
+    return {"count": len(jobs), "jobs": jobs}
+
+
+@app.get("/discovery/jobs/{scan_id}", dependencies=[Depends(require_api_key)])
+async def get_scan_job(scan_id: str) -> ScanJobStatus:
+    job = scan_scheduler.get(scan_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return job.snapshot()
 
 
+@app.post("/discovery/jobs/{scan_id}/cancel", dependencies=[Depends(require_api_key)])
+async def cancel_scan_job(scan_id: str) -> ScanJobStatus:
+    job = await scan_scheduler.cancel(scan_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return job.snapshot()
+
+
+@app.post("/discovery/scans/{scan_id}/resume", dependencies=[Depends(require_api_key)])
+async def resume_scan(scan_id: str) -> dict[str, object]:
+    if not discovery_engine.has_checkpoint(scan_id):
+        raise HTTPException(status_code=404, detail="checkpoint_not_found")
+    stats = ScanStats()
+    try:
+        results = await discovery_engine.resume(scan_id, stats)
+    except ScanRunningError as exc:
+        raise HTTPException(status_code=409, detail="scan_running") from exc
+    return {"scan_id": scan_id, "count": len(results), "stats": stats, "results": results}
+
 
 @app.get("/discovery/logs", dependencies=[Depends(require_api_key)])
-def list_discovery_logs() -> dict[str, object]:
-    return {"items": discovery_engine.list_logs()}
+async def list_discovery_logs(request: Request, query: PageQuery = Depends(page_query)) -> Response:
+    return await _page_response(request, discovery_engine.list_logs_async, query, LOG_PAGE)
+
+
+@app.get("/discovery/scans/{scan_id}/results", dependencies=[Depends(require_api_key)])
+async def list_scan_results(
+    request: Request,
+    scan_id: str,
+    ip_address: str | None = None,
+    port: int | None = None,
+    query: PageQuery = Depends(page_query),
+) -> Response:
+    return await _page_response(
+        request,
+        lambda page: discovery_engine.list_results_async(scan_id, page, ip_address, port),
+        query,
+        RESULT_PAGE,
+    )
 
 
 @app.post("/fingerprints/{meter_id}", dependencies=[Depends(require_api_key)])
 
 def fingerprint_meter(meter_id: str) -> dict[str, object]:
-    meter = next((m for m in registry.list_instances() if m.meter_id == meter_id), None)
+    meter = registry.get_instance(meter_id)
     if not meter:
         return {"error": "meter_not_found"}
     fingerprint = fingerprinting_engine.build_fingerprint(meter)
@@ -125,32 +380,74 @@ def fingerprint_meter(meter_id: str) -> dict[str, object]:
 
 
 
+@app.get("/fingerprints/cache", response_model=FingerprintCacheStats, dependencies=[Depends(require_api_key)])
+async def fingerprint_cache_stats() -> FingerprintCacheStats:
+    return fingerprinting_engine.cache_stats()
+
+
 @app.get("/fingerprints", dependencies=[Depends(require_api_key)])
 
-def list_fingerprints() -> dict[str, object]:
-    return {"items": fingerprint_log.list()}
+async def list_fingerprints(request: Request, query: PageQuery = Depends(page_query)) -> Response:
+    return await _page_response(request, fingerprint_log.list_async, query, FINGERPRINT_PAGE)
+
+
+
+@app.post("/profiles/batch", status_code=202, dependencies=[Depends(require_api_key)])
+async def ingest_profiles(request: BatchRequest) -> dict[str, object]:
+    profiles, not_found = await asyncio.to_thread(_build_profiles, await _batch_meter_ids(request))
+    if not profile_repo.ingest(profiles):
+        raise HTTPException(
+            status_code=503,
+            detail="ingest_backpressure",
+            headers={"Retry-After": str(max(1, round(settings.profile_ingest_flush_interval_seconds)))},
+        )
+    return {"accepted": len(profiles), "not_found": not_found}
+
 
+@app.get("/profiles/ingest", dependencies=[Depends(require_api_key)])
+async def profile_ingest_stats() -> dict[str, object]:
+    return profile_repo.ingest_stats()
 
 
 @app.post("/profiles/{meter_id}", dependencies=[Depends(require_api_key)])
 
-def build_profile(meter_id: str) -> dict[str, object]:
-    meter = next((m for m in registry.list_instances() if m.meter_id == meter_id), None)
+async def build_profile(meter_id: str) -> dict[str, object]:
+    meter = registry.get_instance(meter_id)
     if not meter:
         return {"error": "meter_not_found"}
-    profile = profile_generator.build_profile(meter)
-    profile_repo.store(profile)
+    profile = await profile_repo.store_async(profile_generator.build_profile(meter))
     return {"profile": profile}
 
 
 @app.get("/profiles", dependencies=[Depends(require_api_key)])
-def list_profiles() -> dict[str, object]:
-    return {"items": profile_repo.list()}
+async def list_profiles(request: Request, query: PageQuery = Depends(page_query)) -> Response:
+    return await _page_response(request, profile_repo.list_async, query, PROFILE_PAGE)
+
+
+@app.post("/associations/batch", dependencies=[Depends(require_api_key)])
+async def associate_batch(request: BatchRequest) -> StreamingResponse:
+    results = batch_onboarder.associate(
+        await _batch_meter_ids(request),
+        min(request.max_concurrency, settings.batch_max_concurrency),
+        use_adapter=bool(settings.dlms_adapter_url),
+        include_objects=request.include_objects,
+    )
+    return _ndjson(results)
+
+
+@app.post("/obis/normalize/batch", dependencies=[Depends(require_api_key)])
+async def normalize_obis_batch(request: BatchRequest) -> StreamingResponse:
+    results = batch_onboarder.normalize_obis(
+        await _batch_meter_ids(request),
+        min(request.max_concurrency, settings.batch_max_concurrency),
+        use_adapter=bool(settings.dlms_adapter_url),
+    )
+    return _ndjson(results)
 
 
 @app.post("/associations/{meter_id}", response_model=AssociationReport, dependencies=[Depends(require_api_key)])
-def associate_meter(meter_id: str) -> AssociationReport:
-    meter = next((m for m in registry.list_instances() if m.meter_id == meter_id), None)
+async def associate_meter(meter_id: str) -> AssociationReport:
+    meter = registry.get_instance(meter_id)
     if not meter:
         return AssociationReport(
             meter_id=meter_id,
@@ -162,38 +459,105 @@ def associate_meter(meter_id: str) -> AssociationReport:
             created_at=datetime.utcnow(),
         )
     if settings.dlms_adapter_url:
-        return dlms_client.associate(meter)
+        return await dlms_client.associate_async(meter)
     return association_negotiator.negotiate(meter)
 
 
 @app.get("/associations/objects/{meter_id}", response_model=AssociationObjectList, dependencies=[Depends(require_api_key)])
-def association_objects(meter_id: str) -> AssociationObjectList:
-    meter = next((m for m in registry.list_instances() if m.meter_id == meter_id), None)
+async def association_objects(meter_id: str) -> AssociationObjectList:
+    meter = registry.get_instance(meter_id)
     if not meter:
         raise HTTPException(status_code=404, detail="meter_not_found")
     if settings.dlms_adapter_url:
-        return dlms_client.fetch_association_objects(meter)
+        return await dlms_client.fetch_association_objects_async(meter)
     return association_negotiator.association_objects(meter)
 
 
 @app.get("/obis/normalize/{meter_id}", response_model=ObisNormalizationResult, dependencies=[Depends(require_api_key)])
-def normalize_obis(meter_id: str) -> ObisNormalizationResult:
-    meter = next((m for m in registry.list_instances() if m.meter_id == meter_id), None)
+async def normalize_obis(meter_id: str) -> ObisNormalizationResult:
+    meter = registry.get_instance(meter_id)
     if not meter:
         raise HTTPException(status_code=404, detail="meter_not_found")
     if settings.dlms_adapter_url:
-        return dlms_client.fetch_obis(meter)
+        return await dlms_client.fetch_obis_async(meter)
     return obis_normalizer.normalize(meter)
 
 
 @app.get("/dlms/adapter/health", dependencies=[Depends(require_api_key)])
-def adapter_health() -> dict[str, object]:
-    return dlms_client.health()
+async def adapter_health() -> dict[str, object]:
+    return await dlms_client.health_async()
+
+
+@app.post("/vendors/classify/batch", dependencies=[Depends(require_api_key)])
+def classify_vendors_batch(request: VendorClassifyBatchRequest) -> dict[str, object]:
+    if len(request.meter_ids) + len(request.observations) > settings.vendor_classify_max_batch:
+        raise HTTPException(status_code=400, detail="batch_too_large")
+    observations = list(request.observations)
+    not_found = []
+    for meter_id in request.meter_ids:
+        meter = registry.get_instance(meter_id)
+        if meter is None:
+            not_found.append(meter_id)
+            continue
+        observations.append(similarity_classifier.observation_for(meter))
+    results = similarity_classifier.classify_batch(observations)
+    return {"count": len(results), "results": results, "not_found": not_found}
 
 
 @app.get("/vendors/classify/{meter_id}", response_model=VendorClassification, dependencies=[Depends(require_api_key)])
-def classify_vendor(meter_id: str) -> VendorClassification:
-    meter = next((m for m in registry.list_instances() if m.meter_id == meter_id), None)
+async def classify_vendor(meter_id: str) -> VendorClassification:
+    meter = registry.get_instance(meter_id)
     if not meter:
         raise HTTPException(status_code=404, detail="meter_not_found")
     return vendor_classifier.classify(meter)
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    # Stored timestamps are naive UTC; an aware bound (e.g. ``...Z``) could not be compared with them.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _page_response(
+    request: Request,
+    list_page: Callable[[PageQuery], Awaitable[Page]],
+    query: PageQuery,
+    adapter: TypeAdapter,
+) -> Response:
+    try:
+        page = await list_page(query)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail="invalid_cursor") from exc
+    # Pages come from stores other processes write to, so the ETag hashes the body.
+    return await asyncio.to_thread(lambda: json_body(request, adapter.dump_json(page)))
+
+
+def _build_profiles(meter_ids: list[str]) -> tuple[list[MeterProfile], list[str]]:
+    profiles = []
+    not_found = []
+    for meter_id in meter_ids:
+        meter = registry.get_instance(meter_id)
+        if meter is None:
+            not_found.append(meter_id)
+            continue
+        profiles.append(profile_generator.build_profile(meter))
+    return profiles, not_found
+
+
+async def _batch_meter_ids(request: BatchRequest) -> list[str]:
+    meter_ids = list(request.meter_ids)
+    if request.scan_id:
+        scan_meter_ids = await discovery_engine.meter_ids_for_scan_async(request.scan_id)
+        if scan_meter_ids is None:
+            raise HTTPException(status_code=404, detail="scan_not_found")
+        meter_ids.extend(scan_meter_ids)
+    return list(dict.fromkeys(meter_ids))
+
+
+def _ndjson(items: AsyncIterator[BaseModel], headers: dict[str, str] | None = None) -> StreamingResponse:
+    async def lines() -> AsyncIterator[str]:
+        async for item in items:
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Literal
-from pydantic import BaseModel, Field
+from ipaddress import ip_network
+from typing import Annotated, Literal
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class ObisObject(BaseModel):
@@ -32,14 +33,74 @@ class MeterInstance(BaseModel):
     obis_objects: list[ObisObject]
 
 
-class DiscoveryRequest(BaseModel):
+class FleetTemplateShare(BaseModel):
+    vendor: str
+    model: str
+    weight: int = Field(default=1, ge=1)
+
+
+class FleetProvisionRequest(BaseModel):
     ip_range: str
     ports: list[int] = Field(default_factory=lambda: [4059])
-    max_concurrency: int = 200
+    templates: list[FleetTemplateShare] = Field(..., min_length=1)
 
-    timeout_seconds: float = 0.5
-    retries: int = 1
 
+class FleetProvisionResult(BaseModel):
+    requested: int
+    created: int
+    skipped: int
+    by_template: dict[str, int]
+    elapsed_seconds: float
+    instances_per_second: float
+
+
+class EmulatorServerConfig(BaseModel):
+    latency_ms: float = Field(default=0.0, ge=0)
+    jitter_ms: float = Field(default=0.0, ge=0)
+    loss_rate: float = Field(default=0.0, ge=0, le=1)
+    bind_host: str | None = None
+    backlog: int = 1024
+
+
+class EmulatorServerStatus(BaseModel):
+    running: bool
+    listeners: int
+    connections: int
+    requests: int
+    dropped: int
+    unknown_targets: int
+    errors: int = 0
+    config: EmulatorServerConfig
+
+
+class DiscoveryRequest(BaseModel):
+    ip_range: str
+    ports: list[Annotated[int, Field(ge=0, le=65535)]] = Field(default_factory=lambda: [4059], min_length=1)
+    max_concurrency: int = Field(default=2000, ge=1)
+
+    timeout_seconds: float = Field(default=0.5, gt=0, le=60)
+    retries: int = Field(default=1, ge=0, le=10)
+    adaptive_timeout: bool = True
+
+    incremental: bool = False
+    cache_ttl_seconds: float | None = Field(default=None, ge=0)
+
+    sharded: bool = False
+
+    @field_validator("ip_range")
+    @classmethod
+    def _check_ip_range(cls, value: str) -> str:
+        try:
+            ip_network(value, strict=False)
+        except ValueError as exc:
+            raise ValueError(f"invalid ip_range: {exc}") from None
+        return value
+
+    @model_validator(mode="after")
+    def _check_mode(self) -> "DiscoveryRequest":
+        if self.incremental and self.sharded:
+            raise ValueError("incremental scans cannot be sharded")
+        return self
 
 
 class DiscoveryResult(BaseModel):
@@ -55,6 +116,34 @@ class DiscoveryResult(BaseModel):
     reachable: bool = True
 
 
+class ScanStats(BaseModel):
+    total_targets: int = 0
+    probes_sent: int = 0
+    probes_saved: int = 0
+    cached_hits: int = 0
+    completed: int = 0
+    discovered: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    subnet_timeouts: dict[str, float] = Field(default_factory=dict)
+
+
+class ScanJobStatus(BaseModel):
+    scan_id: str
+    status: str
+    request: DiscoveryRequest
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+    probed: int = 0
+    hits: int = 0
+    percent: float = 0.0
+    rate_per_second: float = 0.0
+    eta_seconds: float | None = None
+    stats: ScanStats
+
+
 class DiscoveryLog(BaseModel):
     scan_id: str
     ip_range: str
@@ -64,6 +153,10 @@ class DiscoveryLog(BaseModel):
     started_at: datetime
     completed_at: datetime
 
+    incremental: bool = False
+    probes_sent: int | None = None
+    probes_saved: int = 0
+
 
 
 class Fingerprint(BaseModel):
@@ -75,6 +168,15 @@ class Fingerprint(BaseModel):
     vendor_classification: str | None = None
 
 
+class FingerprintCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
+
 
 class MeterProfile(BaseModel):
     profile_id: str
@@ -83,6 +185,7 @@ class MeterProfile(BaseModel):
     model: str
     obis_map: dict[str, str]
     created_at: datetime
+    map_hash: str | None = None
 
 
 
@@ -108,10 +211,39 @@ class ObisNormalizationResult(BaseModel):
     created_at: datetime
 
 
+class BatchRequest(BaseModel):
+    meter_ids: list[str] = Field(default_factory=list)
+    scan_id: str | None = None
+    max_concurrency: int = Field(default=64, ge=1)
+    include_objects: bool = False
+
+
+class BatchMeterResult(BaseModel):
+    meter_id: str
+    status: Literal["success", "failed", "not_found"]
+    association: AssociationReport | None = None
+    objects: AssociationObjectList | None = None
+    obis: ObisNormalizationResult | None = None
+    error: str | None = None
+
+
 class VendorClassification(BaseModel):
     meter_id: str
-    vendor: str
-    model: str
+    vendor: str | None
+    model: str | None
     classification: str
     confidence: float
     created_at: datetime
+
+
+class MeterObservation(BaseModel):
+    meter_id: str
+    obis_codes: list[str] = Field(default_factory=list)
+    authentication: Literal["None", "LLS", "HLS"] | None = None
+    security_suite: Literal[0, 1, 2] | None = None
+    referencing: Literal["LN", "SN"] | None = None
+
+
+class VendorClassifyBatchRequest(BaseModel):
+    meter_ids: list[str] = Field(default_factory=list)
+    observations: list[MeterObservation] = Field(default_factory=list)
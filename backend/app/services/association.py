@@ -3,21 +3,25 @@ from __future__ import annotations
 from datetime import datetime
 
 from app.models.core import AssociationObjectList, AssociationReport, MeterInstance
+from app.services.metrics import STAGE_SECONDS
+
+_ASSOCIATION_SECONDS = STAGE_SECONDS.labels("association")
 
 
 class AssociationNegotiator:
     def negotiate(self, meter: MeterInstance) -> AssociationReport:
-        aarq = f"AARQ(auth={meter.authentication},suite={meter.security_suite})"
-        aare = f"AARE(result=accepted,vendor={meter.vendor},model={meter.model})"
-        return AssociationReport(
-            meter_id=meter.meter_id,
-            status="success",
-            authentication=meter.authentication,
-            security_suite=meter.security_suite,
-            aarq=aarq,
-            aare=aare,
-            created_at=datetime.utcnow(),
-        )
+        with _ASSOCIATION_SECONDS.time():
+            aarq = f"AARQ(auth={meter.authentication},suite={meter.security_suite})"
+            aare = f"AARE(result=accepted,vendor={meter.vendor},model={meter.model})"
+            return AssociationReport(
+                meter_id=meter.meter_id,
+                status="success",
+                authentication=meter.authentication,
+                security_suite=meter.security_suite,
+                aarq=aarq,
+                aare=aare,
+                created_at=datetime.utcnow(),
+            )
 
     def association_objects(self, meter: MeterInstance) -> AssociationObjectList:
         return AssociationObjectList(
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+import itertools
+from typing import TypeVar
+
+import httpx
+
+from app.models.core import BatchMeterResult, MeterInstance
+from app.services.association import AssociationNegotiator
+from app.services.dlms_client import DlmsClient
+from app.services.emulator import EmulatorRegistry
+from app.services.obis import ObisNormalizer
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Meters normalized per pass by the local (non-adapter) OBIS batch path.
+LOCAL_CHUNK_SIZE = 1000
+
+
+async def stream_bounded(
+    items: Iterable[T],
+    handler: Callable[[T], Awaitable[R]],
+    max_concurrency: int,
+) -> AsyncIterator[R]:
+    """Run ``handler`` over ``items`` with at most ``max_concurrency`` in flight.
+
+    Results are yielded in completion order. Items are pulled lazily, so the
+    input may be a generator of any length.
+    """
+    iterator = iter(items)
+    queue: asyncio.Queue[tuple[R] | None] = asyncio.Queue(maxsize=max_concurrency)
+
+    async def worker() -> None:
+        for item in iterator:
+            await queue.put((await handler(item),))
+
+    async def supervise() -> None:
+        try:
+            await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+        finally:
+            await queue.put(None)
+
+    supervisor = asyncio.create_task(supervise())
+    try:
+        while (entry := await queue.get()) is not None:
+            yield entry[0]
+        await supervisor
+    finally:
+        if not supervisor.done():
+            supervisor.cancel()
+            await asyncio.gather(supervisor, return_exceptions=True)
+
+
+class BatchOnboarder:
+    """Associate and read OBIS objects for many meters concurrently.
+
+    Each meter is handled independently: lookup misses, adapter errors and
+    malformed adapter replies are reported on that meter's result rather than
+    aborting the batch.
+    """
+
+    def __init__(
+        self,
+        registry: EmulatorRegistry,
+        negotiator: AssociationNegotiator,
+        normalizer: ObisNormalizer,
+        client: DlmsClient,
+    ) -> None:
+        self._registry = registry
+        self._negotiator = negotiator
+        self._normalizer = normalizer
+        self._client = client
+
+    def associate(
+        self,
+        meter_ids: Iterable[str],
+        max_concurrency: int,
+        use_adapter: bool,
+        include_objects: bool = False,
+    ) -> AsyncIterator[BatchMeterResult]:
+        async def handle(meter: MeterInstance) -> BatchMeterResult:
+            if use_adapter:
+                association = await self._client.associate_async(meter)
+                objects = await self._client.fetch_association_objects_async(meter) if include_objects else None
+            else:
+                association = self._negotiator.negotiate(meter)
+                objects = self._negotiator.association_objects(meter) if include_objects else None
+            return BatchMeterResult(
+                meter_id=meter.meter_id,
+                status=association.status,
+                association=association,
+                objects=objects,
+            )
+
+        return self._run(meter_ids, handle, max_concurrency)
+
+    def normalize_obis(
+        self,
+        meter_ids: Iterable[str],
+        max_concurrency: int,
+        use_adapter: bool,
+    ) -> AsyncIterator[BatchMeterResult]:
+        if not use_adapter:
+            return self._normalize_local(meter_ids)
+
+        async def handle(meter: MeterInstance) -> BatchMeterResult:
+            # The adapter only lists the meter's objects; names come from the local rule table.
+            objects = await self._client.fetch_association_objects_async(meter)
+            obis = self._normalizer.normalize_codes(meter.meter_id, objects.objects)
+            return BatchMeterResult(meter_id=meter.meter_id, status="success", obis=obis)
+
+        return self._run(meter_ids, handle, max_concurrency)
+
+    async def _normalize_local(self, meter_ids: Iterable[str]) -> AsyncIterator[BatchMeterResult]:
+        """Normalize with the local rule table, ``LOCAL_CHUNK_SIZE`` meters per pass."""
+        iterator = iter(meter_ids)
+        while chunk := list(itertools.islice(iterator, LOCAL_CHUNK_SIZE)):
+            meters = []
+            for meter_id in chunk:
+                meter = self._registry.get_instance(meter_id)
+                if meter is None:
+                    yield BatchMeterResult(meter_id=meter_id, status="not_found", error="meter_not_found")
+                else:
+                    meters.append(meter)
+            for obis in self._normalizer.normalize_many(meters):
+                yield BatchMeterResult(meter_id=obis.meter_id, status="success", obis=obis)
+            # Let other requests run between chunks.
+            await asyncio.sleep(0)
+
+    def _run(
+        self,
+        meter_ids: Iterable[str],
+        handle: Callable[[MeterInstance], Awaitable[BatchMeterResult]],
+        max_concurrency: int,
+    ) -> AsyncIterator[BatchMeterResult]:
+        async def guarded(meter_id: str) -> BatchMeterResult:
+            meter = self._registry.get_instance(meter_id)
+            if meter is None:
+                return BatchMeterResult(meter_id=meter_id, status="not_found", error="meter_not_found")
+            try:
+                return await handle(meter)
+            except httpx.HTTPError as exc:
+                return BatchMeterResult(meter_id=meter_id, status="failed", error=str(exc) or type(exc).__name__)
+            except Exception as exc:  # a malformed adapter reply (ValueError, KeyError, ValidationError, ...)
+                # Reported on this meter so one bad reply does not end the stream for the rest.
+                return BatchMeterResult(meter_id=meter_id, status="failed", error=f"{type(exc).__name__}: {exc}")
+
+        return stream_bounded(meter_ids, guarded, max_concurrency)
@@ -1,154 +1,636 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AbstractAsyncContextManager
 from datetime import datetime
-from ipaddress import ip_network
+import heapq
+import itertools
+import multiprocessing
+import os
 import socket
+import struct
+import time
 from uuid import uuid4
 
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pymongo.errors import PyMongoError
 
 from app.config import settings
-from app.models.core import DiscoveryLog, DiscoveryRequest, DiscoveryResult, MeterInstance
+from app.models.core import DiscoveryLog, DiscoveryRequest, DiscoveryResult, ScanStats
+from app.services.discovery_results import DiscoveryResultStore
 from app.services.emulator import EmulatorRegistry
+from app.services.metrics import ACTIVE_SCANS, PROBE_RETRIES, PROBE_TIMEOUTS, PROBES, PROBES_IN_FLIGHT, STAGE_SECONDS
+from app.services.mongo import (
+    buffered_writer,
+    ensure_indexes,
+    find_page,
+    find_page_async,
+    get_async_collection,
+    get_collection,
+)
+from app.services.pagination import Page, PageQuery, paginate_memory
+from app.services.reachability import ReachabilityCache, plan_targets
+from app.services.records import ResultRecord, pack_ipv4
+from app.services.rtt import SubnetRttEstimator, retry_delay
+from app.services.sharding import CheckpointStore, LocalWorkQueue, ShardTask, WorkQueue, split_range, write_json
+from app.services.targets import count_shard_targets, count_targets, iter_shard_targets, iter_targets
+from app.services.tracing import traced
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    resource = None
+
+# File descriptors kept free for the API server, database clients and logging.
+FD_HEADROOM = 256
+# Abortive close: skip TIME_WAIT so large sweeps do not exhaust ephemeral ports.
+_LINGER_RESET = struct.pack("ii", 1, 0)
+
+_OPEN = "open"
+_REFUSED = "refused"
+_TIMEOUT = "timeout"
+_UNREACHABLE = "unreachable"
+
+_PROBE_SECONDS = STAGE_SECONDS.labels("probe")
+_LOOKUP_SECONDS = STAGE_SECONDS.labels("registry_lookup")
+
+
+class ScanRunningError(RuntimeError):
+    """Raised when resuming a scan that is still running."""
+
+
+class _ProbeSchedule:
+    """Hands out planned targets and delayed retries to the scan workers.
+
+    Retries wait on a heap ordered by due time instead of inside a worker, so
+    a worker whose probe was lost moves on to the next target immediately.
+    ``next`` returns ``None`` once the plan is exhausted, no retries are
+    pending and no probe still in flight could schedule one.
+    """
+
+    def __init__(self, planned: Iterator[tuple[str, int, bool | None]]) -> None:
+        self._planned = planned
+        self._retries: list[tuple[float, int, str, int, int]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._changed = asyncio.Event()
+
+    async def next(self) -> tuple[str, int, bool | None, int] | None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._retries and self._retries[0][0] <= now:
+                _, _, ip_address, port, attempt = heapq.heappop(self._retries)
+                self._in_flight += 1
+                return ip_address, port, None, attempt
+            planned = next(self._planned, None)
+            if planned is not None:
+                self._in_flight += 1
+                return (*planned, 0)
+            if not self._retries and not self._in_flight:
+                self._changed.set()
+                return None
+
+            self._changed.clear()
+            delay = self._retries[0][0] - now if self._retries else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def done(self, ip_address: str, port: int, next_attempt: int, retry_after: float | None) -> None:
+        self._in_flight -= 1
+        if retry_after is not None:
+            due = asyncio.get_running_loop().time() + retry_after
+            heapq.heappush(self._retries, (due, next(self._sequence), ip_address, port, next_attempt))
+        self._changed.set()
+
+
+
+async def sweep(
+    planned: Iterator[tuple[str, int, bool | None]],
+    request: DiscoveryRequest,
+    stats: ScanStats,
+    rtt: SubnetRttEstimator,
+    window: int,
+    record: Callable[[str, int, bool], None],
+    slot: Callable[[], AbstractAsyncContextManager[None]] | None = None,
+) -> AsyncIterator[tuple[str, int]]:
+    """Probe ``planned`` targets with ``window`` workers and yield the live ones.
+
+    Targets whose cached state is known are counted as saved probes instead
+    of being probed. ``record`` receives the final outcome of every probed
+    target. A slow consumer applies backpressure through the bounded queue.
+    When ``slot`` is given, each probe holds one of its slots while it runs.
+    """
+    queue: asyncio.Queue[tuple[str, int] | None] = asyncio.Queue(maxsize=window)
+    schedule = _ProbeSchedule(planned)
+    subnets: set[str] = set()
+
+    async def worker() -> None:
+        while (item := await schedule.next()) is not None:
+            ip_address, port, cached, attempt = item
+            retry_after = None
+            try:
+                if cached is None:
+                    if slot is None:
+                        alive, retry_after = await _probe(request, stats, rtt, subnets, ip_address, port, attempt)
+                    else:
+                        async with slot():
+                            alive, retry_after = await _probe(request, stats, rtt, subnets, ip_address, port, attempt)
+                    if retry_after is None:
+                        record(ip_address, port, alive)
+                else:
+                    alive = cached
+                    stats.probes_saved += 1
+                    stats.cached_hits += int(alive)
+                stats.completed += int(retry_after is None)
+                if retry_after is None and alive:
+                    await queue.put((ip_address, port))
+            finally:
+                schedule.done(ip_address, port, attempt + 1, retry_after)
+
+    async def supervise() -> None:
+        try:
+            await asyncio.gather(*(worker() for _ in range(window)))
+        finally:
+            await queue.put(None)
+
+    supervisor = asyncio.create_task(supervise())
+    try:
+        while (target := await queue.get()) is not None:
+            yield target
+        await supervisor
+    finally:
+        if not supervisor.done():
+            supervisor.cancel()
+            await asyncio.gather(supervisor, return_exceptions=True)
+
+    stats.subnet_timeouts.update(rtt.snapshot(subnets, request.timeout_seconds))
+
+
+async def _probe(
+    request: DiscoveryRequest,
+    stats: ScanStats,
+    rtt: SubnetRttEstimator,
+    subnets: set[str],
+    ip_address: str,
+    port: int,
+    attempt: int,
+) -> tuple[bool, float | None]:
+    """Probe one target once; return ``(alive, retry_after)``.
+
+    ``retry_after`` is the backoff delay before the next attempt when the
+    probe was lost and attempts remain, otherwise ``None``.
+    """
+    subnet = rtt.subnet(ip_address)
+    subnets.add(subnet)
+    if request.adaptive_timeout:
+        timeout = rtt.backoff_timeout(subnet, request.timeout_seconds, attempt)
+    else:
+        timeout = request.timeout_seconds
+
+    outcome, elapsed = await _connect(ip_address, port, timeout)
+    stats.probes_sent += 1
+    stats.retries += int(attempt > 0)
+    _PROBE_SECONDS.observe(elapsed)
+    PROBES.inc()
+    if attempt:
+        PROBE_RETRIES.inc()
+    if outcome in (_OPEN, _REFUSED):
+        rtt.observe(subnet, elapsed)
+    elif outcome == _TIMEOUT:
+        stats.timeouts += 1
+        PROBE_TIMEOUTS.inc()
+
+    alive = outcome == _OPEN
+    if outcome in (_TIMEOUT, _UNREACHABLE) and attempt + 1 < max(request.retries, 1):
+        delay = retry_delay(
+            attempt + 1,
+            settings.discovery_retry_backoff_seconds,
+            settings.discovery_retry_backoff_cap_seconds,
+        )
+        return alive, delay
+    return alive, None
+
+
+async def _connect(ip_address: str, port: int, timeout: float) -> tuple[str, float]:
+    """Attempt one TCP connect; return the outcome and its round-trip time."""
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in ip_address else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+    PROBES_IN_FLIGHT.inc()
+    started = loop.time()
+    try:
+        async with asyncio.timeout(timeout):
+            await loop.sock_connect(sock, (ip_address, port))
+        return _OPEN, loop.time() - started
+    except ConnectionRefusedError:
+        return _REFUSED, loop.time() - started
+    except asyncio.TimeoutError:
+        return _TIMEOUT, timeout
+    except OSError:
+        return _UNREACHABLE, loop.time() - started
+    finally:
+        sock.close()
+        PROBES_IN_FLIGHT.dec()
+
+
+def run_shard(task: ShardTask) -> dict[str, object]:
+    """Probe one shard of a sharded scan and write its checkpoint.
+
+    Runs in a worker process: it only touches the network and the checkpoint
+    file, and returns the probe outcomes for the parent to record.
+    """
+    request = DiscoveryRequest(**task.request)
+    stats = ScanStats(total_targets=count_shard_targets(request.ip_range, task.ip_range, request.ports))
+    outcomes: dict[tuple[str, int], bool] = {}
+
+    async def probe_shard() -> None:
+        rtt = SubnetRttEstimator(settings.discovery_min_timeout_seconds, settings.discovery_max_timeout_seconds)
+        targets = iter_shard_targets(request.ip_range, task.ip_range, request.ports)
+        planned = ((ip_address, port, None) for ip_address, port in targets)
+        window = min(DiscoveryEngine._probe_window(request.max_concurrency), max(stats.total_targets, 1))
+        async for _ in sweep(planned, request, stats, rtt, window, record):
+            pass
+
+    def record(ip_address: str, port: int, alive: bool) -> None:
+        outcomes[(ip_address, port)] = alive
+
+    asyncio.run(probe_shard())
+    checkpoint = {
+        "index": task.index,
+        "ip_range": task.ip_range,
+        "alive": [[ip, port] for (ip, port), alive in outcomes.items() if alive],
+        "dead": [[ip, port] for (ip, port), alive in outcomes.items() if not alive],
+        "stats": stats.model_dump(include={"probes_sent", "retries", "timeouts", "subnet_timeouts"}),
+    }
+    write_json(task.checkpoint_path, checkpoint)
+    return checkpoint
 
 
 class DiscoveryEngine:
-    def __init__(self, registry: EmulatorRegistry) -> None:
+    def __init__(
+        self,
+        registry: EmulatorRegistry,
+        work_queue_factory: Callable[[], WorkQueue] = LocalWorkQueue,
+        use_mongo: bool = True,
+    ) -> None:
         self._registry = registry
+        self._work_queue_factory = work_queue_factory
+        self._checkpoints = CheckpointStore(settings.discovery_checkpoint_dir)
         self._collection = None
+        self._async_collection = None
+        self._writer = None
         self._memory_logs: list[DiscoveryLog] = []
-        self._init_db()
+        self._running: set[str] = set()
+        self._results = DiscoveryResultStore(use_mongo=use_mongo)
+        self._reachability = ReachabilityCache(use_mongo=use_mongo)
+        self._rtt = SubnetRttEstimator(
+            settings.discovery_min_timeout_seconds,
+            settings.discovery_max_timeout_seconds,
+        )
+        if use_mongo:
+            self._init_db()
 
     def _init_db(self) -> None:
+        self._collection = get_collection("discovery_logs")
+        self._async_collection = get_async_collection("discovery_logs")
+        if self._collection is not None:
+            ensure_indexes(
+                self._collection,
+                [
+                    IndexModel([("started_at", DESCENDING), ("scan_id", DESCENDING)]),
+                    IndexModel([("scan_id", ASCENDING)], unique=True),
+                ],
+            )
+            self._writer = buffered_writer(self._collection)
+
+    @traced("DiscoveryEngine.scan")
+    async def scan(
+        self,
+        request: DiscoveryRequest,
+        scan_id: str | None = None,
+        stats: ScanStats | None = None,
+    ) -> list[DiscoveryResult]:
+        return [result async for result in self.iter_scan(request, scan_id, stats)]
+
+    async def iter_scan(
+        self,
+        request: DiscoveryRequest,
+        scan_id: str | None = None,
+        stats: ScanStats | None = None,
+        slot: Callable[..., AbstractAsyncContextManager[None]] | None = None,
+    ) -> AsyncIterator[DiscoveryResult]:
+        """``iter_records`` as ``DiscoveryResult`` models, for API responses."""
+        async for record in self.iter_records(request, scan_id, stats, slot):
+            yield record.to_model()
+
+    @traced("DiscoveryEngine.iter_records")
+    async def iter_records(
+        self,
+        request: DiscoveryRequest,
+        scan_id: str | None = None,
+        stats: ScanStats | None = None,
+        slot: Callable[..., AbstractAsyncContextManager[None]] | None = None,
+    ) -> AsyncIterator[ResultRecord]:
+        """Yield each discovered target as soon as its probe completes.
+
+        Targets are expanded lazily and pulled by a fixed pool of worker
+        coroutines, so memory stays bounded by the probe window no matter how
+        large ``ip_range`` is. A slow consumer applies backpressure through the
+        bounded result queue.
+
+        Every probe outcome is recorded in the reachability cache. With
+        ``request.incremental`` the cache also drives the scan: known meters
+        are verified first and targets it can still vouch for are not probed.
+        ``stats`` is updated in place as the scan runs. ``slot`` optionally
+        gates each probe on a shared limiter (see ``sweep``); sharded scans
+        call it with a slot count per shard.
+
+        With ``request.sharded`` the range is split into shards that run on a
+        process pool instead; see ``_iter_sharded``.
+        """
+        scan_id = scan_id or str(uuid4())
+        stats = stats if stats is not None else ScanStats()
+        self._running.add(scan_id)
+        ACTIVE_SCANS.inc()
         try:
-            client = MongoClient(settings.mongo_url, serverSelectionTimeoutMS=1000)
-            client.admin.command("ping")
-            self._collection = client[settings.mongo_db]["discovery_logs"]
-        except PyMongoError:
-            self._collection = None
+            if request.sharded:
+                async for record in self._iter_sharded(request, scan_id, stats, slot=slot):
+                    yield record
+                return
+
+            started_at = datetime.utcnow()
+            total_targets = count_targets(request.ip_range, request.ports)
+            stats.total_targets = total_targets
+            if not total_targets:
+                return
+
+            # Known meters in the range must be in memory so a meter found dead overwrites its saved state.
+            await asyncio.to_thread(self._reachability.load, request.ip_range, request.ports)
+            targets = iter_targets(request.ip_range, request.ports)
+            if request.incremental:
+                ttl = request.cache_ttl_seconds or settings.reachability_ttl_seconds
+                planned = plan_targets(self._reachability, targets, request.ip_range, request.ports, ttl)
+            else:
+                planned = ((ip_address, port, None) for ip_address, port in targets)
+            window = min(self._probe_window(request.max_concurrency), total_targets)
+
+            await self._results.start_scan(scan_id)
+            live = sweep(planned, request, stats, self._rtt, window, self._reachability.record, slot)
+            async for ip_address, port in live:
+                record = self._record_for(ip_address, port)
+                stats.discovered += 1
+                self._results.add(scan_id, record)
+                yield record
+
+            await asyncio.to_thread(self._reachability.flush)
+            await self._store_log(scan_id, request, stats, started_at)
+        finally:
+            ACTIVE_SCANS.dec()
+            self._running.discard(scan_id)
+
+    def is_running(self, scan_id: str) -> bool:
+        return scan_id in self._running
+
+    def has_checkpoint(self, scan_id: str) -> bool:
+        return self._checkpoints.manifest(scan_id) is not None
 
-    def scan(self, request: DiscoveryRequest) -> list[DiscoveryResult]:
+    @traced("DiscoveryEngine.resume")
+    async def resume(self, scan_id: str, stats: ScanStats | None = None) -> list[DiscoveryResult]:
+        return [result async for result in self.iter_resume(scan_id, stats)]
+
+    @traced("DiscoveryEngine.iter_resume")
+    async def iter_resume(self, scan_id: str, stats: ScanStats | None = None) -> AsyncIterator[DiscoveryResult]:
+        """Continue an interrupted sharded scan from its checkpoints.
+
+        Results of shards that already finished are replayed from their
+        checkpoints; only the remaining shards are probed. Raises
+        ``ScanRunningError`` if the scan is still running.
+        """
+        if scan_id in self._running:
+            raise ScanRunningError(scan_id)
+        manifest = self._checkpoints.manifest(scan_id)
+        if manifest is None:
+            raise KeyError(scan_id)
+        request = DiscoveryRequest(**manifest["request"])
+        stats = stats if stats is not None else ScanStats()
+        self._running.add(scan_id)
+        ACTIVE_SCANS.inc()
+        try:
+            async for record in self._iter_sharded(request, scan_id, stats, manifest["shards"]):
+                yield record.to_model()
+        finally:
+            ACTIVE_SCANS.dec()
+            self._running.discard(scan_id)
+
+    async def _iter_sharded(
+        self,
+        request: DiscoveryRequest,
+        scan_id: str,
+        stats: ScanStats,
+        shards: list[str] | None = None,
+        slot: Callable[[int], AbstractAsyncContextManager[None]] | None = None,
+    ) -> AsyncIterator[ResultRecord]:
+        """Run a scan as independent shards on a local process pool.
+
+        ``ip_range`` is split into blocks of ``DISCOVERY_SHARD_SIZE`` targets.
+        Each shard is a ``ShardTask`` taken from the work queue and probed in
+        a worker process, which checkpoints its outcome before returning it.
+        Results are yielded as whole shards complete. Checkpoints are removed
+        once every shard has finished, so an interrupted scan keeps them for
+        ``iter_resume``. Shards always probe every target; their outcomes are
+        still recorded in the reachability cache. With ``slot``, a shard holds
+        as many slots as its probe window until it finishes.
+        """
         started_at = datetime.utcnow()
-        targets = self._expand_targets(request.ip_range, request.ports)
-        results: list[DiscoveryResult] = []
-
-        if not targets:
-            return results
-
-        with ThreadPoolExecutor(max_workers=request.max_concurrency) as executor:
-            futures = [
-                executor.submit(
-                    self._probe_target,
-                    ip,
-                    port,
-                    request.timeout_seconds,
-                    request.retries,
-                )
-                for ip, port in targets
-            ]
-            for future in as_completed(futures):
-                target_result = future.result()
-                if target_result:
-                    results.append(target_result)
-
-        self._store_log(request, len(targets), len(results), started_at)
-        return results
-
-    def list_logs(self) -> list[DiscoveryLog]:
-        if not self._collection:
-            return list(self._memory_logs)
+        stats.total_targets = count_targets(request.ip_range, request.ports)
+        resuming = shards is not None
+        if shards is None:
+            hosts_per_shard = max(settings.discovery_shard_size // max(len(request.ports), 1), 1)
+            shards = split_range(request.ip_range, hosts_per_shard)
+            self._checkpoints.create(scan_id, request.model_dump(), shards)
+
+        completed = self._checkpoints.completed(scan_id) if resuming else {}
+        queue = self._work_queue_factory()
+        payload = request.model_dump()
+        for index, shard_range in enumerate(shards):
+            if index not in completed:
+                queue.put(ShardTask(scan_id, index, shard_range, payload, self._checkpoints.shard_path(scan_id, index)))
+
+        await asyncio.to_thread(self._reachability.load, request.ip_range, request.ports)
+        await self._results.start_scan(scan_id, reset=resuming)
+        for checkpoint in completed.values():
+            for record in self._apply_checkpoint(scan_id, checkpoint, stats):
+                yield record
+
+        workers = settings.discovery_shard_workers or os.cpu_count() or 1
+        loop = asyncio.get_running_loop()
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        running: dict[asyncio.Future, ShardTask] = {}
+
+        async def run(task: ShardTask) -> dict[str, object]:
+            if slot is None:
+                return await loop.run_in_executor(pool, run_shard, task)
+            targets = count_shard_targets(request.ip_range, task.ip_range, request.ports)
+            async with slot(min(self._probe_window(request.max_concurrency), max(targets, 1))):
+                return await loop.run_in_executor(pool, run_shard, task)
+
         try:
-            docs = list(self._collection.find({}, {"_id": 0}))
-            return [DiscoveryLog(**doc) for doc in docs]
+            while True:
+                while len(running) < workers and (task := queue.get()) is not None:
+                    running[asyncio.ensure_future(run(task))] = task
+                if not running:
+                    break
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    if future.exception() is not None:
+                        queue.nack(task)
+                        raise future.exception()
+                    queue.ack(task)
+                    for record in self._apply_checkpoint(scan_id, future.result(), stats):
+                        yield record
+        finally:
+            for future in running:
+                future.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        self._checkpoints.remove(scan_id)
+        await asyncio.to_thread(self._reachability.flush)
+        await self._store_log(scan_id, request, stats, started_at)
+
+    def _apply_checkpoint(
+        self,
+        scan_id: str,
+        checkpoint: dict,
+        stats: ScanStats,
+    ) -> Iterator[ResultRecord]:
+        shard_stats = checkpoint["stats"]
+        stats.probes_sent += shard_stats["probes_sent"]
+        stats.retries += shard_stats["retries"]
+        stats.timeouts += shard_stats["timeouts"]
+        PROBES.inc(shard_stats["probes_sent"])
+        PROBE_RETRIES.inc(shard_stats["retries"])
+        PROBE_TIMEOUTS.inc(shard_stats["timeouts"])
+        stats.completed += len(checkpoint["alive"]) + len(checkpoint["dead"])
+        stats.subnet_timeouts.update(shard_stats["subnet_timeouts"])
+        for ip_address, port in checkpoint["dead"]:
+            self._reachability.record(ip_address, port, False)
+        for ip_address, port in checkpoint["alive"]:
+            self._reachability.record(ip_address, port, True)
+            record = self._record_for(ip_address, port)
+            stats.discovered += 1
+            self._results.add(scan_id, record)
+            yield record
+
+    def list_results(
+        self,
+        scan_id: str,
+        query: PageQuery,
+        ip_address: str | None = None,
+        port: int | None = None,
+    ) -> Page[DiscoveryResult]:
+        return self._results.list(scan_id, query, ip_address, port)
+
+    @traced("DiscoveryEngine.list_results_async")
+    async def list_results_async(
+        self,
+        scan_id: str,
+        query: PageQuery,
+        ip_address: str | None = None,
+        port: int | None = None,
+    ) -> Page[DiscoveryResult]:
+        return await self._results.list_async(scan_id, query, ip_address, port)
+
+    def meter_ids_for_scan(self, scan_id: str) -> Iterator[str] | None:
+        """Meter ids found by a scan, or ``None`` if the scan is unknown."""
+        return self._results.meter_ids(scan_id)
+
+    @traced("DiscoveryEngine.meter_ids_for_scan_async")
+    async def meter_ids_for_scan_async(self, scan_id: str) -> list[str] | None:
+        return await self._results.meter_ids_async(scan_id)
+
+    def list_logs(self, query: PageQuery | None = None) -> Page[DiscoveryLog]:
+        query = query or PageQuery()
+        if self._collection is None:
+            return self._list_memory_logs(query)
+        try:
+            page = find_page(self._collection, query, {}, time_field="started_at", key_field="scan_id")
         except PyMongoError:
-            return list(self._memory_logs)
+            return self._list_memory_logs(query)
+        return Page(items=[DiscoveryLog(**doc) for doc in page.items], next_cursor=page.next_cursor)
 
-    @staticmethod
-    def _to_result(instance: MeterInstance) -> DiscoveryResult:
-        return DiscoveryResult(
-            meter_id=instance.meter_id,
-            ip_address=instance.ip_address,
-            port=instance.port,
-            discovered_at=datetime.utcnow(),
-            vendor=instance.vendor,
-            model=instance.model,
-            authentication=instance.authentication,
-            security_suite=instance.security_suite,
-        )
+    @traced("DiscoveryEngine.list_logs_async")
+    async def list_logs_async(self, query: PageQuery | None = None) -> Page[DiscoveryLog]:
+        query = query or PageQuery()
+        if self._async_collection is None:
+            return await asyncio.to_thread(self._list_memory_logs, query)
+        try:
+            page = await find_page_async(
+                self._async_collection, query, {}, time_field="started_at", key_field="scan_id"
+            )
+        except PyMongoError:
+            return await asyncio.to_thread(self._list_memory_logs, query)
+        return Page(items=[DiscoveryLog(**doc) for doc in page.items], next_cursor=page.next_cursor)
+
+    def _list_memory_logs(self, query: PageQuery) -> Page[DiscoveryLog]:
+        entries = ((log.scan_id, log) for log in self._memory_logs)
+        return paginate_memory(entries, query, lambda log: log.started_at)
 
     @staticmethod
-    def _expand_targets(ip_range: str, ports: list[int]) -> list[tuple[str, int]]:
-        network = ip_network(ip_range, strict=False)
-        targets: list[tuple[str, int]] = []
-        for host in network.hosts():
-            for port in ports:
-                targets.append((str(host), port))
-        return targets
-
-    def _probe_target(
-        self,
-        ip_address: str,
-        port: int,
-        timeout_seconds: float,
-        retries: int,
-    ) -> DiscoveryResult | None:
-        if not self._is_port_open(ip_address, port, timeout_seconds, retries):
-            return None
-
-        instance = self._registry.find_instance(ip_address, port)
-        if instance:
-            return self._to_result(instance)
-
-        return DiscoveryResult(
-            meter_id=str(uuid4()),
-            ip_address=ip_address,
+    def _probe_window(max_concurrency: int) -> int:
+        """Clamp the in-flight socket window to what the process can open."""
+        window = max(max_concurrency, 1)
+        if resource is None:
+            return window
+        soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft_limit == resource.RLIM_INFINITY:
+            return window
+        return max(1, min(window, soft_limit - FD_HEADROOM))
+
+    def _record_for(self, ip_address: str, port: int) -> ResultRecord:
+        started = time.perf_counter()
+        found = self._registry.find_device(ip_address, port)
+        _LOOKUP_SECONDS.observe(time.perf_counter() - started)
+        meter_id, device = found if found is not None else (uuid4().bytes, None)
+        packed = pack_ipv4(ip_address)
+        return ResultRecord(
+            meter_id=meter_id,
+            address=packed if packed is not None else ip_address,
             port=port,
-            discovered_at=datetime.utcnow(),
-            vendor=None,
-            model=None,
-            authentication=None,
-            security_suite=None,
-            reachable=True,
+            discovered_at=time.time(),
+            device=device,
         )
 
-    @staticmethod
-    def _is_port_open(
-        ip_address: str,
-        port: int,
-        timeout: float = 0.5,
-        retries: int = 1,
-    ) -> bool:
-        for _ in range(max(retries, 1)):
-            try:
-                with socket.create_connection((ip_address, port), timeout=timeout):
-                    return True
-            except OSError:
-                continue
-        return False
-
-    def _store_log(
+    async def _store_log(
         self,
+        scan_id: str,
         request: DiscoveryRequest,
-        total_targets: int,
-        discovered: int,
+        stats: ScanStats,
         started_at: datetime,
     ) -> None:
         log = DiscoveryLog(
-            scan_id=str(uuid4()),
+            scan_id=scan_id,
             ip_range=request.ip_range,
             ports=request.ports,
-            total_targets=total_targets,
-            discovered=discovered,
+            total_targets=stats.total_targets,
+            discovered=stats.discovered,
             started_at=started_at,
             completed_at=datetime.utcnow(),
+            incremental=request.incremental,
+            probes_sent=stats.probes_sent,
+            probes_saved=stats.probes_saved,
         )
         self._memory_logs.append(log)
 
-        if not self._collection:
-            return
-        try:
-            self._collection.insert_one(log.model_dump())
-        except PyMongoError:
+        if self._writer is None:
             return
+        # A scan writes one log, so wait for room rather than drop it, but in a worker thread.
+        await asyncio.to_thread(self._writer.submit, log.model_dump())
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Iterator
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.models.core import DiscoveryResult
+from app.services.mongo import (
+    buffered_writer,
+    ensure_indexes,
+    find_page,
+    find_page_async,
+    get_async_collection,
+    get_collection,
+)
+from app.services.pagination import Page, PageQuery, paginate_memory
+from app.services.records import ResultRecord, meter_id_str, pack_ipv4
+
+
+class DiscoveryResultStore:
+    """Per-target discovery results, keyed by scan_id.
+
+    Results are bulk-written to the ``discovery_results`` collection through
+    the shared write-behind buffer while a scan runs, without ever blocking
+    the scan: when the buffer is full the result is dropped and counted as
+    rejected in ``/metrics``. Nothing is kept in memory while Mongo is
+    configured, so a large scan does not grow the process. Without Mongo
+    (or with ``use_mongo=False``) the results of the most recent scans are
+    kept in memory instead, as compact ``ResultRecord``s; only the page
+    being served is turned into ``DiscoveryResult`` models.
+    """
+
+    def __init__(self, use_mongo: bool = True) -> None:
+        self._memory: OrderedDict[str, list[ResultRecord]] = OrderedDict()
+        self._collection = None
+        self._async_collection = None
+        self._writer = None
+        if use_mongo:
+            self._init_db()
+
+    def _init_db(self) -> None:
+        self._collection = get_collection("discovery_results")
+        self._async_collection = get_async_collection("discovery_results")
+        if self._collection is not None:
+            ensure_indexes(
+                self._collection,
+                [
+                    IndexModel([("scan_id", ASCENDING), ("discovered_at", DESCENDING), ("_id", DESCENDING)]),
+                    IndexModel([("scan_id", ASCENDING), ("ip_address", ASCENDING), ("port", ASCENDING)]),
+                    IndexModel([("ip_address", ASCENDING), ("port", ASCENDING)]),
+                ],
+            )
+            self._writer = buffered_writer(self._collection)
+
+    async def start_scan(self, scan_id: str, reset: bool = False) -> None:
+        """Start collecting results for ``scan_id``.
+
+        ``reset`` also drops results already stored for it, for a scan that is
+        re-run from its checkpoints.
+        """
+        if self._writer is None:
+            self._memory[scan_id] = []
+        if reset and self._async_collection is not None:
+            try:
+                await self._async_collection.delete_many({"scan_id": scan_id})
+            except PyMongoError:
+                pass
+        while len(self._memory) > settings.discovery_recent_scans:
+            self._memory.popitem(last=False)
+
+    def add(self, scan_id: str, record: ResultRecord) -> None:
+        results = self._memory.get(scan_id)
+        if results is not None:
+            results.append(record)
+
+        if self._writer is None:
+            return
+        doc = record.to_document()
+        doc["scan_id"] = scan_id
+        # Called on the event loop for every hit: never wait for room, a full buffer counts the result as rejected.
+        self._writer.offer([doc])
+
+    def list(
+        self,
+        scan_id: str,
+        query: PageQuery,
+        ip_address: str | None = None,
+        port: int | None = None,
+    ) -> Page[DiscoveryResult]:
+        if self._collection is None:
+            return self._list_memory(scan_id, query, ip_address, port)
+        filters = self._filters(scan_id, ip_address, port)
+        try:
+            page = find_page(self._collection, query, filters, time_field="discovered_at")
+        except PyMongoError:
+            return self._list_memory(scan_id, query, ip_address, port)
+        return self._to_page(page)
+
+    async def list_async(
+        self,
+        scan_id: str,
+        query: PageQuery,
+        ip_address: str | None = None,
+        port: int | None = None,
+    ) -> Page[DiscoveryResult]:
+        if self._async_collection is None:
+            return await asyncio.to_thread(self._list_memory, scan_id, query, ip_address, port)
+        filters = self._filters(scan_id, ip_address, port)
+        try:
+            page = await find_page_async(self._async_collection, query, filters, time_field="discovered_at")
+        except PyMongoError:
+            return await asyncio.to_thread(self._list_memory, scan_id, query, ip_address, port)
+        return self._to_page(page)
+
+    def meter_ids(self, scan_id: str) -> Iterator[str] | None:
+        """Meter ids found by ``scan_id``, or ``None`` if the scan is unknown."""
+        results = self._memory.get(scan_id)
+        if results is not None:
+            return (meter_id_str(record.meter_id) for record in list(results))
+        if self._collection is None:
+            return None
+        try:
+            if self._collection.find_one({"scan_id": scan_id}, {"_id": 1}) is None:
+                return None
+            cursor = self._collection.find({"scan_id": scan_id}, {"_id": 0, "meter_id": 1})
+        except PyMongoError:
+            return None
+        return (doc["meter_id"] for doc in cursor)
+
+    async def meter_ids_async(self, scan_id: str) -> list[str] | None:
+        """``meter_ids`` on the async client, collected into a list."""
+        results = self._memory.get(scan_id)
+        if results is not None:
+            return [meter_id_str(record.meter_id) for record in list(results)]
+        if self._async_collection is None:
+            return None
+        try:
+            if await self._async_collection.find_one({"scan_id": scan_id}, {"_id": 1}) is None:
+                return None
+            cursor = self._async_collection.find({"scan_id": scan_id}, {"_id": 0, "meter_id": 1})
+            return [doc["meter_id"] async for doc in cursor]
+        except PyMongoError:
+            return None
+
+    @staticmethod
+    def _filters(scan_id: str, ip_address: str | None, port: int | None) -> dict[str, object]:
+        filters: dict[str, object] = {"scan_id": scan_id}
+        if ip_address:
+            filters["ip_address"] = ip_address
+        if port is not None:
+            filters["port"] = port
+        return filters
+
+    @staticmethod
+    def _to_page(page: Page[dict[str, object]]) -> Page[DiscoveryResult]:
+        for doc in page.items:
+            doc.pop("scan_id", None)
+        return Page(items=[DiscoveryResult(**doc) for doc in page.items], next_cursor=page.next_cursor)
+
+    def _list_memory(
+        self,
+        scan_id: str,
+        query: PageQuery,
+        ip_address: str | None,
+        port: int | None,
+    ) -> Page[DiscoveryResult]:
+        packed = pack_ipv4(ip_address) if ip_address else None
+        address = packed if packed is not None else ip_address
+
+        def matches(record: ResultRecord) -> bool:
+            if address is not None and record.address != address:
+                return False
+            return port is None or record.port == port
+
+        entries = ((f"{index:012d}", record) for index, record in enumerate(self._memory.get(scan_id, [])))
+        page = paginate_memory(entries, query, lambda record: record.discovered, matches)
+        return Page(items=[record.to_model() for record in page.items], next_cursor=page.next_cursor)
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime
+import random
+import time
 from typing import Any
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.config import settings
 from app.models.core import AssociationObjectList, AssociationReport, MeterInstance, ObisNormalizationResult
+from app.services.metrics import ADAPTER_RETRIES, STAGE_SECONDS
+from app.services.tracing import traced
+
+# Retried for idempotent GETs only: a POST answered 502/503/504 may already have run on the adapter.
+RETRY_STATUSES = (502, 503, 504)
+# Failures that happen before the request is sent, so retrying cannot repeat an association.
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_ASSOCIATION_SECONDS = STAGE_SECONDS.labels("association")
+_ADAPTER_SECONDS = STAGE_SECONDS.labels("adapter_http")
 
 
 @dataclass
@@ -17,89 +33,229 @@ class DlmsClientResult:
 
 
 class DlmsClient:
-    def __init__(self) -> None:
-        self._adapter_url = settings.dlms_adapter_url
+    """Adapter client with keep-alive connection pools.
+
+    The sync methods share one ``requests.Session``; the ``*_async`` methods
+    share one ``httpx.AsyncClient`` created on first use in the running loop.
+    Both retry failed connects with jittered exponential backoff; 502/503/504
+    responses are retried for GETs only. A POST that may have reached the
+    adapter (a read timeout or a gateway error) is not sent again. Adapter
+    calls are timed under the ``adapter_http`` stage and associations under
+    ``association`` in ``/metrics``.
+    """
 
+    def __init__(self, adapter_url: str | None = None) -> None:
+        self._adapter_url = adapter_url or settings.dlms_adapter_url
+        self._timeout = settings.dlms_adapter_timeout_seconds
+        self._session = _build_session() if self._adapter_url else None
+        self._async_client: httpx.AsyncClient | None = None
+        self._host_slots: asyncio.Semaphore | None = None
+
+    @traced("DlmsClient.associate")
     def associate(self, meter: MeterInstance) -> AssociationReport:
-        if self._adapter_url:
-            payload = {
-                "meter_id": meter.meter_id,
-                "ip_address": meter.ip_address,
-                "port": meter.port,
-                "authentication": meter.authentication,
-                "security_suite": meter.security_suite,
-            }
-            response = requests.post(f"{self._adapter_url}/associate", json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return AssociationReport(
-                meter_id=meter.meter_id,
-                status=data.get("status", "failed"),
-                authentication=data.get("authentication", meter.authentication),
-                security_suite=data.get("security_suite", meter.security_suite),
-                aarq=data.get("aarq", ""),
-                aare=data.get("aare", ""),
-                created_at=datetime.utcnow(),
-            )
-        aarq = f"AARQ(auth={meter.authentication},suite={meter.security_suite})"
-        aare = f"AARE(result=accepted,vendor={meter.vendor},model={meter.model})"
-        return AssociationReport(
-            meter_id=meter.meter_id,
-            status="success",
-            authentication=meter.authentication,
-            security_suite=meter.security_suite,
-            aarq=aarq,
-            aare=aare,
-            created_at=datetime.utcnow(),
-        )
+        with _ASSOCIATION_SECONDS.time():
+            if self._adapter_url:
+                data = self._post("/associate", _association_payload(meter))
+                return _association_report(meter, data)
+            return _simulated_association(meter)
 
+    @traced("DlmsClient.associate_async")
+    async def associate_async(self, meter: MeterInstance) -> AssociationReport:
+        with _ASSOCIATION_SECONDS.time():
+            if self._adapter_url:
+                data = await self._apost("/associate", _association_payload(meter))
+                return _association_report(meter, data)
+            return _simulated_association(meter)
 
+    @traced("DlmsClient.fetch_association_objects")
     def fetch_association_objects(self, meter: MeterInstance) -> AssociationObjectList:
         if self._adapter_url:
-            payload = {
-                "meter_id": meter.meter_id,
-                "ip_address": meter.ip_address,
-                "port": meter.port,
-            }
-            response = requests.post(f"{self._adapter_url}/association-objects", json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return AssociationObjectList(
-                meter_id=meter.meter_id,
-                objects=data.get("objects", []),
-                created_at=datetime.utcnow(),
-            )
-        return AssociationObjectList(
-            meter_id=meter.meter_id,
-            objects=[obj.code for obj in meter.obis_objects],
-            created_at=datetime.utcnow(),
-        )
+            data = self._post("/association-objects", _meter_payload(meter))
+            return _association_objects(meter, data.get("objects", []))
+        return _association_objects(meter, [obj.code for obj in meter.obis_objects])
+
+    @traced("DlmsClient.fetch_association_objects_async")
+    async def fetch_association_objects_async(self, meter: MeterInstance) -> AssociationObjectList:
+        if self._adapter_url:
+            data = await self._apost("/association-objects", _meter_payload(meter))
+            return _association_objects(meter, data.get("objects", []))
+        return _association_objects(meter, [obj.code for obj in meter.obis_objects])
 
+    @traced("DlmsClient.fetch_obis")
     def fetch_obis(self, meter: MeterInstance) -> ObisNormalizationResult:
         if self._adapter_url:
-            payload = {
-                "meter_id": meter.meter_id,
-                "ip_address": meter.ip_address,
-                "port": meter.port,
-            }
-            response = requests.post(f"{self._adapter_url}/obis", json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return ObisNormalizationResult(
-                meter_id=meter.meter_id,
-                normalized=data.get("normalized", {}),
-                created_at=datetime.utcnow(),
-            )
-        normalized = {obj.code: obj.description for obj in meter.obis_objects}
-        return ObisNormalizationResult(
-            meter_id=meter.meter_id,
-            normalized=normalized,
-            created_at=datetime.utcnow(),
-        )
+            data = self._post("/obis", _meter_payload(meter))
+            return _obis_result(meter, data.get("normalized", {}))
+        return _obis_result(meter, {obj.code: obj.description for obj in meter.obis_objects})
+
+    @traced("DlmsClient.fetch_obis_async")
+    async def fetch_obis_async(self, meter: MeterInstance) -> ObisNormalizationResult:
+        if self._adapter_url:
+            data = await self._apost("/obis", _meter_payload(meter))
+            return _obis_result(meter, data.get("normalized", {}))
+        return _obis_result(meter, {obj.code: obj.description for obj in meter.obis_objects})
 
     def health(self) -> dict[str, Any]:
         if not self._adapter_url:
             return {"status": "disabled"}
-        response = requests.get(f"{self._adapter_url}/health", timeout=5)
+        response = self._session.get(f"{self._adapter_url}/health", timeout=5)
         response.raise_for_status()
         return response.json()
+
+    async def health_async(self) -> dict[str, Any]:
+        if not self._adapter_url:
+            return {"status": "disabled"}
+        response = await self._client().get("/health", timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    @traced("DlmsClient.http_post")
+    def _post(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        # The session retries inside urllib3, so this times the call including its retries.
+        with _ADAPTER_SECONDS.time():
+            response = self._session.post(f"{self._adapter_url}{path}", json=payload, timeout=self._timeout)
+        response.raise_for_status()
+        return response.json()
+
+    @traced("DlmsClient.http_post")
+    async def _apost(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        client = self._client()
+        for attempt in range(settings.dlms_adapter_retries):
+            try:
+                response = await self._timed_post(client, path, payload)
+            except RETRY_ERRORS:
+                ADAPTER_RETRIES.inc()
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            break
+        else:
+            response = await self._timed_post(client, path, payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def _timed_post(self, client: httpx.AsyncClient, path: str, payload: dict[str, Any]) -> httpx.Response:
+        async with self._host_slots:
+            started = time.perf_counter()
+            try:
+                return await client.post(path, json=payload)
+            finally:
+                _ADAPTER_SECONDS.observe(time.perf_counter() - started)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self._adapter_url,
+                timeout=self._timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.dlms_adapter_pool_size,
+                    max_keepalive_connections=settings.dlms_adapter_pool_size,
+                ),
+            )
+            # All adapter calls go to one host, so a single semaphore is the per-host limit.
+            self._host_slots = asyncio.Semaphore(settings.dlms_adapter_per_host_limit)
+        return self._async_client
+
+
+class _CountedRetry(Retry):
+    """``Retry`` that counts each retry urllib3 performs in ``ADAPTER_RETRIES``."""
+
+    def increment(self, *args: Any, **kwargs: Any) -> Retry:
+        retry = super().increment(*args, **kwargs)  # raises once the retries are exhausted
+        ADAPTER_RETRIES.inc()
+        return retry
+
+
+def _build_session() -> requests.Session:
+    retry = _CountedRetry(
+        total=settings.dlms_adapter_retries,
+        read=False,  # re-raise read timeouts: the adapter may already have run the request
+        backoff_factor=settings.dlms_adapter_backoff_seconds,
+        backoff_jitter=settings.dlms_adapter_backoff_seconds,
+        status_forcelist=RETRY_STATUSES,
+        # Gates status (and read) retries only; connect errors are retried for POST too.
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        # Every call goes to the one adapter host, so one pool whose size caps the connections.
+        pool_connections=1,
+        pool_maxsize=min(settings.dlms_adapter_pool_size, settings.dlms_adapter_per_host_limit),
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _backoff(attempt: int) -> float:
+    base = settings.dlms_adapter_backoff_seconds * (2 ** attempt)
+    return base + random.uniform(0, settings.dlms_adapter_backoff_seconds)
+
+
+def _meter_payload(meter: MeterInstance) -> dict[str, Any]:
+    return {
+        "meter_id": meter.meter_id,
+        "ip_address": meter.ip_address,
+        "port": meter.port,
+    }
+
+
+def _association_payload(meter: MeterInstance) -> dict[str, Any]:
+    return {
+        **_meter_payload(meter),
+        "authentication": meter.authentication,
+        "security_suite": meter.security_suite,
+    }
+
+
+def _association_report(meter: MeterInstance, data: dict[str, Any]) -> AssociationReport:
+    return AssociationReport(
+        meter_id=meter.meter_id,
+        status=data.get("status", "failed"),
+        authentication=data.get("authentication", meter.authentication),
+        security_suite=data.get("security_suite", meter.security_suite),
+        aarq=data.get("aarq", ""),
+        aare=data.get("aare", ""),
+        created_at=datetime.utcnow(),
+    )
+
+
+def _simulated_association(meter: MeterInstance) -> AssociationReport:
+    aarq = f"AARQ(auth={meter.authentication},suite={meter.security_suite})"
+    aare = f"AARE(result=accepted,vendor={meter.vendor},model={meter.model})"
+    return AssociationReport(
+        meter_id=meter.meter_id,
+        status="success",
+        authentication=meter.authentication,
+        security_suite=meter.security_suite,
+        aarq=aarq,
+        aare=aare,
+        created_at=datetime.utcnow(),
+    )
+
+
+def _association_objects(meter: MeterInstance, objects: list[str]) -> AssociationObjectList:
+    return AssociationObjectList(
+        meter_id=meter.meter_id,
+        objects=objects,
+        created_at=datetime.utcnow(),
+    )
+
+
+def _obis_result(meter: MeterInstance, normalized: dict[str, str]) -> ObisNormalizationResult:
+    return ObisNormalizationResult(
+        meter_id=meter.meter_id,
+        normalized=normalized,
+        created_at=datetime.utcnow(),
+    )
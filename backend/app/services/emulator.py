@@ -1,51 +1,263 @@
 from __future__ import annotations
 
-from collections import defaultdict
+from array import array
+from collections.abc import Callable, Iterator
+from threading import Lock
+import time
 from uuid import uuid4
 
-from app.models.core import MeterInstance, MeterTemplate, ObisObject
+from app.models.core import (
+    FleetProvisionResult,
+    FleetTemplateShare,
+    MeterInstance,
+    MeterTemplate,
+    ObisObject,
+)
+from app.services.records import (
+    DeviceProfile,
+    canonical_host,
+    format_ipv4,
+    meter_id_bytes,
+    meter_id_str,
+    pack_ipv4,
+)
+from app.services.targets import iter_host_targets
+
+
+class AddressInUseError(ValueError):
+    """Raised when an emulated meter is created on an occupied (ip, port)."""
+
+
+class InvalidPortError(ValueError):
+    """Raised when a meter port is outside 0-65535."""
 
 
 class EmulatorRegistry:
+    """Meter templates plus every emulated meter, stored column-wise.
+
+    A meter is one row across flat columns: its id as 16 raw bytes in
+    ``_ids``, its IPv4 address as an int in ``_ips``, its port in ``_ports``
+    and an index into the interned ``DeviceProfile`` table in ``_devices``.
+    Meters on IPv6 or named hosts keep their host text in ``_hosts``.
+    ``_by_id``, ``_by_address`` and ``_by_model`` index the rows by meter id,
+    address and (vendor, model). Deleted rows are reused. ``MeterInstance`` models are only built when a
+    meter is handed out, so a million meters cost a few hundred bytes each
+    instead of a Pydantic model apiece.
+    """
+
     def __init__(self) -> None:
         self._templates: dict[str, MeterTemplate] = {}
-        self._instances: dict[str, MeterInstance] = {}
+        self._profiles: list[DeviceProfile] = []
+        self._profile_rows: dict[tuple[int, str, int], int] = {}
+        self._ids = bytearray()
+        self._ips = array("I")
+        self._ports = array("H")
+        self._devices = array("H")
+        self._hosts: dict[int, str] = {}
+        self._free: list[int] = []
+        self._by_id: dict[bytes, int] = {}
+        self._by_address: dict[int | tuple[str, int], int] = {}
+        self._by_model: dict[tuple[str, str], set[int]] = {}
+        self._lock = Lock()
+        self._template_listeners: list[Callable[[MeterTemplate], None]] = []
+        # Bumped on every change, so callers can cache what they derive from the lists.
+        self.templates_version = 0
+        self.instances_version = 0
+
+    def add_template_listener(self, listener: Callable[[MeterTemplate], None]) -> None:
+        """Call ``listener`` whenever a template is registered or replaced with different content."""
+        self._template_listeners.append(listener)
 
     def register_template(self, template: MeterTemplate) -> None:
         key = f"{template.vendor}:{template.model}"
+        previous = self._templates.get(key)
         self._templates[key] = template
+        if previous is not None and previous == template:
+            return
+        self.templates_version += 1
+        for listener in self._template_listeners:
+            listener(template)
 
     def list_templates(self) -> list[MeterTemplate]:
         return list(self._templates.values())
 
+    def get_template(self, vendor: str, model: str) -> MeterTemplate | None:
+        return self._templates.get(f"{vendor}:{model}")
+
     def create_instance(self, vendor: str, model: str, ip_address: str, port: int) -> MeterInstance:
-        key = f"{vendor}:{model}"
-        template = self._templates[key]
-        meter_id = str(uuid4())
-        instance = MeterInstance(
-            meter_id=meter_id,
-            vendor=template.vendor,
-            model=template.model,
-            ip_address=ip_address,
-            port=port,
-            authentication=template.authentication_modes[0],
-            security_suite=template.security_suites[0],
-            obis_objects=template.obis_objects,
-            )
-
-
-        self._instances[meter_id] = instance
-        return instance
+        template = self._templates[f"{vendor}:{model}"]
+        _check_ports([port])
+        host, address = _address_key(ip_address, port)
+        with self._lock:
+            if address in self._by_address:
+                raise AddressInUseError(f"{ip_address}:{port} is already assigned to a meter")
+            row = self._add(uuid4().bytes, host, port, address, self._profile_for(template))
+            self.instances_version += 1
+            return self._instance(row)
+
+    def provision_fleet(
+        self,
+        shares: list[FleetTemplateShare],
+        ip_range: str,
+        ports: list[int],
+    ) -> FleetProvisionResult:
+        """Create one instance per host and port, cycling through ``shares`` by weight.
+
+        Addresses that are already taken are skipped. Instances of a template
+        share one interned ``DeviceProfile`` and therefore its
+        ``obis_objects`` list.
+        """
+        started = time.perf_counter()
+        templates = [self._templates[f"{share.vendor}:{share.model}"] for share in shares]
+        _check_ports(ports)
+        by_template = {f"{template.vendor}:{template.model}": 0 for template in templates}
+        requested = created = 0
+
+        with self._lock:
+            rotation = [
+                (f"{template.vendor}:{template.model}", self._profile_for(template))
+                for template, share in zip(templates, shares)
+                for _ in range(share.weight)
+            ]
+            for host, port in iter_host_targets(ip_range, ports):
+                key, device = rotation[requested % len(rotation)]
+                requested += 1
+                address = host << 16 | port if isinstance(host, int) else (host, port)
+                if address in self._by_address:
+                    continue
+                self._add(uuid4().bytes, host, port, address, device)
+                by_template[key] += 1
+                created += 1
+            if created:
+                self.instances_version += 1
+
+        elapsed = time.perf_counter() - started
+        return FleetProvisionResult(
+            requested=requested,
+            created=created,
+            skipped=requested - created,
+            by_template=by_template,
+            elapsed_seconds=round(elapsed, 4),
+            instances_per_second=round(created / elapsed, 1) if elapsed else 0.0,
+        )
+
+    def delete_instance(self, meter_id: str) -> bool:
+        key = meter_id_bytes(meter_id)
+        with self._lock:
+            row = self._by_id.pop(key, None) if key is not None else None
+            if row is None:
+                return False
+            host = self._hosts.pop(row, None)
+            port = self._ports[row]
+            self._by_address.pop((host, port) if host is not None else self._ips[row] << 16 | port, None)
+            profile = self._profiles[self._devices[row]]
+            self._by_model[(profile.vendor, profile.model)].discard(row)
+            self._devices[row] = _FREE_ROW
+            self._free.append(row)
+            self.instances_version += 1
+        return True
 
     def list_instances(self) -> list[MeterInstance]:
-        return list(self._instances.values())
+        return [self._instance(row) for row in list(self._by_id.values())]
+
+    def iter_addresses(self) -> Iterator[tuple[str, int]]:
+        """(host, port) of every instance, without building the instances."""
+        for row in list(self._by_id.values()):
+            yield self._host(row), self._ports[row]
 
+    def count_instances(self) -> int:
+        return len(self._by_id)
+
+    def get_instance(self, meter_id: str) -> MeterInstance | None:
+        key = meter_id_bytes(meter_id)
+        row = self._by_id.get(key) if key is not None else None
+        return self._instance(row) if row is not None else None
 
     def find_instance(self, ip_address: str, port: int) -> MeterInstance | None:
-        for instance in self._instances.values():
-            if instance.ip_address == ip_address and instance.port == port:
-                return instance
-        return None
+        row = self._by_address.get(_address_key(ip_address, port)[1])
+        return self._instance(row) if row is not None else None
+
+    def find_device(self, ip_address: str, port: int) -> tuple[bytes, DeviceProfile] | None:
+        """Raw meter id and shared device profile of the instance at an address."""
+        row = self._by_address.get(_address_key(ip_address, port)[1])
+        if row is None:
+            return None
+        return bytes(self._ids[row * 16 : row * 16 + 16]), self._profiles[self._devices[row]]
+
+    def find_by_model(self, vendor: str, model: str) -> list[MeterInstance]:
+        with self._lock:
+            rows = sorted(self._by_model.get((vendor, model), ()))
+        return [self._instance(row) for row in rows]
+
+    def _profile_for(self, template: MeterTemplate) -> int:
+        """Index of the interned profile for new instances of ``template``. Caller holds the lock."""
+        key = (id(template), template.authentication_modes[0], template.security_suites[0])
+        index = self._profile_rows.get(key)
+        if index is None:
+            index = self._profile_rows[key] = len(self._profiles)
+            # The profile keeps the template alive, so its id stays unique.
+            self._profiles.append(DeviceProfile(template, key[1], key[2]))
+        return index
+
+    def _add(self, meter_id: bytes, host: int | str, port: int, address: int | tuple[str, int], device: int) -> int:
+        """Store one meter and return its row. Caller holds the lock."""
+        ip = host if isinstance(host, int) else 0
+        if self._free:
+            row = self._free.pop()
+            self._ids[row * 16 : row * 16 + 16] = meter_id
+            self._ips[row] = ip
+            self._ports[row] = port
+            self._devices[row] = device
+        else:
+            row = len(self._ports)
+            self._ids += meter_id
+            self._ips.append(ip)
+            self._ports.append(port)
+            self._devices.append(device)
+        if isinstance(host, str):
+            self._hosts[row] = host
+        self._by_id[meter_id] = row
+        self._by_address[address] = row
+        profile = self._profiles[device]
+        self._by_model.setdefault((profile.vendor, profile.model), set()).add(row)
+        return row
+
+    def _host(self, row: int) -> str:
+        host = self._hosts.get(row)
+        return host if host is not None else format_ipv4(self._ips[row])
+
+    def _instance(self, row: int) -> MeterInstance:
+        profile = self._profiles[self._devices[row]]
+        # Template fields are already validated; model_construct keeps the
+        # shared obis_objects list instead of re-validating it into a copy.
+        return MeterInstance.model_construct(
+            meter_id=meter_id_str(bytes(self._ids[row * 16 : row * 16 + 16])),
+            vendor=profile.vendor,
+            model=profile.model,
+            ip_address=self._host(row),
+            port=self._ports[row],
+            authentication=profile.authentication,
+            security_suite=profile.security_suite,
+            obis_objects=profile.template.obis_objects,
+        )
+
+
+_FREE_ROW = 0xFFFF
+
+
+def _check_ports(ports: list[int]) -> None:
+    for port in ports:
+        if not 0 <= port <= 0xFFFF:
+            raise InvalidPortError(f"port {port} is out of range")
+
+
+def _address_key(ip_address: str, port: int) -> tuple[int | str, int | tuple[str, int]]:
+    """Stored host and index key of an address: a packed int for IPv4, canonical text otherwise."""
+    packed = pack_ipv4(ip_address)
+    if packed is not None:
+        return packed, packed << 16 | port
+    host = canonical_host(ip_address)
+    return host, (host, port)
 
 
 DEFAULT_TEMPLATES = [
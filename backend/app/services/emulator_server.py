@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import ipaddress
+import random
+import struct
+import zlib
+
+from app.models.core import EmulatorServerConfig, EmulatorServerStatus, MeterInstance, MeterTemplate
+from app.services.emulator import EmulatorRegistry
+
+# IEC 62056-47 wrapper: version, source wPort, destination wPort, APDU length.
+WRAPPER_HEADER = struct.Struct(">HHHH")
+WRAPPER_VERSION = 0x0001
+PUBLIC_CLIENT_WPORT = 0x0010
+MANAGEMENT_SERVER_WPORT = 0x0001
+
+AARQ_TAG = 0x60
+AARE_TAG = 0x61
+RLRQ_TAG = 0x62
+RLRE_TAG = 0x63
+GET_REQUEST_TAG = 0xC0
+GET_RESPONSE_TAG = 0xC4
+EXCEPTION_RESPONSE_TAG = 0xD8
+
+# Object identifiers 2.16.756.5.8.1.x (application context) and 2.16.756.5.8.2.x (mechanism).
+_CONTEXT_NAME_PREFIX = bytes.fromhex("608574050801")
+_MECHANISM_NAME_PREFIX = bytes.fromhex("608574050802")
+_MECHANISM_IDS = {"LLS": 1, "HLS": 5}
+_CONFORMANCE = {"LN": bytes.fromhex("00101D"), "SN": bytes.fromhex("1C0320")}
+_VAA_NAME = {"LN": 0x0007, "SN": 0xFA00}
+_MAX_PDU_SIZE = 0x0400
+
+
+@dataclass
+class _Counters:
+    connections: int = 0
+    requests: int = 0
+    dropped: int = 0
+    unknown_targets: int = 0
+    errors: int = 0
+
+
+@dataclass
+class _ServerState:
+    config: EmulatorServerConfig = field(default_factory=EmulatorServerConfig)
+    servers: dict[tuple[str, int], asyncio.AbstractServer] = field(default_factory=dict)
+    counters: _Counters = field(default_factory=_Counters)
+
+
+class EmulatorServer:
+    """Serve registry meters over TCP from the running event loop.
+
+    Each connection is matched to a ``MeterInstance`` by the local address it
+    arrived on, so one handler serves every meter. By default one listener is
+    bound per loopback instance address; with ``bind_host`` set, one listener
+    per distinct port is bound on that host and dispatch relies on the
+    destination address alone, which keeps thousands of 127.x.y.z meters on a
+    handful of sockets.
+
+    Responses are a minimal, unciphered subset of DLMS/COSEM: AARQ -> AARE,
+    GET.request-normal -> GET.response-normal and RLRQ -> RLRE, framed with
+    the TCP wrapper header. A request the meter cannot serve (e.g. a
+    malformed OBIS code in its template) gets an error response and the
+    connection stays open.
+    """
+
+    def __init__(self, registry: EmulatorRegistry) -> None:
+        self._registry = registry
+        self._state = _ServerState()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._state.servers)
+
+    async def start(self, config: EmulatorServerConfig | None = None) -> EmulatorServerStatus:
+        """Bind listeners for every servable instance; safe to call again to pick up new meters."""
+        if config is not None:
+            if self.running and config.bind_host != self._state.config.bind_host:
+                await self.stop()
+            self._state.config = config
+
+        for address in self._listen_addresses():
+            if address in self._state.servers:
+                continue
+            host, port = address
+            self._state.servers[address] = await asyncio.start_server(
+                self._handle,
+                host,
+                port,
+                reuse_address=True,
+                backlog=self._state.config.backlog,
+            )
+        return self.status()
+
+    async def stop(self) -> EmulatorServerStatus:
+        servers = list(self._state.servers.values())
+        self._state.servers.clear()
+        for server in servers:
+            server.close()
+        await asyncio.gather(*(server.wait_closed() for server in servers), return_exceptions=True)
+        return self.status()
+
+    def status(self) -> EmulatorServerStatus:
+        counters = self._state.counters
+        return EmulatorServerStatus(
+            running=self.running,
+            listeners=len(self._state.servers),
+            connections=counters.connections,
+            requests=counters.requests,
+            dropped=counters.dropped,
+            unknown_targets=counters.unknown_targets,
+            errors=counters.errors,
+            config=self._state.config,
+        )
+
+    def _listen_addresses(self) -> list[tuple[str, int]]:
+        bind_host = self._state.config.bind_host
+        if bind_host:
+            return sorted({(bind_host, port) for _, port in self._registry.iter_addresses()})
+        return sorted(
+            {(host, port) for host, port in self._registry.iter_addresses() if _is_loopback(host)}
+        )
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        counters = self._state.counters
+        counters.connections += 1
+        local_ip, local_port = writer.get_extra_info("sockname")[:2]
+        instance = self._registry.find_instance(local_ip, local_port)
+        try:
+            if instance is None:
+                counters.unknown_targets += 1
+                return
+            template = self._registry.get_template(instance.vendor, instance.model)
+            while True:
+                header = await reader.readexactly(WRAPPER_HEADER.size)
+                _, source, destination, length = WRAPPER_HEADER.unpack(header)
+                apdu = await reader.readexactly(length)
+                counters.requests += 1
+
+                config = self._state.config
+                if config.loss_rate and random.random() < config.loss_rate:
+                    counters.dropped += 1
+                    continue
+                delay = config.latency_ms + (random.uniform(0, config.jitter_ms) if config.jitter_ms else 0)
+                if delay:
+                    await asyncio.sleep(delay / 1000)
+
+                try:
+                    response = respond(apdu, instance, template)
+                except ValueError:  # e.g. a malformed OBIS code in the template
+                    counters.errors += 1
+                    response = build_error_response(apdu)
+                writer.write(wrap(response, source=destination, destination=source))
+                await writer.drain()
+                if response[0] == RLRE_TAG:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+
+def wrap(apdu: bytes, source: int = PUBLIC_CLIENT_WPORT, destination: int = MANAGEMENT_SERVER_WPORT) -> bytes:
+    return WRAPPER_HEADER.pack(WRAPPER_VERSION, source, destination, len(apdu)) + apdu
+
+
+def respond(apdu: bytes, instance: MeterInstance, template: MeterTemplate | None) -> bytes:
+    if not apdu:
+        return build_error_response(apdu)
+    referencing = template.referencing if template else "LN"
+    tag = apdu[0]
+    if tag == AARQ_TAG:
+        return build_aare(instance, referencing)
+    if tag == GET_REQUEST_TAG:
+        return build_get_response(apdu, instance)
+    if tag == RLRQ_TAG:
+        return bytes([RLRE_TAG, 0x03, 0x80, 0x01, 0x00])
+    return build_error_response(apdu)
+
+
+def build_aarq(authentication: str = "None", referencing: str = "LN") -> bytes:
+    body = _tlv(0xA1, _tlv(0x06, _context_name(authentication, referencing)))
+    if authentication in _MECHANISM_IDS:
+        body += bytes([0x8A, 0x02, 0x07, 0x80])
+        body += _tlv(0x8B, _MECHANISM_NAME_PREFIX + bytes([_MECHANISM_IDS[authentication]]))
+        body += _tlv(0xAC, _tlv(0x80, b"00000000"))
+    initiate_request = (
+        bytes([0x01, 0x00, 0x00, 0x00, 0x06, 0x5F, 0x1F, 0x04, 0x00])
+        + _CONFORMANCE[referencing]
+        + struct.pack(">H", 0xFFFF)
+    )
+    body += _tlv(0xBE, _tlv(0x04, initiate_request))
+    return _tlv(AARQ_TAG, body)
+
+
+def build_aare(instance: MeterInstance, referencing: str = "LN") -> bytes:
+    authentication = instance.authentication
+    body = _tlv(0xA1, _tlv(0x06, _context_name(authentication, referencing)))
+    body += bytes.fromhex("A203020100")  # association-result: accepted
+    body += bytes.fromhex("A305A103020100")  # result-source-diagnostic: acse-service-user null
+    if authentication in _MECHANISM_IDS:
+        body += bytes([0x88, 0x02, 0x07, 0x80])
+        body += _tlv(0x89, _MECHANISM_NAME_PREFIX + bytes([_MECHANISM_IDS[authentication]]))
+        if authentication == "HLS":
+            challenge = zlib.crc32(instance.meter_id.encode()).to_bytes(4, "big") * 4
+            body += _tlv(0xAA, _tlv(0x80, challenge))
+    initiate_response = (
+        bytes([0x08, 0x00, 0x06, 0x5F, 0x1F, 0x04, 0x00])
+        + _CONFORMANCE[referencing]
+        + struct.pack(">HH", _MAX_PDU_SIZE, _VAA_NAME[referencing])
+    )
+    body += _tlv(0xBE, _tlv(0x04, initiate_response))
+    return _tlv(AARE_TAG, body)
+
+
+def build_get_request(obis_code: str, class_id: int = 3, attribute: int = 2, invoke_id: int = 0xC1) -> bytes:
+    return (
+        bytes([GET_REQUEST_TAG, 0x01, invoke_id])
+        + struct.pack(">H", class_id)
+        + encode_obis(obis_code)
+        + bytes([attribute, 0x00])
+    )
+
+
+def build_get_response(apdu: bytes, instance: MeterInstance) -> bytes:
+    invoke_id = apdu[2] if len(apdu) > 2 else 0xC1
+    requested = apdu[5:11]
+    for obj in instance.obis_objects:
+        if encode_obis(obj.code) == requested:
+            value = zlib.crc32(f"{instance.meter_id}:{obj.code}".encode()) & 0x00FFFFFF
+            # data(0) double-long-unsigned(0x06)
+            return bytes([GET_RESPONSE_TAG, 0x01, invoke_id, 0x00, 0x06]) + struct.pack(">I", value)
+    # data-access-result: object-undefined
+    return bytes([GET_RESPONSE_TAG, 0x01, invoke_id, 0x01, 0x04])
+
+
+def build_error_response(apdu: bytes) -> bytes:
+    """Answer a request the meter failed to serve without dropping the connection."""
+    if apdu and apdu[0] == GET_REQUEST_TAG:
+        invoke_id = apdu[2] if len(apdu) > 2 else 0xC1
+        # data-access-result: other-reason
+        return bytes([GET_RESPONSE_TAG, 0x01, invoke_id, 0x01, 0xFA])
+    # exception-response: state-error service-unknown, service-error other-reason
+    return bytes([EXCEPTION_RESPONSE_TAG, 0x02, 0x03])
+
+
+def encode_obis(code: str) -> bytes:
+    """Encode ``A-B:C.D.E[.F]`` as the six-byte logical name (F defaults to 255)."""
+    medium, rest = code.split("-", 1)
+    channel, rest = rest.split(":", 1)
+    groups = [int(medium), int(channel), *(int(part) for part in rest.replace("*", ".").split("."))]
+    if len(groups) == 5:
+        groups.append(255)
+    return bytes(groups)
+
+
+async def open_association(
+    ip_address: str,
+    port: int,
+    authentication: str = "None",
+    referencing: str = "LN",
+    timeout: float = 2.0,
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bytes]:
+    """Connect, send an AARQ and return the stream pair with the AARE payload."""
+    async with asyncio.timeout(timeout):
+        reader, writer = await asyncio.open_connection(ip_address, port)
+        try:
+            aare = await exchange(reader, writer, build_aarq(authentication, referencing))
+        except BaseException:
+            writer.close()
+            raise
+    return reader, writer, aare
+
+
+async def exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, apdu: bytes) -> bytes:
+    writer.write(wrap(apdu))
+    await writer.drain()
+    header = await reader.readexactly(WRAPPER_HEADER.size)
+    _, _, _, length = WRAPPER_HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+
+def _context_name(authentication: str, referencing: str) -> bytes:
+    context_id = (1 if referencing == "LN" else 2) + (2 if authentication == "HLS" else 0)
+    return _CONTEXT_NAME_PREFIX + bytes([context_id])
+
+
+def _tlv(tag: int, value: bytes) -> bytes:
+    return bytes([tag, len(value)]) + value
+
+
+def _is_loopback(ip_address: str) -> bool:
+    try:
+        return ipaddress.ip_address(ip_address).is_loopback
+    except ValueError:
+        return False
@@ -1,72 +1,196 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
+import re
+from threading import Lock
+import time
 from uuid import uuid4
 
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pymongo.errors import PyMongoError
 
 from app.config import settings
-from app.models.core import Fingerprint, MeterInstance
+from app.models.core import Fingerprint, FingerprintCacheStats, MeterInstance, MeterTemplate
+from app.services.metrics import STAGE_SECONDS
+from app.services.mongo import (
+    buffered_writer,
+    ensure_indexes,
+    find_page,
+    find_page_async,
+    get_async_collection,
+    get_collection,
+)
+from app.services.pagination import Page, PageQuery, paginate_memory
+from app.services.tracing import traced
 from app.services.vendor import VendorClassifier
 
+_FINGERPRINT_SECONDS = STAGE_SECONDS.labels("fingerprint")
+
+
+@dataclass(frozen=True, slots=True)
+class _Computed:
+    signature: str
+    features: dict[str, str]
+    classification: str
+
 
 class FingerprintingEngine:
-    def __init__(self) -> None:
-        self._classifier = VendorClassifier()
+    """Builds meter fingerprints, memoizing the per-device-type work.
+
+    Meters with the same signature (vendor, model, authentication, security
+    suite) and OBIS code set get identical features and classification, so
+    those are computed once and kept in an LRU of ``cache_size`` entries.
+    Entries for a vendor/model are dropped when its template changes (see
+    ``invalidate_template``).
+    """
 
+    def __init__(self, cache_size: int | None = None) -> None:
+        self._classifier = VendorClassifier()
+        self._cache_size = settings.fingerprint_cache_size if cache_size is None else cache_size
+        self._cache: OrderedDict[tuple[str, frozenset[str]], _Computed] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @traced("FingerprintingEngine.build_fingerprint")
     def build_fingerprint(self, meter: MeterInstance) -> Fingerprint:
+        started = time.perf_counter()
+        computed = self._computed(meter)
+        fingerprint = Fingerprint(
+            meter_id=meter.meter_id,
+            vendor_signature=computed.signature,
+            features=dict(computed.features),
+            created_at=datetime.utcnow(),
+            vendor_classification=computed.classification,
+        )
+        _FINGERPRINT_SECONDS.observe(time.perf_counter() - started)
+        return fingerprint
+
+    def invalidate_template(self, template: MeterTemplate) -> None:
+        """Drop memoized entries for the template's vendor and model."""
+        prefix = f"{template.vendor}:{template.model}:"
+        with self._lock:
+            stale = [key for key in self._cache if key[0].startswith(prefix)]
+            for key in stale:
+                del self._cache[key]
+            self.invalidations += len(stale)
+
+    def cache_stats(self) -> FingerprintCacheStats:
+        lookups = self.hits + self.misses
+        return FingerprintCacheStats(
+            size=len(self._cache),
+            max_size=self._cache_size,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=round(self.hits / lookups, 4) if lookups else 0.0,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+        )
+
+    def _computed(self, meter: MeterInstance) -> _Computed:
         signature = f"{meter.vendor}:{meter.model}:{meter.authentication}:{meter.security_suite}"
+        key = (signature, frozenset(obj.code for obj in meter.obis_objects))
+        with self._lock:
+            computed = self._cache.get(key)
+            if computed is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return computed
+            self.misses += 1
 
         features = {
             "referencing": "LN" if meter.model.endswith("0") else "SN",
             "obis_count": str(len(meter.obis_objects)),
         }
-
         classification = self._classifier.classify(meter)
+        computed = _Computed(signature, features, classification.classification)
+        if self._cache_size <= 0:
+            return computed
 
-        return Fingerprint(
-            meter_id=meter.meter_id,
-            vendor_signature=signature,
-            features=features,
-            created_at=datetime.utcnow(),
-            vendor_classification=classification.classification,
-        )
+        with self._lock:
+            self._cache[key] = computed
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return computed
 
 
 class FingerprintLog:
     def __init__(self) -> None:
         self._logs: dict[str, Fingerprint] = {}
         self._collection = None
+        self._async_collection = None
+        self._writer = None
         self._init_db()
 
     def _init_db(self) -> None:
-        try:
-            client = MongoClient(settings.mongo_url, serverSelectionTimeoutMS=1000)
-            client.admin.command("ping")
-            self._collection = client[settings.mongo_db]["fingerprints"]
-        except PyMongoError:
-            self._collection = None
-
+        self._collection = get_collection("fingerprints")
+        self._async_collection = get_async_collection("fingerprints")
+        if self._collection is not None:
+            ensure_indexes(
+                self._collection,
+                [
+                    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+                    IndexModel([("meter_id", ASCENDING), ("created_at", DESCENDING)]),
+                    IndexModel([("vendor_signature", ASCENDING), ("created_at", DESCENDING)]),
+                ],
+            )
+            self._writer = buffered_writer(self._collection)
+
+    @traced("FingerprintLog.store")
     def store(self, fingerprint: Fingerprint) -> None:
         self._logs[str(uuid4())] = fingerprint
 
-        if self._collection is None:
+        if self._writer is None:
             return
 
-        try:
-            doc = fingerprint.model_dump()
-            doc["created_at"] = fingerprint.created_at  # BSON-safe datetime
-            self._collection.insert_one(doc)
-        except PyMongoError:
-            return
+        doc = fingerprint.model_dump()
+        doc["created_at"] = fingerprint.created_at  # BSON-safe datetime
+        self._writer.submit(doc)
 
-    def list(self) -> list[Fingerprint]:
+    def list(self, query: PageQuery | None = None) -> Page[Fingerprint]:
+        query = query or PageQuery()
         if self._collection is None:
-            return list(self._logs.values())
-
+            return self._list_memory(query)
+        try:
+            page = find_page(self._collection, query, self._filters(query), time_field="created_at")
+        except PyMongoError:
+            return self._list_memory(query)
+        return Page(items=[Fingerprint(**doc) for doc in page.items], next_cursor=page.next_cursor)
+
+    @traced("FingerprintLog.list_async")
+    async def list_async(self, query: PageQuery | None = None) -> Page[Fingerprint]:
+        query = query or PageQuery()
+        if self._async_collection is None:
+            return await asyncio.to_thread(self._list_memory, query)
         try:
-            docs = list(self._collection.find({}, {"_id": 0}))
-            return [Fingerprint(**doc) for doc in docs]
+            page = await find_page_async(self._async_collection, query, self._filters(query), time_field="created_at")
         except PyMongoError:
-            return list(self._logs.values())
+            return await asyncio.to_thread(self._list_memory, query)
+        return Page(items=[Fingerprint(**doc) for doc in page.items], next_cursor=page.next_cursor)
+
+    @staticmethod
+    def _filters(query: PageQuery) -> dict[str, object]:
+        filters: dict[str, object] = {}
+        if query.meter_id:
+            filters["meter_id"] = query.meter_id
+        if query.vendor:
+            # Anchored prefix, so the vendor_signature index can serve it.
+            filters["vendor_signature"] = {"$regex": f"^{re.escape(query.vendor)}:"}
+        return filters
+
+    def _list_memory(self, query: PageQuery) -> Page[Fingerprint]:
+        vendor_prefix = f"{query.vendor}:" if query.vendor else None
+
+        def matches(fingerprint: Fingerprint) -> bool:
+            if query.meter_id and fingerprint.meter_id != query.meter_id:
+                return False
+            return vendor_prefix is None or fingerprint.vendor_signature.startswith(vendor_prefix)
+
+        return paginate_memory(self._logs.items(), query, lambda fp: fp.created_at, matches)
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+import math
+from threading import Lock, get_ident
+import time
+from typing import Generic, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; spans sub-millisecond lookups up to slow adapter calls.
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: Labels) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = Lock()
+        self._functions: dict[Labels, Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], labels: Labels = ()) -> None:
+        """Read the series for ``labels`` from ``function`` at scrape time instead of storing it."""
+        with self._lock:
+            self._functions[labels] = function
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            functions = dict(self._functions)
+        for labels, function in functions.items():
+            yield self.name, _format_labels(self.labelnames, labels), float(function())
+
+
+class _Cells:
+    """One label set's values, as one cell list per writing thread.
+
+    A thread only ever writes its own cells, so updates need no lock and
+    none are lost; the lock is only taken when a new thread first writes.
+    Scrapes add the threads' cells together.
+    """
+
+    __slots__ = ("_shards", "_width", "_lock")
+
+    def __init__(self, width: int) -> None:
+        self._shards: dict[int, list[float]] = {}
+        self._width = width
+        self._lock = Lock()
+
+    def _new_shard(self) -> list[float]:
+        with self._lock:
+            return self._shards.setdefault(get_ident(), [0.0] * self._width)
+
+    def totals(self) -> list[float]:
+        with self._lock:
+            shards = list(self._shards.values())
+        return [sum(column) for column in zip(*shards)] or [0.0] * self._width
+
+
+class CounterChild(_Cells):
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        cells = self._shards.get(get_ident()) or self._new_shard()
+        cells[0] += amount
+
+
+class HistogramChild(_Cells):
+    __slots__ = ("_buckets",)
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        # One cell per bucket and one for +Inf, then the sum and the count.
+        super().__init__(len(buckets) + 3)
+        self._buckets = buckets
+
+    def observe(self, value: float) -> None:
+        cells = self._shards.get(get_ident()) or self._new_shard()
+        cells[bisect_left(self._buckets, value)] += 1
+        cells[-2] += value
+        cells[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+C = TypeVar("C", bound=_Cells)
+
+
+class _ChildMetric(_Metric, Generic[C]):
+    """A metric whose label sets are ``_Cells`` children.
+
+    ``labels`` returns the child for one label set; hot paths bind it once
+    instead of looking it up on every update.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._children: dict[Labels, C] = {}
+
+    def labels(self, *values: str) -> C:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def _child_totals(self) -> dict[Labels, list[float]]:
+        with self._lock:
+            children = dict(self._children)
+        return {labels: child.totals() for labels, child in children.items()}
+
+
+class Counter(_ChildMetric[CounterChild]):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        if not labelnames:
+            self.labels()
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self.labels(*labels).inc(amount)
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for labels, totals in self._child_totals().items():
+            yield self.name, _format_labels(self.labelnames, labels), totals[0]
+        yield from super().samples()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[Labels, float] = {} if labelnames else {(): 0.0}
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self.inc(-amount, labels)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+        yield from super().samples()
+
+
+class Histogram(_ChildMetric[HistogramChild]):
+    """Cumulative histogram with fixed bucket bounds, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        self.labels(*labels).observe(value)
+
+    def time(self, labels: Labels = ()) -> AbstractContextManager[None]:
+        return self.labels(*labels).time()
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self._buckets)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        bounds = [_format_value(bound) for bound in self._buckets] + ["+Inf"]
+        for labels, totals in self._child_totals().items():
+            cumulative = 0.0
+            for bound, count in zip(bounds, totals):
+                cumulative += count
+                label_text = _format_labels((*self.labelnames, "le"), (*labels, bound))
+                yield f"{self.name}_bucket", label_text, cumulative
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", label_text, totals[-2]
+            yield f"{self.name}_count", label_text, totals[-1]
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "dlms_stage_duration_seconds",
+        "Time spent in one pipeline stage: probe, registry_lookup, fingerprint, "
+        "profile_store, association or adapter_http.",
+        ("stage",),
+    )
+)
+WRITE_FLUSH_SECONDS = REGISTRY.register(
+    Histogram("dlms_write_flush_duration_seconds", "Time spent writing one batch to its store.", ("buffer",))
+)
+PROBES = REGISTRY.register(Counter("dlms_probes_total", "TCP connect probes sent, including sharded scans."))
+PROBE_TIMEOUTS = REGISTRY.register(Counter("dlms_probe_timeouts_total", "Probes that timed out."))
+PROBE_RETRIES = REGISTRY.register(Counter("dlms_probe_retries_total", "Probes that were retries."))
+ADAPTER_RETRIES = REGISTRY.register(
+    Counter("dlms_adapter_retries_total", "DLMS adapter requests retried after a connect error, or a 502/503/504 to a GET.")
+)
+PROBES_IN_FLIGHT = REGISTRY.register(Gauge("dlms_probes_in_flight", "Probe sockets currently connecting."))
+ACTIVE_SCANS = REGISTRY.register(Gauge("dlms_active_scans", "Discovery scans currently running."))
+WRITE_BUFFER_DEPTH = REGISTRY.register(
+    Gauge("dlms_write_buffer_depth", "Items queued in a write-behind buffer.", ("buffer",))
+)
+RESPONSE_CACHE_LOOKUPS = REGISTRY.register(
+    Counter("dlms_response_cache_lookups_total", "Cached list bodies served (hit) or rebuilt (miss).", ("result",))
+)
+WRITE_BUFFER_ITEMS = REGISTRY.register(
+    Counter(
+        "dlms_write_buffer_items_total",
+        "Items handled by a write-behind buffer, by result: flushed, dropped or rejected.",
+        ("buffer", "result"),
+    )
+)
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from threading import Lock
+from typing import Any
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, AsyncMongoClient, IndexModel, MongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.services.pagination import InvalidCursorError, Page, PageQuery, page_from_rows
+from app.services.write_buffer import WriteBehindBuffer
+
+_lock = Lock()
+_client: MongoClient | None = None
+_database: Database | None = None
+_checked = False
+_async_client: AsyncMongoClient | None = None
+_writers: dict[str, WriteBehindBuffer[dict[str, Any]]] = {}
+
+
+def get_database() -> Database | None:
+    """Return the process-wide database handle, or ``None`` if Mongo is unreachable.
+
+    The client is created and pinged once; every service shares its
+    connection pool. An unreachable server is also remembered, so callers fall
+    back to memory without each paying the server-selection timeout.
+    """
+    global _client, _database, _checked
+    if _checked:
+        return _database
+    with _lock:
+        if _checked:
+            return _database
+        try:
+            client = MongoClient(
+                settings.mongo_url,
+                serverSelectionTimeoutMS=1000,
+                maxPoolSize=settings.mongo_max_pool_size,
+            )
+            client.admin.command("ping")
+            _client = client
+            _database = client[settings.mongo_db]
+        except PyMongoError:
+            _client = None
+            _database = None
+        _checked = True
+    return _database
+
+
+def get_collection(name: str) -> Collection | None:
+    database = get_database()
+    if database is None:
+        return None
+    return database[name]
+
+
+def get_async_collection(name: str) -> AsyncCollection | None:
+    """Async handle on collection ``name``, or ``None`` if Mongo is unreachable.
+
+    Reachability is the one checked by ``get_database``; the async client is
+    created on first use and shares nothing with the sync one but the server.
+    """
+    global _async_client
+    if get_database() is None:
+        return None
+    with _lock:
+        if _async_client is None:
+            _async_client = AsyncMongoClient(
+                settings.mongo_url,
+                serverSelectionTimeoutMS=1000,
+                maxPoolSize=settings.mongo_max_pool_size,
+            )
+    return _async_client[settings.mongo_db][name]
+
+
+def ensure_indexes(collection: Collection, indexes: list[IndexModel]) -> None:
+    try:
+        collection.create_indexes(indexes)
+    except PyMongoError:
+        return
+
+
+def find_page(
+    collection: Collection,
+    query: PageQuery,
+    filters: dict[str, Any],
+    time_field: str,
+    key_field: str = "_id",
+) -> Page[dict[str, Any]]:
+    """Keyset-paginate ``collection`` newest first on ``(time_field, key_field)``.
+
+    ``query.created_from``/``created_to`` bound ``time_field``. Returned
+    documents have ``_id`` removed.
+    """
+    spec = _page_spec(query, filters, time_field, key_field)
+    cursor = (
+        collection.find(spec)
+        .sort([(time_field, DESCENDING), (key_field, DESCENDING)])
+        .limit(query.limit + 1)
+    )
+    return _page(list(cursor), query, time_field, key_field)
+
+
+async def find_page_async(
+    collection: AsyncCollection,
+    query: PageQuery,
+    filters: dict[str, Any],
+    time_field: str,
+    key_field: str = "_id",
+) -> Page[dict[str, Any]]:
+    """``find_page`` on the async client."""
+    spec = _page_spec(query, filters, time_field, key_field)
+    cursor = (
+        collection.find(spec)
+        .sort([(time_field, DESCENDING), (key_field, DESCENDING)])
+        .limit(query.limit + 1)
+    )
+    return _page(await cursor.to_list(), query, time_field, key_field)
+
+
+def _page_spec(query: PageQuery, filters: dict[str, Any], time_field: str, key_field: str) -> dict[str, Any]:
+    conditions = [filters] if filters else []
+    time_range: dict[str, Any] = {}
+    if query.created_from is not None:
+        time_range["$gte"] = query.created_from
+    if query.created_to is not None:
+        time_range["$lt"] = query.created_to
+    if time_range:
+        conditions.append({time_field: time_range})
+
+    after = query.after()
+    if after is not None:
+        created_at, key = after
+        try:
+            key_value: Any = ObjectId(key) if key_field == "_id" else key
+        except InvalidId as exc:
+            raise InvalidCursorError("invalid_cursor") from exc
+        conditions.append(
+            {
+                "$or": [
+                    {time_field: {"$lt": created_at}},
+                    {time_field: created_at, key_field: {"$lt": key_value}},
+                ]
+            }
+        )
+
+    return {"$and": conditions} if conditions else {}
+
+
+def _page(docs: list[dict[str, Any]], query: PageQuery, time_field: str, key_field: str) -> Page[dict[str, Any]]:
+    page = page_from_rows([(doc[time_field], str(doc[key_field]), doc) for doc in docs], query.limit)
+    for doc in page.items:
+        doc.pop("_id", None)
+    return page
+
+
+def buffered_writer(collection: Collection) -> WriteBehindBuffer[dict[str, Any]]:
+    """Shared write-behind buffer that bulk-inserts documents into ``collection``."""
+    with _lock:
+        writer = _writers.get(collection.name)
+        if writer is None:
+            writer = WriteBehindBuffer(
+                flush=lambda docs: collection.insert_many(docs, ordered=False),
+                batch_size=settings.mongo_write_batch_size,
+                flush_interval=settings.mongo_flush_interval_seconds,
+                max_queue=settings.mongo_write_queue_size,
+                put_timeout=settings.mongo_write_put_timeout_seconds,
+                name=f"mongo:{collection.name}",
+            )
+            _writers[collection.name] = writer
+    return writer
+
+
+def writer_stats() -> dict[str, dict[str, float]]:
+    return {name: writer.stats() for name, writer in _writers.items()}
+
+
+def shutdown() -> None:
+    """Flush pending writes and close the shared client."""
+    for writer in list(_writers.values()):
+        writer.close()
+    if _client is not None:
+        _client.close()
+
+
+async def aclose() -> None:
+    """Close the async client; call from the event loop that used it."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
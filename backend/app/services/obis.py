@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+import re
 
-from app.models.core import MeterInstance, ObisNormalizationResult
+from app.models.core import MeterInstance, ObisNormalizationResult, ObisObject
 
 DEFAULT_NORMALIZATION = {
     "1-0:1.8.0": "energy_active_import_kwh",
@@ -11,15 +15,188 @@ DEFAULT_NORMALIZATION = {
     "1-0:52.7.0": "voltage_l2_v",
 }
 
+# Wildcard rules, tried after exact codes. ``*`` matches any value of a group;
+# ``{a}``..``{f}`` in the name are replaced with the matched code's groups.
+DEFAULT_RULES = {
+    "1-*:1.8.*": "energy_active_import_kwh_t{e}",
+    "1-*:2.8.*": "energy_active_export_kwh_t{e}",
+    "1-*:32.7.0": "voltage_l1_v",
+    "1-*:52.7.0": "voltage_l2_v",
+    "1-*:72.7.0": "voltage_l3_v",
+    "1-*:31.7.0": "current_l1_a",
+    "1-*:51.7.0": "current_l2_a",
+    "1-*:71.7.0": "current_l3_a",
+}
+
+_GROUPS = "abcdef"
+_OBIS_PATTERN = re.compile(
+    r"^\s*(\d+|\*)-(\d+|\*):(\d+|\*)\.(\d+|\*)\.(\d+|\*)(?:[.*](\d+|\*))?\s*$"
+)
+
+
+class InvalidObisCodeError(ValueError):
+    """Raised when a string is not an ``A-B:C.D.E[.F]`` OBIS code."""
+
+
+def _groups(code: str) -> list[str]:
+    match = _OBIS_PATTERN.match(code)
+    if match is None:
+        raise InvalidObisCodeError(code)
+    groups = list(match.groups())
+    if groups[5] is None:
+        groups[5] = "255"
+    return groups
+
+
+@lru_cache(maxsize=65536)
+def parse_obis(code: str) -> int:
+    """Pack the six value groups A..F of ``code`` into one 48-bit integer.
+
+    Group A is the most significant byte; an omitted F defaults to 255 as in
+    IEC 62056-61. Results are cached, so every distinct code string is
+    parsed once and equal codes share one int.
+    """
+    packed = 0
+    for group in _groups(code):
+        value = int(group) if group != "*" else -1
+        if not 0 <= value <= 255:
+            raise InvalidObisCodeError(code)
+        packed = (packed << 8) | value
+    return packed
+
+
+def format_obis(packed: int) -> str:
+    a, b, c, d, e, f = unpack_obis(packed)
+    code = f"{a}-{b}:{c}.{d}.{e}"
+    return code if f == 255 else f"{code}*{f}"
+
+
+def unpack_obis(packed: int) -> tuple[int, int, int, int, int, int]:
+    return tuple((packed >> shift) & 0xFF for shift in (40, 32, 24, 16, 8, 0))  # type: ignore[return-value]
+
+
+def obis_set(codes: Iterable[str]) -> frozenset[int]:
+    """Packed form of a set of OBIS codes, for cheap storage and comparison."""
+    return frozenset(parse_obis(code) for code in codes)
+
+
+def _fallback_name(code: str) -> str:
+    return code.replace(".", "_").replace(":", "_")
+
+
+@dataclass(frozen=True)
+class ObisRule:
+    pattern: str
+    name: str
+    mask: int
+    value: int
+
+    @classmethod
+    def compile(cls, pattern: str, name: str) -> ObisRule:
+        mask = value = 0
+        for group in _groups(pattern):
+            mask <<= 8
+            value <<= 8
+            if group != "*":
+                if not 0 <= int(group) <= 255:
+                    raise InvalidObisCodeError(pattern)
+                mask |= 0xFF
+                value |= int(group)
+        return cls(pattern=pattern, name=name, mask=mask, value=value)
+
+    def render(self, packed: int) -> str:
+        if "{" not in self.name:
+            return self.name
+        return self.name.format(**dict(zip(_GROUPS, unpack_obis(packed))))
+
+
+class ObisRuleTable:
+    """Compiled OBIS normalization rules with per-group wildcards.
+
+    Rules are grouped by wildcard mask, most specific mask first, and each
+    group is a dict keyed by ``packed & mask``. A lookup is therefore one
+    dict probe per distinct mask (a handful) rather than a scan of all rules.
+    Resolved names are cached per packed code.
+    """
+
+    def __init__(self, rules: dict[str, str]) -> None:
+        compiled = [ObisRule.compile(pattern, name) for pattern, name in rules.items()]
+        by_mask: dict[int, dict[int, ObisRule]] = {}
+        for rule in compiled:
+            by_mask.setdefault(rule.mask, {}).setdefault(rule.value, rule)
+        self.rules = compiled
+        self._by_mask = sorted(by_mask.items(), key=lambda item: bin(item[0]).count("1"), reverse=True)
+        self._names: dict[int, str | None] = {}
+
+    def match(self, packed: int) -> ObisRule | None:
+        for mask, rules in self._by_mask:
+            rule = rules.get(packed & mask)
+            if rule is not None:
+                return rule
+        return None
+
+    def lookup(self, packed: int) -> str | None:
+        try:
+            return self._names[packed]
+        except KeyError:
+            pass
+        rule = self.match(packed)
+        name = rule.render(packed) if rule is not None else None
+        self._names[packed] = name
+        return name
+
+    def name_for(self, code: str) -> str:
+        try:
+            packed = parse_obis(code)
+        except InvalidObisCodeError:
+            return _fallback_name(code)
+        name = self.lookup(packed)
+        return name if name is not None else _fallback_name(code)
+
+
+DEFAULT_RULE_TABLE = ObisRuleTable({**DEFAULT_NORMALIZATION, **DEFAULT_RULES})
+
 
 class ObisNormalizer:
+    def __init__(self, rules: ObisRuleTable | None = None) -> None:
+        self._rules = rules or DEFAULT_RULE_TABLE
+
     def normalize(self, meter: MeterInstance) -> ObisNormalizationResult:
-        normalized = {
-            obj.code: DEFAULT_NORMALIZATION.get(obj.code, obj.code.replace(".", "_").replace(":", "_"))
-            for obj in meter.obis_objects
-        }
         return ObisNormalizationResult(
             meter_id=meter.meter_id,
-            normalized=normalized,
+            normalized=self._normalized(meter.obis_objects),
             created_at=datetime.utcnow(),
         )
+
+    def normalize_many(self, meters: Sequence[MeterInstance]) -> list[ObisNormalizationResult]:
+        """Normalize a batch in one pass.
+
+        Meters provisioned from the same template share one ``obis_objects``
+        list, so each distinct list is normalized once per batch.
+        """
+        created_at = datetime.utcnow()
+        by_objects: dict[int, dict[str, str]] = {}
+        results = []
+        for meter in meters:
+            normalized = by_objects.get(id(meter.obis_objects))
+            if normalized is None:
+                normalized = by_objects[id(meter.obis_objects)] = self._normalized(meter.obis_objects)
+            results.append(
+                ObisNormalizationResult(
+                    meter_id=meter.meter_id,
+                    normalized=dict(normalized),
+                    created_at=created_at,
+                )
+            )
+        return results
+
+    def normalize_codes(self, meter_id: str, codes: Iterable[str]) -> ObisNormalizationResult:
+        """Normalize codes listed by the meter itself, e.g. read through the adapter."""
+        return ObisNormalizationResult(
+            meter_id=meter_id,
+            normalized={code: self._rules.name_for(code) for code in codes},
+            created_at=datetime.utcnow(),
+        )
+
+    def _normalized(self, objects: list[ObisObject]) -> dict[str, str]:
+        return {obj.code: self._rules.name_for(obj.code) for obj in objects}
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import base64
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass(frozen=True)
+class PageQuery:
+    limit: int = 100
+    cursor: str | None = None
+    meter_id: str | None = None
+    vendor: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+    def after(self) -> tuple[datetime, str] | None:
+        return decode_cursor(self.cursor) if self.cursor else None
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def encode_cursor(created_at: datetime, key: str) -> str:
+    raw = json.dumps([created_at.isoformat(), key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, key = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(key)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("invalid_cursor") from exc
+
+
+def paginate_memory(
+    entries: Iterable[tuple[str, T]],
+    query: PageQuery,
+    created_at: Callable[[T], datetime],
+    matches: Callable[[T], bool] = lambda _: True,
+) -> Page[T]:
+    """Keyset-paginate in-memory ``(key, item)`` pairs, newest first.
+
+    Used by the in-memory fallbacks so they page the same way as the
+    database-backed paths.
+    """
+    after = query.after()
+    selected = [
+        (created_at(item), key, item)
+        for key, item in entries
+        if matches(item)
+        and (query.created_from is None or created_at(item) >= query.created_from)
+        and (query.created_to is None or created_at(item) < query.created_to)
+        and (after is None or (created_at(item), key) < after)
+    ]
+    selected.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+    return page_from_rows(selected[: query.limit + 1], query.limit)
+
+
+def page_from_rows(rows: list[tuple[datetime, str, T]], limit: int) -> Page[T]:
+    """Build a page from ``limit + 1`` sorted ``(created_at, key, item)`` rows."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][0], rows[-1][1]) if has_more and rows else None
+    return Page(items=[row[2] for row in rows], next_cursor=next_cursor)
@@ -1,101 +1,521 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from collections.abc import Iterable
 from datetime import datetime
-from uuid import uuid4
+import hashlib
+import json
+from threading import Lock
+from uuid import NAMESPACE_URL, uuid5
 
 from sqlalchemy import (
     JSON,
     Column,
     DateTime,
+    ForeignKey,
+    Index,
     MetaData,
     String,
     Table,
+    and_,
     create_engine,
+    delete,
+    exists,
+    inspect,
+    or_,
     select,
 )
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from app.config import settings
 from app.models.core import MeterInstance, MeterProfile
+from app.services.metrics import STAGE_SECONDS
+from app.services.pagination import Page, PageQuery, page_from_rows, paginate_memory
+from app.services.tracing import traced
+from app.services.write_buffer import WriteBehindBuffer
+
+PROFILE_NAMESPACE = uuid5(NAMESPACE_URL, "urn:dlms:meter-profile")
+# Table of the one-row-per-profile layout, and the name it is kept under once copied.
+LEGACY_TABLE = "meter_profiles"
+LEGACY_BACKUP_TABLE = "meter_profiles_legacy"
+_STORE_SECONDS = STAGE_SECONDS.labels("profile_store")
+
+
+def obis_map_hash(obis_map: dict[str, str]) -> str:
+    """Content hash of an OBIS map, independent of key order."""
+    canonical = json.dumps(obis_map, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
 
 
 class ProfileGenerator:
     def build_profile(self, meter: MeterInstance) -> MeterProfile:
+        obis_map = {obj.code: obj.description for obj in meter.obis_objects}
+        map_hash = obis_map_hash(obis_map)
         return MeterProfile(
-            profile_id=str(uuid4()),
+            # Deterministic, so rebuilding an unchanged profile yields the same id.
+            profile_id=str(uuid5(PROFILE_NAMESPACE, f"{meter.meter_id}:{meter.vendor}:{meter.model}:{map_hash}")),
             meter_id=meter.meter_id,
             vendor=meter.vendor,
             model=meter.model,
-            obis_map={obj.code: obj.description for obj in meter.obis_objects},
+            obis_map=obis_map,
             created_at=datetime.utcnow(),
+            map_hash=map_hash,
         )
 
 
 class ProfileRepository:
-    def __init__(self) -> None:
+    """Meter profiles stored as shared OBIS maps plus light per-meter references.
+
+    ``obis_maps`` holds each distinct map once, keyed by its content hash.
+    ``meter_profile_refs`` holds the current profile of each meter pointing
+    at its map; storing a new profile for a meter replaces the old one, and
+    storing a profile whose id already exists is a no-op. Maps are immutable,
+    so ``list`` joins them back from an LRU of recently used maps and only
+    fetches the ones it has not seen.
+
+    A profile whose write fails is forgotten again, so storing it later
+    retries the write. Profiles from the old one-table layout
+    (``meter_profiles``) are copied in once at startup.
+
+    ``store`` writes one profile per transaction. ``ingest`` queues profiles
+    on a write-behind buffer that upserts them in multi-row batches, and
+    refuses new work while the buffer is full.
+
+    ``store_async`` and ``list_async`` use an async engine on the same
+    database. Where the driver has no async variant they run the sync
+    method in a worker thread instead.
+    """
+
+    def __init__(self, engine: Engine | None = None) -> None:
         self._profiles: dict[str, MeterProfile] = {}
-        self._engine = None
-        self._table = None
+        self._meter_profiles: dict[str, str] = {}
+        self._maps: OrderedDict[str, dict[str, str]] = OrderedDict()
+        self._persisted_maps: set[str] = set()
+        self._lock = Lock()
+        self._engine = engine
+        self._async_engine: AsyncEngine | None = None
+        self._maps_table = None
+        self._refs_table = None
+        self._insert_map = None
+        self._upsert_ref = None
+        self._writer: WriteBehindBuffer[MeterProfile] | None = None
         self._init_db()
 
     def _init_db(self) -> None:
         try:
-            self._engine = create_engine(settings.postgres_dsn, future=True)
+            if self._engine is None:
+                self._engine = create_engine(settings.postgres_dsn, future=True)
             metadata = MetaData()
-            self._table = Table(
-                "meter_profiles",
+            self._maps_table = Table(
+                "obis_maps",
+                metadata,
+                Column("map_hash", String(64), primary_key=True),
+                Column("obis_map", JSON, nullable=False),
+                Column("created_at", DateTime, nullable=False),
+            )
+            self._refs_table = Table(
+                "meter_profile_refs",
                 metadata,
                 Column("profile_id", String, primary_key=True),
                 Column("meter_id", String, nullable=False),
                 Column("vendor", String, nullable=False),
                 Column("model", String, nullable=False),
-                Column("obis_map", JSON, nullable=False),
+                Column("map_hash", String(64), ForeignKey("obis_maps.map_hash"), nullable=False),
                 Column("created_at", DateTime, nullable=False),
+                Index("ix_meter_profile_refs_created_at", "created_at", "profile_id"),
+                Index("ux_meter_profile_refs_meter_id", "meter_id", unique=True),
+                Index("ix_meter_profile_refs_vendor", "vendor", "created_at"),
             )
             metadata.create_all(self._engine)
+            self._create_ref_indexes()
+            # Built once so SQLAlchemy's compiled-statement cache is reused.
+            self._insert_map = self._insert_ignore(self._maps_table)
+            self._upsert_ref = self._upsert_on_meter(self._refs_table)
+            self._backfill_legacy()
         except SQLAlchemyError:
             self._engine = None
-            self._table = None
+            self._maps_table = None
+            self._refs_table = None
+            return
+        try:
+            self._async_engine = create_async_engine(self._engine.url, pool_size=settings.postgres_async_pool_size)
+        except (SQLAlchemyError, ImportError, TypeError):
+            # e.g. SQLite without aiosqlite, or a pool class without sizing.
+            self._async_engine = None
 
-    def store(self, profile: MeterProfile) -> None:
-        self._profiles[profile.profile_id] = profile
+    def _create_ref_indexes(self) -> None:
+        """Create indexes ``create_all`` skipped because the table already existed.
 
-        if self._engine is None or self._table is None:
-            return
+        Before the unique index on ``meter_id`` a meter could have several
+        refs; all but its newest are deleted first, in the same transaction,
+        or the index could not be built.
+        """
+        refs = self._refs_table
+        with self._engine.begin() as conn:
+            existing = {index["name"] for index in inspect(conn).get_indexes(refs.name)}
+            if "ux_meter_profile_refs_meter_id" not in existing:
+                newer = refs.alias("newer")
+                superseded = exists().where(
+                    newer.c.meter_id == refs.c.meter_id,
+                    or_(
+                        newer.c.created_at > refs.c.created_at,
+                        and_(newer.c.created_at == refs.c.created_at, newer.c.profile_id > refs.c.profile_id),
+                    ),
+                )
+                conn.execute(delete(refs).where(superseded))
+            for index in refs.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+
+    def _backfill_legacy(self) -> None:
+        """Copy the newest profile of each meter from ``meter_profiles``, once.
+
+        Meters that already have a ref keep it. The legacy table is then
+        renamed to ``meter_profiles_legacy`` in the same transaction, so the
+        copy runs on the first start after the upgrade only.
+        """
+        with self._engine.begin() as conn:
+            if not inspect(conn).has_table(LEGACY_TABLE):
+                return
+            legacy = Table(LEGACY_TABLE, MetaData(), autoload_with=conn)
+            insert_ref = self._insert_ignore(self._refs_table)
+            rows = conn.execute(
+                select(legacy).order_by(legacy.c.meter_id, legacy.c.created_at.desc(), legacy.c.profile_id.desc())
+            ).mappings()
+            batch_size = max(settings.profile_ingest_batch_size, 1)
+            maps: dict[str, dict[str, object]] = {}
+            refs: list[dict[str, object]] = []
+            last_meter = None
+            for row in rows:
+                if row["meter_id"] == last_meter:
+                    continue
+                last_meter = row["meter_id"]
+                obis_map = row["obis_map"]
+                if isinstance(obis_map, str):  # reflected as text by some drivers
+                    obis_map = json.loads(obis_map)
+                map_hash = obis_map_hash(obis_map)
+                if map_hash not in self._persisted_maps:
+                    maps[map_hash] = {"map_hash": map_hash, "obis_map": obis_map, "created_at": row["created_at"]}
+                refs.append(
+                    {
+                        "profile_id": row["profile_id"],
+                        "meter_id": row["meter_id"],
+                        "vendor": row["vendor"],
+                        "model": row["model"],
+                        "map_hash": map_hash,
+                        "created_at": row["created_at"],
+                    }
+                )
+                if len(refs) >= batch_size:
+                    self._copy_batch(conn, insert_ref, maps, refs)
+            self._copy_batch(conn, insert_ref, maps, refs)
+            conn.exec_driver_sql(f"ALTER TABLE {LEGACY_TABLE} RENAME TO {LEGACY_BACKUP_TABLE}")
+
+    def _copy_batch(self, conn, insert_ref, maps: dict[str, dict[str, object]], refs: list[dict[str, object]]) -> None:
+        # Maps go first: refs point at them.
+        if maps:
+            conn.execute(self._insert_map, list(maps.values()))
+            self._persisted_maps.update(maps)
+            maps.clear()
+        if refs:
+            conn.execute(insert_ref, refs)
+            refs.clear()
+
+    @traced("ProfileRepository.store")
+    def store(self, profile: MeterProfile) -> MeterProfile:
+        """Store ``profile`` and return the stored version.
+
+        If a profile with the same id exists (same meter, same content), the
+        existing one is returned unchanged.
+        """
+        with _STORE_SECONDS.time():
+            stored, new_map = self._stage(profile)
+            if new_map is None or self._engine is None or self._refs_table is None:
+                return stored
+            try:
+                with self._engine.begin() as conn:
+                    if new_map:
+                        conn.execute(self._insert_map, self._map_row(stored))
+                    conn.execute(self._upsert_ref, self._ref_row(stored))
+            except SQLAlchemyError:
+                self._forget([stored])
+                return stored
+            self._mark_persisted(stored, new_map)
+            return stored
+
+    @traced("ProfileRepository.store_async")
+    async def store_async(self, profile: MeterProfile) -> MeterProfile:
+        if self._async_engine is None:
+            return await asyncio.to_thread(self.store, profile)
+        with _STORE_SECONDS.time():
+            stored, new_map = self._stage(profile)
+            if new_map is None:
+                return stored
+            try:
+                async with self._async_engine.begin() as conn:
+                    if new_map:
+                        await conn.execute(self._insert_map, self._map_row(stored))
+                    await conn.execute(self._upsert_ref, self._ref_row(stored))
+            except SQLAlchemyError:
+                self._forget([stored])
+                return stored
+            self._mark_persisted(stored, new_map)
+            return stored
+
+    def _stage(self, profile: MeterProfile) -> tuple[MeterProfile, bool | None]:
+        """Remember ``profile`` in memory.
+
+        Returns the stored profile and whether its map still has to be
+        written, or ``None`` if the profile already existed.
+        """
+        with self._lock:
+            existing = self._profiles.get(profile.profile_id)
+            if existing is not None:
+                return existing, None
+            stored = self._remember(profile)
+            return stored, stored.map_hash not in self._persisted_maps
+
+    def _forget(self, profiles: Iterable[MeterProfile]) -> None:
+        """Drop profiles whose write failed, so storing them again retries the write."""
+        with self._lock:
+            for profile in profiles:
+                if self._meter_profiles.get(profile.meter_id) == profile.profile_id:
+                    del self._meter_profiles[profile.meter_id]
+                self._profiles.pop(profile.profile_id, None)
+
+    def _mark_persisted(self, stored: MeterProfile, new_map: bool) -> None:
+        if new_map:
+            with self._lock:
+                self._persisted_maps.add(stored.map_hash)
+
+    @traced("ProfileRepository.ingest")
+    def ingest(self, profiles: list[MeterProfile]) -> bool:
+        """Queue ``profiles`` for batched writing.
+
+        Returns False without accepting any of them when the write buffer has
+        no room for the whole group, i.e. the database is not keeping up.
+        """
+        if self._engine is not None and self._refs_table is not None:
+            if not self._ingest_writer().offer(profiles):
+                return False
+        with self._lock:
+            for profile in profiles:
+                if profile.profile_id not in self._profiles:
+                    self._remember(profile)
+        return True
+
+    def ingest_stats(self) -> dict[str, float]:
+        return self._ingest_writer().stats()
 
+    def close(self) -> None:
+        """Flush profiles still queued by ``ingest``."""
+        if self._writer is not None:
+            self._writer.close()
+
+    async def aclose(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+    def _ingest_writer(self) -> WriteBehindBuffer[MeterProfile]:
+        with self._lock:
+            if self._writer is None:
+                self._writer = WriteBehindBuffer(
+                    flush=self._write_batch,
+                    batch_size=settings.profile_ingest_batch_size,
+                    flush_interval=settings.profile_ingest_flush_interval_seconds,
+                    max_queue=settings.profile_ingest_queue_size,
+                    put_timeout=0.0,
+                    name="postgres:profile_ingest",
+                )
+            return self._writer
+
+    def _write_batch(self, profiles: list[MeterProfile]) -> None:
+        """Upsert a batch in one transaction.
+
+        Both statements run as executemany, which SQLAlchemy sends as
+        multi-row ``INSERT ... VALUES`` pages. Only the last profile of each
+        meter in the batch is written, since one statement cannot upsert the
+        same row twice.
+        """
+        latest = {profile.meter_id: profile for profile in profiles}
+        rows = []
+        maps: dict[str, dict[str, object]] = {}
+        for profile in latest.values():
+            map_hash = profile.map_hash or obis_map_hash(profile.obis_map)
+            if map_hash not in self._persisted_maps and map_hash not in maps:
+                maps[map_hash] = {"map_hash": map_hash, "obis_map": profile.obis_map, "created_at": profile.created_at}
+            rows.append({**self._ref_row(profile), "map_hash": map_hash})
         try:
             with self._engine.begin() as conn:
-                conn.execute(
-                    self._table.insert().values(
-                        profile_id=profile.profile_id,
-                        meter_id=profile.meter_id,
-                        vendor=profile.vendor,
-                        model=profile.model,
-                        obis_map=profile.obis_map,
-                        created_at=profile.created_at,
-                    )
-                )
+                if maps:
+                    conn.execute(self._insert_map, list(maps.values()))
+                conn.execute(self._upsert_ref, rows)
         except SQLAlchemyError:
-            return
-
-    def list(self) -> list[MeterProfile]:
-        if self._engine is None or self._table is None:
-            return list(self._profiles.values())
+            self._forget(latest.values())
+            raise
+        with self._lock:
+            self._persisted_maps.update(maps)
 
+    @traced("ProfileRepository.list")
+    def list(self, query: PageQuery | None = None) -> Page[MeterProfile]:
+        query = query or PageQuery()
+        if self._engine is None or self._refs_table is None:
+            return self._list_memory(query)
         try:
             with self._engine.begin() as conn:
-                rows = conn.execute(select(self._table)).mappings().all()
-
-            return [
-                MeterProfile(
-                    profile_id=row["profile_id"],
-                    meter_id=row["meter_id"],
-                    vendor=row["vendor"],
-                    model=row["model"],
-                    obis_map=row["obis_map"],
-                    created_at=row["created_at"],
+                rows = conn.execute(self._list_statement(query)).mappings().all()
+                maps, missing = self._cached_maps({row["map_hash"] for row in rows})
+                if missing:
+                    maps.update(self._remember_loaded(conn.execute(self._maps_statement(missing))))
+        except SQLAlchemyError:
+            return self._list_memory(query)
+        return self._to_page(rows, maps, query.limit)
+
+    @traced("ProfileRepository.list_async")
+    async def list_async(self, query: PageQuery | None = None) -> Page[MeterProfile]:
+        query = query or PageQuery()
+        if self._async_engine is None:
+            return await asyncio.to_thread(self.list, query)
+        try:
+            async with self._async_engine.begin() as conn:
+                rows = (await conn.execute(self._list_statement(query))).mappings().all()
+                maps, missing = self._cached_maps({row["map_hash"] for row in rows})
+                if missing:
+                    maps.update(self._remember_loaded(await conn.execute(self._maps_statement(missing))))
+        except SQLAlchemyError:
+            return await asyncio.to_thread(self._list_memory, query)
+        return self._to_page(rows, maps, query.limit)
+
+    def _list_statement(self, query: PageQuery):
+        table = self._refs_table
+        statement = select(table)
+        if query.meter_id:
+            statement = statement.where(table.c.meter_id == query.meter_id)
+        if query.vendor:
+            statement = statement.where(table.c.vendor == query.vendor)
+        if query.created_from is not None:
+            statement = statement.where(table.c.created_at >= query.created_from)
+        if query.created_to is not None:
+            statement = statement.where(table.c.created_at < query.created_to)
+        after = query.after()
+        if after is not None:
+            created_at, profile_id = after
+            statement = statement.where(
+                or_(
+                    table.c.created_at < created_at,
+                    and_(table.c.created_at == created_at, table.c.profile_id < profile_id),
+                )
+            )
+        return statement.order_by(table.c.created_at.desc(), table.c.profile_id.desc()).limit(query.limit + 1)
+
+    @staticmethod
+    def _to_page(rows, maps: dict[str, dict[str, str]], limit: int) -> Page[MeterProfile]:
+        return page_from_rows(
+            [
+                (
+                    row["created_at"],
+                    row["profile_id"],
+                    MeterProfile.model_construct(
+                        profile_id=row["profile_id"],
+                        meter_id=row["meter_id"],
+                        vendor=row["vendor"],
+                        model=row["model"],
+                        obis_map=maps.get(row["map_hash"], {}),
+                        created_at=row["created_at"],
+                        map_hash=row["map_hash"],
+                    ),
                 )
                 for row in rows
-            ]
-        except SQLAlchemyError:
-            return list(self._profiles.values())
+            ],
+            limit,
+        )
+
+    def _cached_maps(self, hashes: set[str]) -> tuple[dict[str, dict[str, str]], set[str]]:
+        with self._lock:
+            maps = {map_hash: self._maps[map_hash] for map_hash in hashes if map_hash in self._maps}
+        return maps, hashes - maps.keys()
+
+    def _maps_statement(self, hashes: set[str]):
+        table = self._maps_table
+        return select(table.c.map_hash, table.c.obis_map).where(table.c.map_hash.in_(hashes))
+
+    def _remember_loaded(self, rows) -> dict[str, dict[str, str]]:
+        maps = {}
+        with self._lock:
+            for row in rows:
+                maps[row.map_hash] = self._remember_map(row.map_hash, row.obis_map)
+                self._persisted_maps.add(row.map_hash)
+        return maps
+
+    def _remember(self, profile: MeterProfile) -> MeterProfile:
+        """Make ``profile`` the meter's current profile in memory. Caller holds the lock."""
+        map_hash = profile.map_hash or obis_map_hash(profile.obis_map)
+        shared_map = self._remember_map(map_hash, profile.obis_map)
+        stored = profile.model_copy(update={"obis_map": shared_map, "map_hash": map_hash})
+        previous = self._meter_profiles.get(profile.meter_id)
+        if previous is not None:
+            self._profiles.pop(previous, None)
+        self._meter_profiles[profile.meter_id] = profile.profile_id
+        self._profiles[profile.profile_id] = stored
+        return stored
+
+    @staticmethod
+    def _map_row(profile: MeterProfile) -> dict[str, object]:
+        return {"map_hash": profile.map_hash, "obis_map": profile.obis_map, "created_at": profile.created_at}
+
+    @staticmethod
+    def _ref_row(profile: MeterProfile) -> dict[str, object]:
+        return {
+            "profile_id": profile.profile_id,
+            "meter_id": profile.meter_id,
+            "vendor": profile.vendor,
+            "model": profile.model,
+            "map_hash": profile.map_hash,
+            "created_at": profile.created_at,
+        }
+
+    def _remember_map(self, map_hash: str, obis_map: dict[str, str]) -> dict[str, str]:
+        """Cache ``obis_map`` under its hash and return the shared copy. Caller holds the lock."""
+        shared = self._maps.get(map_hash)
+        if shared is None:
+            shared = self._maps[map_hash] = dict(obis_map)
+            while len(self._maps) > settings.profile_map_cache_size:
+                self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(map_hash)
+        return shared
+
+    def _insert_ignore(self, table: Table):
+        dialect = self._engine.dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(table).on_conflict_do_nothing()
+        if dialect == "sqlite":
+            return sqlite.insert(table).on_conflict_do_nothing()
+        return table.insert()
+
+    def _upsert_on_meter(self, table: Table):
+        """Insert a ref, or replace the meter's existing ref if it points at another profile."""
+        dialect = self._engine.dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            return table.insert()
+        insert = (postgresql if dialect == "postgresql" else sqlite).insert(table)
+        return insert.on_conflict_do_update(
+            index_elements=[table.c.meter_id],
+            set_={
+                name: insert.excluded[name]
+                for name in ("profile_id", "vendor", "model", "map_hash", "created_at")
+            },
+            where=table.c.profile_id != insert.excluded.profile_id,
+        )
+
+    def _list_memory(self, query: PageQuery) -> Page[MeterProfile]:
+        def matches(profile: MeterProfile) -> bool:
+            if query.meter_id and profile.meter_id != query.meter_id:
+                return False
+            return not query.vendor or profile.vendor == query.vendor
+
+        return paginate_memory(self._profiles.items(), query, lambda profile: profile.created_at, matches)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from ipaddress import IPv4Address, IPv6Address, ip_address, ip_network
+from threading import Lock
+import time
+
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.services.mongo import ensure_indexes, get_collection
+
+Key = tuple[str, int]
+
+
+@dataclass(slots=True)
+class ReachabilityEntry:
+    alive: bool
+    last_probed: float
+    last_seen: float | None = None
+    misses: int = 0
+
+    def backoff_exponent(self) -> int:
+        return min(max(self.misses - 1, 0), settings.reachability_max_backoff_exponent)
+
+
+class ReachabilityCache:
+    """Last known probe outcome per (ip, port), used by incremental scans.
+
+    A target last seen alive is never trusted: it is probed again on every
+    scan, so a meter that went offline drops out of the results right away.
+    The savings come from dead targets, which are skipped within ``ttl`` of
+    their last probe, and for exponentially longer when they keep failing
+    (``ttl * 2**(misses-1)``, capped by ``REACHABILITY_MAX_BACKOFF_EXPONENT``),
+    so long-dead hosts are probed less and less often.
+
+    At most ``max_entries`` targets are held. Targets that never answered
+    are evicted first, least recently probed first out, so a sweep over a
+    mostly empty range does not push out known meters. Only targets that
+    answered are saved to the ``reachability`` collection, plus known meters
+    that stopped answering while their backoff grows; a target that is
+    absent or whose document has expired is simply probed again. Documents
+    are loaded per scanned range by ``load``. With ``use_mongo=False`` the
+    cache is memory-only.
+    """
+
+    def __init__(self, max_entries: int | None = None, use_mongo: bool = True) -> None:
+        # Targets that have answered at least once, and those that never did.
+        self._known: OrderedDict[Key, ReachabilityEntry] = OrderedDict()
+        self._unseen: OrderedDict[Key, ReachabilityEntry] = OrderedDict()
+        self._alive: set[Key] = set()
+        # Entries to save on the next flush; kept even if evicted before then.
+        self._dirty: dict[Key, ReachabilityEntry] = {}
+        self._max_entries = max(max_entries or settings.reachability_cache_size, 1)
+        self._lock = Lock()
+        self._collection = None
+        if use_mongo:
+            self._init_db()
+
+    def _init_db(self) -> None:
+        self._collection = get_collection("reachability")
+        if self._collection is None:
+            return
+        ensure_indexes(
+            self._collection,
+            [
+                IndexModel([("ip_address", ASCENDING), ("port", ASCENDING)], unique=True),
+                IndexModel([("port", ASCENDING), ("ip_key", ASCENDING)]),
+                IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+            ],
+        )
+
+    def __len__(self) -> int:
+        return len(self._known) + len(self._unseen)
+
+    def load(self, ip_range: str, ports: list[int]) -> None:
+        """Read the saved entries for ``ip_range`` on ``ports``; blocking, run it off the event loop."""
+        if self._collection is None or not ports:
+            return
+        network = ip_network(ip_range, strict=False)
+        spec = {
+            "port": {"$in": list(ports)},
+            "ip_key": {"$gte": _ip_key(network.network_address), "$lte": _ip_key(network.broadcast_address)},
+        }
+        try:
+            docs = list(self._collection.find(spec, {"_id": 0}))
+        except PyMongoError:
+            return
+        with self._lock:
+            for doc in docs:
+                if ip_address(doc["ip_address"]) not in network:  # a key of the other address family
+                    continue
+                key = (doc["ip_address"], doc["port"])
+                entry = self._known.get(key)
+                if entry is not None and entry.last_probed >= doc["last_probed"]:
+                    continue
+                self._unseen.pop(key, None)
+                self._known[key] = ReachabilityEntry(
+                    alive=doc["alive"],
+                    last_probed=doc["last_probed"],
+                    last_seen=doc.get("last_seen"),
+                    misses=doc.get("misses", 0),
+                )
+                self._known.move_to_end(key)
+                if doc["alive"]:
+                    self._alive.add(key)
+                else:
+                    self._alive.discard(key)
+            self._evict()
+
+    def record(self, ip: str, port: int, alive: bool, now: float | None = None) -> None:
+        now = now if now is not None else time.time()
+        key = (ip, port)
+        with self._lock:
+            entry = self._known.get(key)
+            if entry is not None:
+                self._known.move_to_end(key)
+            else:
+                entry = self._unseen.pop(key, None)
+                if entry is None:
+                    entry = ReachabilityEntry(alive=alive, last_probed=now)
+                (self._known if alive else self._unseen)[key] = entry
+                self._evict()
+            exponent = entry.backoff_exponent()
+            was_alive = entry.alive
+            entry.alive = alive
+            entry.last_probed = now
+            if alive:
+                entry.last_seen = now
+                entry.misses = 0
+                self._alive.add(key)
+                self._dirty[key] = entry
+                return
+            entry.misses += 1
+            self._alive.discard(key)
+            # A known meter going quiet must overwrite its saved alive state, and its
+            # growing backoff is worth keeping; targets that never answered stay in memory.
+            if entry.last_seen is not None and (was_alive or entry.backoff_exponent() != exponent):
+                self._dirty[key] = entry
+
+    def _evict(self) -> None:
+        while self._unseen and len(self._known) + len(self._unseen) > self._max_entries:
+            self._unseen.popitem(last=False)
+        while len(self._known) > self._max_entries:
+            evicted, _ = self._known.popitem(last=False)
+            self._alive.discard(evicted)
+
+    def cached_state(self, ip: str, port: int, ttl: float, now: float) -> bool | None:
+        """``False`` while a dead target is still backing off, otherwise ``None`` (probe it)."""
+        key = (ip, port)
+        entry = self._known.get(key) or self._unseen.get(key)
+        if entry is None or entry.alive:
+            return None
+        age = now - entry.last_probed
+        return False if age < ttl * (2 ** entry.backoff_exponent()) else None
+
+    def alive_in(self, ip_range: str, ports: list[int]) -> list[Key]:
+        """Targets last seen alive inside ``ip_range`` on one of ``ports``."""
+        network = ip_network(ip_range, strict=False)
+        wanted_ports = set(ports)
+        with self._lock:
+            alive = list(self._alive)
+        return sorted(
+            (ip, port)
+            for ip, port in alive
+            if port in wanted_ports and ip_address(ip) in network
+        )
+
+    def flush(self) -> None:
+        """Upsert saved entries changed since the last flush, ``MONGO_WRITE_BATCH_SIZE`` at a time."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if self._collection is None or not dirty:
+            return
+        keys = list(dirty)
+        batch_size = max(settings.mongo_write_batch_size, 1)
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            try:
+                self._collection.bulk_write([self._upsert(key, dirty[key]) for key in chunk], ordered=False)
+            except PyMongoError:
+                with self._lock:
+                    for key in keys[start:]:
+                        self._dirty.setdefault(key, dirty[key])
+                return
+
+    @staticmethod
+    def _upsert(key: Key, entry: ReachabilityEntry) -> UpdateOne:
+        ip, port = key
+        # Past the longest backoff nothing would be trusted, so Mongo can drop the document.
+        trusted_for = settings.reachability_ttl_seconds * (2 ** settings.reachability_max_backoff_exponent)
+        return UpdateOne(
+            {"ip_address": ip, "port": port},
+            {
+                "$set": {
+                    "ip_key": _ip_key(ip_address(ip)),
+                    "alive": entry.alive,
+                    "last_probed": entry.last_probed,
+                    "last_seen": entry.last_seen,
+                    "misses": entry.misses,
+                    "expires_at": datetime.utcfromtimestamp(entry.last_probed) + timedelta(seconds=trusted_for),
+                }
+            },
+            upsert=True,
+        )
+
+
+def _ip_key(address: IPv4Address | IPv6Address) -> str:
+    # Fixed-width hex sorts like the address within a family, so a range is one index scan.
+    return address.packed.hex()
+
+
+def plan_targets(
+    cache: ReachabilityCache,
+    targets: Iterator[tuple[str, int]],
+    ip_range: str,
+    ports: list[int],
+    ttl: float,
+) -> Iterator[tuple[str, int, bool | None]]:
+    """Order an incremental scan and attach any trusted cached state.
+
+    Targets last seen alive come first and are always probed, so known meters
+    are verified early; the rest of the range follows in address order. Those
+    are paired with ``False`` while the cache still trusts them to be dead, or
+    ``None`` when they have to be probed. Call ``cache.load`` for the range first.
+    """
+    now = time.time()
+    known_alive = cache.alive_in(ip_range, ports)
+    for ip, port in known_alive:
+        yield ip, port, None
+
+    prioritized = set(known_alive)
+    for ip, port in targets:
+        if (ip, port) in prioritized:
+            continue
+        yield ip, port, cache.cached_state(ip, port, ttl, now)
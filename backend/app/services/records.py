@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+import ipaddress
+import socket
+from uuid import UUID
+
+from app.models.core import DiscoveryResult, MeterTemplate
+
+
+def pack_ipv4(ip_address: str) -> int | None:
+    """``ip_address`` as a 32-bit int, or ``None`` if it is not an IPv4 address."""
+    try:
+        return int(ipaddress.IPv4Address(ip_address))
+    except ValueError:
+        return None
+
+
+def format_ipv4(packed: int) -> str:
+    return socket.inet_ntoa(packed.to_bytes(4, "big"))
+
+
+def canonical_host(ip_address: str) -> str:
+    """Canonical text of a non-IPv4 address; other host names are kept as given."""
+    try:
+        return str(ipaddress.ip_address(ip_address))
+    except ValueError:
+        return ip_address
+
+
+def meter_id_bytes(meter_id: str) -> bytes | None:
+    try:
+        return UUID(meter_id).bytes
+    except ValueError:
+        return None
+
+
+def meter_id_str(meter_id: bytes) -> str:
+    return str(UUID(bytes=meter_id))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class DeviceProfile:
+    """What every instance of one template variant shares.
+
+    Registries intern one profile per template, authentication mode and
+    security suite, so a meter only stores a reference to it.
+    """
+
+    template: MeterTemplate
+    authentication: str
+    security_suite: int
+
+    @property
+    def vendor(self) -> str:
+        return self.template.vendor
+
+    @property
+    def model(self) -> str:
+        return self.template.model
+
+
+@dataclass(slots=True)
+class ResultRecord:
+    """One discovered target, kept in memory until it is served.
+
+    IPv4 addresses are stored as ints and meter ids as 16 raw bytes. The
+    device, if the target is a known meter, is a shared ``DeviceProfile``.
+    ``to_model`` builds the API's ``DiscoveryResult``.
+    """
+
+    meter_id: bytes
+    address: int | str
+    port: int
+    discovered_at: float
+    device: DeviceProfile | None = None
+
+    @property
+    def ip_address(self) -> str:
+        return format_ipv4(self.address) if isinstance(self.address, int) else self.address
+
+    @property
+    def discovered(self) -> datetime:
+        return datetime.utcfromtimestamp(self.discovered_at)
+
+    def to_model(self) -> DiscoveryResult:
+        return DiscoveryResult.model_construct(**self.to_document())
+
+    def to_document(self) -> dict[str, object]:
+        device = self.device
+        return {
+            "meter_id": meter_id_str(self.meter_id),
+            "ip_address": self.ip_address,
+            "port": self.port,
+            "discovered_at": self.discovered,
+            "vendor": device.vendor if device else None,
+            "model": device.model if device else None,
+            "authentication": device.authentication if device else None,
+            "security_suite": device.security_suite if device else None,
+            "reachable": True,
+        }
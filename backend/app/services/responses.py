@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+import hashlib
+from threading import Lock
+from uuid import uuid4
+
+from fastapi import Request, Response
+
+JSON_MEDIA_TYPE = "application/json"
+# Clients revalidate every poll, so an unchanged list costs a 304 and no body.
+CACHE_CONTROL = "no-cache"
+# Versions restart at zero with the process; the run tag keeps ETags from an earlier run from matching.
+_RUN_TAG = uuid4().hex[:8]
+
+
+class BodyCache:
+    """Serialized JSON bodies stamped with the version of the data they came from.
+
+    A body is rebuilt only after the version for its key moves on, and its
+    ETag is derived from the key and version alone, so a conditional request
+    for an unchanged list is answered without touching the data. Holds up to
+    ``max_entries`` keys, least recently used first out.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self._entries: OrderedDict[Hashable, tuple[int, bytes]] = OrderedDict()
+        self._max_entries = max(max_entries, 1)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(key: Hashable, version: int) -> str:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+        return f'"{_RUN_TAG}-{version}-{digest}"'
+
+    def body(self, key: Hashable, version: int, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        body = build()
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+
+def versioned_json(
+    request: Request,
+    cache: BodyCache,
+    key: Hashable,
+    version: int,
+    build: Callable[[], bytes],
+) -> Response:
+    """``build``'s body from ``cache``, or 304 if the client already has this version."""
+    etag = cache.etag(key, version)
+    if _not_modified(request, etag):
+        return _not_modified_response(etag)
+    return _json_response(cache.body(key, version, build), etag)
+
+
+def json_body(request: Request, body: bytes) -> Response:
+    """``body`` with a content-hash ETag, or 304 if it matches ``If-None-Match``."""
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    if _not_modified(request, etag):
+        return _not_modified_response(etag)
+    return _json_response(body, etag)
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    return Response(body, media_type=JSON_MEDIA_TYPE, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
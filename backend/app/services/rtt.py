@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from ipaddress import ip_address, ip_network
+import random
+
+
+@dataclass(slots=True)
+class RttState:
+    srtt: float
+    rttvar: float
+    samples: int = 1
+
+
+class SubnetRttEstimator:
+    """Smoothed connect round-trip time per subnet, used to size probe timeouts.
+
+    Each completed connect (accepted or refused) is an RTT sample for the
+    target's subnet (``/24`` for IPv4, ``/64`` for IPv6 by default). The
+    estimate follows RFC 6298: ``timeout = srtt + 4 * rttvar``, clamped to
+    ``[min_timeout, max_timeout]``. Subnets without samples use the caller's
+    initial timeout.
+    """
+
+    def __init__(
+        self,
+        min_timeout: float,
+        max_timeout: float,
+        ipv4_prefix: int = 24,
+        ipv6_prefix: int = 64,
+    ) -> None:
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._ipv4_prefix = ipv4_prefix
+        self._ipv6_prefix = ipv6_prefix
+        self._states: dict[str, RttState] = {}
+
+    def subnet(self, ip: str) -> str:
+        if ":" in ip:
+            return str(ip_network(f"{ip}/{self._ipv6_prefix}", strict=False))
+        if self._ipv4_prefix == 24:
+            return f"{ip.rsplit('.', 1)[0]}.0/24"
+        return str(ip_network(f"{ip_address(ip)}/{self._ipv4_prefix}", strict=False))
+
+    def observe(self, subnet: str, rtt: float) -> None:
+        state = self._states.get(subnet)
+        if state is None:
+            self._states[subnet] = RttState(srtt=rtt, rttvar=rtt / 2)
+            return
+        state.rttvar = 0.75 * state.rttvar + 0.25 * abs(state.srtt - rtt)
+        state.srtt = 0.875 * state.srtt + 0.125 * rtt
+        state.samples += 1
+
+    def timeout(self, subnet: str, initial: float) -> float:
+        state = self._states.get(subnet)
+        if state is None:
+            return min(max(initial, self._min_timeout), self._max_timeout)
+        return min(max(state.srtt + 4 * state.rttvar, self._min_timeout), self._max_timeout)
+
+    def backoff_timeout(self, subnet: str, initial: float, attempt: int) -> float:
+        """Timeout for retry ``attempt`` (0 = first probe), doubled per retry."""
+        return min(self.timeout(subnet, initial) * (2 ** attempt), self._max_timeout)
+
+    def snapshot(self, subnets: set[str], initial: float) -> dict[str, float]:
+        return {subnet: round(self.timeout(subnet, initial), 4) for subnet in sorted(subnets)}
+
+
+def retry_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry ``attempt`` (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+import time
+from uuid import uuid4
+
+from app.models.core import DiscoveryRequest, ScanJobStatus, ScanStats
+from app.services.discovery import DiscoveryEngine
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class FairLimiter:
+    """Probe slots shared by several scans, handed out round-robin per scan.
+
+    While slots are free anyone gets one immediately. Once ``capacity`` is
+    reached, each released slot goes to the next scan in turn, so a scan
+    with many waiting workers cannot starve the others. A block of several
+    slots (a shard probed in a worker process) is collected one slot at a
+    time, and only one block fills up at once.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = max(capacity, 1)
+        self._in_use = 0
+        self._waiting: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+        self._filling = asyncio.Lock()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @asynccontextmanager
+    async def slot(self, key: str, count: int = 1) -> AsyncIterator[None]:
+        """Hold ``count`` slots, at most ``capacity``, while the block runs."""
+        count = min(max(count, 1), self._capacity)
+        held = 0
+        try:
+            if count == 1:
+                await self.acquire(key)
+                held = 1
+            else:
+                # Two half-filled blocks would each wait for the other's slots forever.
+                async with self._filling:
+                    while held < count:
+                        await self.acquire(key)
+                        held += 1
+            yield
+        finally:
+            for _ in range(held):
+                self.release()
+
+    async def acquire(self, key: str) -> None:
+        if self._in_use < self._capacity and not self._waiting:
+            self._in_use += 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(key, future)
+            raise
+
+    def release(self) -> None:
+        while self._waiting:
+            key, waiters = next(iter(self._waiting.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_use -= 1
+
+    def _discard(self, key: str, future: asyncio.Future[None]) -> None:
+        waiters = self._waiting.get(key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+        except ValueError:
+            return
+        if not waiters:
+            del self._waiting[key]
+
+
+@dataclass
+class ScanJob:
+    scan_id: str
+    request: DiscoveryRequest
+    stats: ScanStats = field(default_factory=ScanStats)
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+    task: asyncio.Task | None = None
+    started_monotonic: float | None = None
+    elapsed_seconds: float | None = None
+
+    def snapshot(self) -> ScanJobStatus:
+        total = self.stats.total_targets
+        done = self.stats.completed
+        elapsed = self.elapsed_seconds
+        if elapsed is None and self.started_monotonic is not None:
+            elapsed = time.monotonic() - self.started_monotonic
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if self.status == RUNNING and rate else None
+        return ScanJobStatus(
+            scan_id=self.scan_id,
+            status=self.status,
+            request=self.request,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            error=self.error,
+            probed=done,
+            hits=self.stats.discovered,
+            percent=round(100.0 * done / total, 2) if total else 0.0,
+            rate_per_second=round(rate, 1),
+            eta_seconds=round(eta, 1) if eta is not None else None,
+            stats=self.stats,
+        )
+
+
+class ScanScheduler:
+    """Runs discovery scans as background jobs on the event loop.
+
+    At most ``max_running`` jobs run at once; further submissions wait in
+    FIFO order. Running jobs draw their probe slots from one ``FairLimiter``
+    of ``probe_budget`` slots, so concurrent scans share capacity evenly.
+    Sharded jobs hold a shard's whole probe window of slots while that shard
+    runs in a worker process.
+    Only the latest ``history`` finished jobs are kept.
+    """
+
+    def __init__(self, engine: DiscoveryEngine, max_running: int, probe_budget: int, history: int) -> None:
+        self._engine = engine
+        self._running = asyncio.Semaphore(max(max_running, 1))
+        self._limiter = FairLimiter(probe_budget)
+        self._history = history
+        self._jobs: OrderedDict[str, ScanJob] = OrderedDict()
+
+    def submit(self, request: DiscoveryRequest) -> ScanJob:
+        job = ScanJob(scan_id=str(uuid4()), request=request)
+        self._jobs[job.scan_id] = job
+        job.task = asyncio.create_task(self._run(job), name=f"scan-{job.scan_id}")
+        self._evict()
+        return job
+
+    def get(self, scan_id: str) -> ScanJob | None:
+        return self._jobs.get(scan_id)
+
+    def list(self) -> list[ScanJob]:
+        return list(reversed(self._jobs.values()))
+
+    def active_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+
+    async def cancel(self, scan_id: str, wait: float = 5.0) -> ScanJob | None:
+        """Cancel a job and wait up to ``wait`` seconds for it to stop."""
+        job = self._jobs.get(scan_id)
+        if job is None:
+            return None
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+            await asyncio.wait({job.task}, timeout=wait)
+        return job
+
+    async def shutdown(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: ScanJob) -> None:
+        try:
+            async with self._running:
+                job.status = RUNNING
+                job.started_at = datetime.utcnow()
+                job.started_monotonic = time.monotonic()
+                slot = lambda count=1: self._limiter.slot(job.scan_id, count)
+                async for _ in self._engine.iter_records(job.request, job.scan_id, job.stats, slot):
+                    pass
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as exc:  # noqa: BLE001 - surfaced on the job status
+            job.status = FAILED
+            job.error = str(exc) or type(exc).__name__
+        finally:
+            job.finished_at = datetime.utcnow()
+            if job.started_monotonic is not None:
+                job.elapsed_seconds = time.monotonic() - job.started_monotonic
+            self._evict()
+
+    def _evict(self) -> None:
+        finished = [scan_id for scan_id, job in self._jobs.items() if job.status not in (QUEUED, RUNNING)]
+        for scan_id in finished[: max(len(finished) - self._history, 0)]:
+            del self._jobs[scan_id]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from ipaddress import ip_network
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Any
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    scan_id: str
+    index: int
+    ip_range: str
+    request: dict[str, Any]
+    checkpoint_path: str
+
+
+def split_range(ip_range: str, hosts_per_shard: int) -> list[str]:
+    """Split ``ip_range`` into CIDR blocks of at most ``hosts_per_shard`` addresses."""
+    network = ip_network(ip_range, strict=False)
+    shard_bits = max(hosts_per_shard - 1, 0).bit_length()
+    prefix = max(network.prefixlen, network.max_prefixlen - shard_bits)
+    return [str(subnet) for subnet in network.subnets(new_prefix=prefix)]
+
+
+class WorkQueue(ABC):
+    """Source of shard tasks for a sharded scan.
+
+    ``LocalWorkQueue`` keeps tasks in process for the local process pool. A
+    broker-backed implementation can hand the same tasks to scan workers on
+    other hosts, since each task carries everything needed to run it.
+    """
+
+    @abstractmethod
+    def put(self, task: ShardTask) -> None: ...
+
+    @abstractmethod
+    def get(self) -> ShardTask | None:
+        """Next task to run, or ``None`` when nothing is waiting."""
+
+    @abstractmethod
+    def ack(self, task: ShardTask) -> None:
+        """Mark ``task`` as finished."""
+
+    @abstractmethod
+    def nack(self, task: ShardTask) -> None:
+        """Return ``task`` to the queue after a failed run."""
+
+
+class LocalWorkQueue(WorkQueue):
+    def __init__(self) -> None:
+        self._waiting: deque[ShardTask] = deque()
+        self._running: dict[tuple[str, int], ShardTask] = {}
+
+    def __len__(self) -> int:
+        return len(self._waiting) + len(self._running)
+
+    def put(self, task: ShardTask) -> None:
+        self._waiting.append(task)
+
+    def get(self) -> ShardTask | None:
+        if not self._waiting:
+            return None
+        task = self._waiting.popleft()
+        self._running[(task.scan_id, task.index)] = task
+        return task
+
+    def ack(self, task: ShardTask) -> None:
+        self._running.pop((task.scan_id, task.index), None)
+
+    def nack(self, task: ShardTask) -> None:
+        if self._running.pop((task.scan_id, task.index), None) is not None:
+            self._waiting.appendleft(task)
+
+
+class CheckpointStore:
+    """JSON checkpoints for sharded scans, one directory per scan.
+
+    ``manifest.json`` records the request and its shard ranges when the scan
+    starts. Each shard writes ``shard-<index>.json`` with its probe outcomes
+    when it finishes, so a resumed scan only runs the shards without one.
+    """
+
+    def __init__(self, root: str) -> None:
+        self._root = Path(root)
+
+    def create(self, scan_id: str, request: dict[str, Any], shards: list[str]) -> None:
+        write_json(self._manifest_path(scan_id), {"scan_id": scan_id, "request": request, "shards": shards})
+
+    def manifest(self, scan_id: str) -> dict[str, Any] | None:
+        try:
+            return json.loads(self._manifest_path(scan_id).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def shard_path(self, scan_id: str, index: int) -> str:
+        return str(self._scan_dir(scan_id) / f"shard-{index:06d}.json")
+
+    def completed(self, scan_id: str) -> dict[int, dict[str, Any]]:
+        checkpoints: dict[int, dict[str, Any]] = {}
+        for path in sorted(self._scan_dir(scan_id).glob("shard-*.json")):
+            try:
+                checkpoint = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            checkpoints[checkpoint["index"]] = checkpoint
+        return checkpoints
+
+    def remove(self, scan_id: str) -> None:
+        shutil.rmtree(self._scan_dir(scan_id), ignore_errors=True)
+
+    def _manifest_path(self, scan_id: str) -> Path:
+        return self._scan_dir(scan_id) / "manifest.json"
+
+    def _scan_dir(self, scan_id: str) -> Path:
+        if not scan_id or scan_id in {".", ".."} or Path(scan_id).name != scan_id:
+            raise ValueError("invalid_scan_id")
+        return self._root / scan_id
+
+
+def write_json(path: str | Path, payload: dict[str, Any]) -> None:
+    """Write ``payload`` atomically so a crash never leaves a partial checkpoint."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(payload, default=str))
+    os.replace(temporary, path)
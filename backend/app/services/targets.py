@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from ipaddress import IPv4Address, IPv4Network, IPv6Address, IPv6Network, ip_network
+
+
+def iter_targets(ip_range: str, ports: list[int]) -> Iterator[tuple[str, int]]:
+    """Lazily yield every (host, port) pair of ``ip_range``."""
+    network = ip_network(ip_range, strict=False)
+    for host in network.hosts():
+        host_address = str(host)
+        for port in ports:
+            yield host_address, port
+
+
+def iter_host_targets(ip_range: str, ports: list[int]) -> Iterator[tuple[int | str, int]]:
+    """Like ``iter_targets``, but IPv4 hosts come as 32-bit ints rather than text."""
+    network = ip_network(ip_range, strict=False)
+    if network.version != 4:
+        yield from iter_targets(ip_range, ports)
+        return
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.num_addresses > 2:
+        first += 1
+        last -= 1
+    for host in range(first, last + 1):
+        for port in ports:
+            yield host, port
+
+
+def iter_shard_targets(ip_range: str, shard_range: str, ports: list[int]) -> Iterator[tuple[str, int]]:
+    """Yield the (host, port) pairs of ``ip_range`` that fall inside ``shard_range``.
+
+    Addresses that ``ip_range`` itself excludes (its network and broadcast
+    address) stay excluded even where they sit inside a shard.
+    """
+    network = ip_network(ip_range, strict=False)
+    shard = ip_network(shard_range, strict=False)
+    if shard == network:
+        yield from iter_targets(ip_range, ports)
+        return
+    excluded = _excluded_addresses(network)
+    for host in shard:
+        if host in excluded:
+            continue
+        host_address = str(host)
+        for port in ports:
+            yield host_address, port
+
+
+def count_shard_targets(ip_range: str, shard_range: str, ports: list[int]) -> int:
+    network = ip_network(ip_range, strict=False)
+    shard = ip_network(shard_range, strict=False)
+    if shard == network:
+        return count_targets(ip_range, ports)
+    excluded = sum(1 for address in _excluded_addresses(network) if address in shard)
+    return (shard.num_addresses - excluded) * len(ports)
+
+
+def count_targets(ip_range: str, ports: list[int]) -> int:
+    return count_hosts(ip_network(ip_range, strict=False)) * len(ports)
+
+
+def count_hosts(network: IPv4Network | IPv6Network) -> int:
+    """Number of addresses ``network.hosts()`` yields, without iterating it."""
+    if network.num_addresses <= 2:
+        return network.num_addresses
+    # IPv4 drops network and broadcast; IPv6 drops the subnet-router anycast.
+    return network.num_addresses - (2 if network.version == 4 else 1)
+
+
+def _excluded_addresses(network: IPv4Network | IPv6Network) -> set[IPv4Address | IPv6Address]:
+    if network.num_addresses <= 2:
+        return set()
+    if network.version == 4:
+        return {network.network_address, network.broadcast_address}
+    return {network.network_address}
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+import cProfile
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+import inspect
+import json
+from pathlib import Path
+import pstats
+import random
+import threading
+import time
+from typing import Any, TypeVar
+from uuid import uuid4
+
+from app.config import settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PROFILE_HEADER = b"x-profile"
+TRACE_ID_HEADER = b"x-trace-id"
+# Functions listed in a trace's JSON, by cumulative time.
+TOP_FUNCTIONS = 40
+
+_current_span: ContextVar[Span | None] = ContextVar("dlms_current_span", default=None)
+# cProfile hooks the event loop thread, so only one request at a time gets one.
+_profiler_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class Trace:
+    trace_id: str
+    method: str
+    path: str
+    max_spans: int
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    status: int | None = None
+    spans: int = 0
+    dropped_spans: int = 0
+    root: Span = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.root = Span(f"{self.method} {self.path}", self, time.perf_counter())
+
+    def summary(self) -> dict[str, object]:
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.root.duration * 1000, 3),
+            "spans": self.spans,
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace: Trace
+    started: float
+    duration: float = 0.0
+    items: int | None = None
+    children: list[Span] = field(default_factory=list)
+
+    def child(self, name: str) -> Span | None:
+        """Start a child span, or return ``None`` once the trace holds ``max_spans``."""
+        trace = self.trace
+        if trace.spans >= trace.max_spans:
+            trace.dropped_spans += 1
+            return None
+        trace.spans += 1
+        span = Span(name, trace, time.perf_counter())
+        self.children.append(span)
+        return span
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def to_dict(self, origin: float) -> dict[str, object]:
+        data: dict[str, object] = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.items is not None:
+            data["items"] = self.items
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Record calls of the decorated function as spans of the request's trace.
+
+    Outside a profiled request a call costs one context variable lookup. With
+    ``PROFILING_ENABLED`` off the function is returned undecorated. Async
+    generators become leaf spans that last until they are exhausted and
+    count the items they yielded.
+    """
+
+    def decorate(function: F) -> F:
+        if not settings.profiling_enabled:
+            return function
+
+        if inspect.isasyncgenfunction(function):
+
+            @wraps(function)
+            def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+                parent = _current_span.get()
+                if parent is None:
+                    return function(*args, **kwargs)
+                return _traced_items(parent, name, function(*args, **kwargs))
+
+            return generator_wrapper  # type: ignore[return-value]
+
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                parent = _current_span.get()
+                span = parent.child(name) if parent is not None else None
+                if span is None:
+                    return await function(*args, **kwargs)
+                token = _current_span.set(span)
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    span.finish()
+                    _current_span.reset(token)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            parent = _current_span.get()
+            span = parent.child(name) if parent is not None else None
+            if span is None:
+                return function(*args, **kwargs)
+            token = _current_span.set(span)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                span.finish()
+                _current_span.reset(token)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+async def _traced_items(parent: Span, name: str, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    span = parent.child(name)
+    if span is None:
+        async for item in items:
+            yield item
+        return
+    span.items = 0
+    try:
+        async for item in items:
+            span.items += 1
+            yield item
+    finally:
+        span.finish()
+
+
+class TraceStore:
+    """Keeps the last ``max_traces`` traces as files under ``directory``.
+
+    Each trace is ``<trace_id>.json`` (summary, span tree and the top
+    functions by cumulative time) plus, when cProfile ran,
+    ``<trace_id>.prof`` for ``pstats``/snakeviz.
+    """
+
+    def __init__(self, directory: str, max_traces: int) -> None:
+        self._directory = Path(directory)
+        self._recent: deque[dict[str, object]] = deque()
+        self._max_traces = max(max_traces, 1)
+        self._lock = threading.Lock()
+
+    def save(self, trace: Trace, profiler: cProfile.Profile | None) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        summary = {**trace.summary(), "profile": profiler is not None}
+        document: dict[str, object] = {**summary, "spans": trace.root.to_dict(trace.root.started)}
+        if profiler is not None:
+            stats = pstats.Stats(profiler)
+            stats.dump_stats(self.profile_path(trace.trace_id))
+            document["functions"] = _top_functions(stats)
+        self.trace_path(trace.trace_id).write_text(json.dumps(document))
+
+        with self._lock:
+            self._recent.appendleft(summary)
+            expired = [self._recent.pop() for _ in range(len(self._recent) - self._max_traces)]
+        for old in expired:
+            self.trace_path(old["trace_id"]).unlink(missing_ok=True)
+            self.profile_path(old["trace_id"]).unlink(missing_ok=True)
+
+    def list(self) -> list[dict[str, object]]:
+        with self._lock:
+            return list(self._recent)
+
+    def get(self, trace_id: str) -> dict[str, object] | None:
+        path = self.trace_path(trace_id)
+        if not _valid_id(trace_id) or not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def trace_path(self, trace_id: str) -> Path:
+        return self._directory / f"{trace_id}.json"
+
+    def profile_path(self, trace_id: str) -> Path:
+        return self._directory / f"{trace_id}.prof"
+
+
+class ProfilingMiddleware:
+    """Trace and profile a request when asked to, or for a sampled fraction.
+
+    A request is traced when it carries ``X-Profile: 1`` (with a valid
+    ``X-API-Key`` if one is configured) or is picked at ``sample_rate``.
+    Traced responses get an ``X-Trace-Id`` header; the trace is saved to
+    ``store`` after the response is sent.
+
+    cProfile records everything on the event loop thread while the request
+    runs, including other requests interleaved with it, and nothing from
+    worker threads; the span tree does follow ``asyncio.to_thread``.
+    """
+
+    def __init__(self, app: Callable[..., Any], store: TraceStore, sample_rate: float = 0.0) -> None:
+        self.app = app
+        self._store = store
+        self._sample_rate = sample_rate
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(uuid4().hex, scope["method"], scope["path"], settings.profiling_max_spans)
+        trace_header = (TRACE_ID_HEADER, trace.trace_id.encode())
+
+        async def send_with_trace_id(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), trace_header]}
+            await send(message)
+
+        profiler = _start_profiler() if settings.profiling_cprofile else None
+        token = _current_span.set(trace.root)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace.root.finish()
+            _current_span.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                _profiler_lock.release()
+            await asyncio.to_thread(self._store.save, trace, profiler)
+
+    def _wanted(self, scope: dict[str, Any]) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER, b"").lower() in (b"1", b"true", b"yes"):
+            return not settings.api_key or headers.get(b"x-api-key", b"").decode() == settings.api_key
+        return self._sample_rate > 0 and random.random() < self._sample_rate
+
+
+def _start_profiler() -> cProfile.Profile | None:
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler (e.g. a debugger) owns the hook
+        _profiler_lock.release()
+        return None
+    return profiler
+
+
+def _top_functions(stats: pstats.Stats) -> list[dict[str, object]]:
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+    return [
+        {
+            "function": f"{function} ({filename}:{line})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, function), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+def _valid_id(trace_id: str) -> bool:
+    return len(trace_id) == 32 and all(char in "0123456789abcdef" for char in trace_id)
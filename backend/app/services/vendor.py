@@ -1,14 +1,28 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime
+from threading import Lock
 
-from app.models.core import MeterInstance, VendorClassification
+import numpy as np
+
+from app.config import settings
+from app.models.core import MeterInstance, MeterObservation, MeterTemplate, VendorClassification
+from app.services.emulator import EmulatorRegistry
 
 VENDOR_SIGNATURES = {
     "Acme Energy": ("Acme", 0.92),
     "Zenith Power": ("Zenith", 0.9),
 }
 
+AUTHENTICATION_MODES = {"None": 0, "LLS": 1, "HLS": 2}
+SECURITY_SUITES = {0: 0, 1: 1, 2: 2}
+REFERENCING = {"LN": 0, "SN": 1}
+# Share of the similarity score carried by each feature group:
+# OBIS code set, authentication, security suite, referencing.
+FEATURE_WEIGHTS = np.array([0.7, 0.1, 0.1, 0.1], dtype=np.float32)
+
 
 class VendorClassifier:
     def classify(self, meter: MeterInstance) -> VendorClassification:
@@ -24,3 +38,163 @@ class VendorClassifier:
             confidence=confidence,
             created_at=datetime.utcnow(),
         )
+
+
+@dataclass(frozen=True)
+class _TemplateIndex:
+    templates: list[MeterTemplate]
+    codes: dict[str, int]
+    obis: np.ndarray  # (templates, codes) 0/1
+    obis_sizes: np.ndarray  # (templates,)
+    # (values + 1, templates): one row per value plus a zero row that missing values select.
+    authentication: np.ndarray
+    security_suite: np.ndarray
+    referencing: np.ndarray
+
+
+def _group_matrix(templates: list[MeterTemplate], positions: dict, values_of) -> np.ndarray:
+    matrix = np.zeros((len(positions) + 1, len(templates)), dtype=np.float32)
+    for column, template in enumerate(templates):
+        for value in values_of(template):
+            matrix[positions[value], column] = 1.0
+    return matrix
+
+
+class SimilarityVendorClassifier:
+    """Classify meters by how closely their observed features match each template.
+
+    Each meter is encoded as fixed-width 0/1 vectors: its OBIS codes over the
+    union of template codes, plus one-hot authentication, security suite and
+    referencing. All meters of a batch are scored against all templates with
+    matrix products: Jaccard similarity for the OBIS set and membership in the
+    template's allowed values for the rest, combined with ``FEATURE_WEIGHTS``
+    over the groups the meter actually reported. The best template wins, and
+    its score is the confidence. Below ``VENDOR_MIN_CONFIDENCE`` the meter is
+    reported as ``Unknown``.
+
+    The template matrices are rebuilt lazily after a template changes.
+    """
+
+    def __init__(self, registry: EmulatorRegistry) -> None:
+        self._registry = registry
+        self._index: _TemplateIndex | None = None
+        self._lock = Lock()
+        registry.add_template_listener(self.invalidate)
+
+    def invalidate(self, template: MeterTemplate | None = None) -> None:
+        self._index = None
+
+    def observation_for(self, meter: MeterInstance) -> MeterObservation:
+        template = self._registry.get_template(meter.vendor, meter.model)
+        return MeterObservation(
+            meter_id=meter.meter_id,
+            obis_codes=[obj.code for obj in meter.obis_objects],
+            authentication=meter.authentication,
+            security_suite=meter.security_suite,
+            referencing=template.referencing if template else None,
+        )
+
+    def classify_batch(self, observations: Sequence[MeterObservation]) -> list[VendorClassification]:
+        index = self._template_index()
+        if not observations:
+            return []
+        if not index.templates:
+            best = np.zeros(len(observations), dtype=np.intp)
+            confidence = np.zeros(len(observations), dtype=np.float32)
+        else:
+            best, confidence = self.score(observations, index)
+
+        created_at = datetime.utcnow()
+        results = []
+        for observation, template_index, score in zip(observations, best.tolist(), confidence.tolist()):
+            if score < settings.vendor_min_confidence:
+                vendor = model = None
+                classification = "Unknown"
+            else:
+                template = index.templates[template_index]
+                vendor, model = template.vendor, template.model
+                classification = VENDOR_SIGNATURES.get(vendor, (vendor,))[0]
+            results.append(
+                VendorClassification(
+                    meter_id=observation.meter_id,
+                    vendor=vendor,
+                    model=model,
+                    classification=classification,
+                    confidence=round(score, 4),
+                    created_at=created_at,
+                )
+            )
+        return results
+
+    @staticmethod
+    def score(observations: Sequence[MeterObservation], index: _TemplateIndex) -> tuple[np.ndarray, np.ndarray]:
+        """Best template index and its similarity score for each observation."""
+        count = len(observations)
+        rows: list[int] = []
+        columns: list[int] = []
+        sizes = np.empty(count, dtype=np.float32)
+        authentication = np.full(count, -1, dtype=np.intp)
+        security_suite = np.full(count, -1, dtype=np.intp)
+        referencing = np.full(count, -1, dtype=np.intp)
+        codes = index.codes
+        for row, observation in enumerate(observations):
+            observed = set(observation.obis_codes)
+            sizes[row] = len(observed)
+            for code in observed:
+                column = codes.get(code)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+            authentication[row] = AUTHENTICATION_MODES.get(observation.authentication, -1)
+            security_suite[row] = SECURITY_SUITES.get(observation.security_suite, -1)
+            referencing[row] = REFERENCING.get(observation.referencing, -1)
+
+        observed_obis = np.zeros((count, len(codes)), dtype=np.float32)
+        observed_obis[rows, columns] = 1.0
+        intersection = observed_obis @ index.obis.T
+        union = sizes[:, None] + index.obis_sizes[None, :] - intersection
+        jaccard = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+        present = np.stack(
+            [sizes > 0, authentication >= 0, security_suite >= 0, referencing >= 0],
+            axis=1,
+        ).astype(np.float32)
+        weights = present * FEATURE_WEIGHTS
+        total = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+
+        scores = weights[:, 0:1] * jaccard
+        scores += weights[:, 1:2] * index.authentication[authentication]
+        scores += weights[:, 2:3] * index.security_suite[security_suite]
+        scores += weights[:, 3:4] * index.referencing[referencing]
+        best = scores.argmax(axis=1)
+        return best, scores[np.arange(count), best]
+
+    def _template_index(self) -> _TemplateIndex:
+        index = self._index
+        if index is not None:
+            return index
+        with self._lock:
+            if self._index is None:
+                self._index = self._build_index(self._registry.list_templates())
+            return self._index
+
+    @staticmethod
+    def _build_index(templates: list[MeterTemplate]) -> _TemplateIndex:
+        codes: dict[str, int] = {}
+        for template in templates:
+            for obj in template.obis_objects:
+                codes.setdefault(obj.code, len(codes))
+        obis = np.zeros((len(templates), len(codes)), dtype=np.float32)
+        for row, template in enumerate(templates):
+            for obj in template.obis_objects:
+                obis[row, codes[obj.code]] = 1.0
+        return _TemplateIndex(
+            templates=templates,
+            codes=codes,
+            obis=obis,
+            obis_sizes=obis.sum(axis=1),
+            authentication=_group_matrix(templates, AUTHENTICATION_MODES, lambda t: t.authentication_modes),
+            security_suite=_group_matrix(templates, SECURITY_SUITES, lambda t: t.security_suites),
+            referencing=_group_matrix(templates, REFERENCING, lambda t: [t.referencing]),
+        )
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+import queue
+import threading
+import time
+from typing import Generic, TypeVar
+
+from app.services.metrics import WRITE_BUFFER_DEPTH, WRITE_BUFFER_ITEMS, WRITE_FLUSH_SECONDS
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    """Collect items on a bounded queue and flush them in batches from a background thread.
+
+    A batch is flushed when it reaches ``batch_size`` items or when
+    ``flush_interval`` seconds have passed since its first item, whichever
+    comes first. When the queue is full, ``submit`` blocks for up to
+    ``put_timeout`` seconds (backpressure on the producer) and then gives up,
+    counting the item as dropped. ``offer`` never blocks: it queues a whole
+    group of items or rejects all of them, so callers can shed load.
+
+    ``flush`` is responsible for its own error handling; exceptions it raises
+    are counted and the batch is discarded so the writer thread keeps running.
+
+    ``name`` labels the buffer's depth, item counts and flush latency in
+    ``/metrics``.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[T]], None],
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+        put_timeout: float,
+        name: str = "write-behind",
+    ) -> None:
+        self._flush = flush
+        self._name = name
+        self._batch_size = max(batch_size, 1)
+        self._flush_interval = flush_interval
+        self._put_timeout = put_timeout
+        self._queue: queue.Queue[T] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.flushed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_batches = 0
+        self.flush_seconds = 0.0
+        WRITE_BUFFER_DEPTH.set_function(lambda: self.depth, (name,))
+        for result in ("flushed", "dropped", "rejected"):
+            WRITE_BUFFER_ITEMS.set_function(lambda result=result: getattr(self, result), (name, result))
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, item: T) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put(item, timeout=self._put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def offer(self, items: list[T]) -> bool:
+        """Queue all of ``items`` without blocking, or none if there is not room for all."""
+        self._ensure_started()
+        with self._lock:
+            if self._queue.maxsize and self._queue.qsize() + len(items) > self._queue.maxsize:
+                self.rejected += len(items)
+                return False
+            for index, item in enumerate(items):
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    self.dropped += len(items) - index
+                    break
+        return True
+
+    def drain(self) -> None:
+        """Flush everything queued so far on the calling thread."""
+        batch = self._take(block=False)
+        while batch:
+            self._write(batch)
+            batch = self._take(block=False)
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self._flush_interval * 4, 1.0))
+        self.drain()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "depth": self.depth,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+            "rows_per_second": round(self.flushed / self.flush_seconds, 1) if self.flush_seconds else 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            batch = self._take(block=True)
+            if batch:
+                self._write(batch)
+
+    def _take(self, block: bool) -> list[T]:
+        batch: list[T] = []
+        try:
+            batch.append(self._queue.get(timeout=self._flush_interval) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[T]) -> None:
+        started = time.monotonic()
+        try:
+            self._flush(batch)
+        except Exception:  # noqa: BLE001 - keep the writer thread alive
+            self.failed_batches += 1
+            return
+        finally:
+            elapsed = time.monotonic() - started
+            self.flush_seconds += elapsed
+            WRITE_FLUSH_SECONDS.observe(elapsed, (self._name,))
+        self.flushed += len(batch)
+        self.batches += 1
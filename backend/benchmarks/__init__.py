@@ -0,0 +1,4 @@
+"""Offline performance benchmarks for the backend services.
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.discovery_scan``.
+"""
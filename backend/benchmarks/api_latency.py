@@ -0,0 +1,114 @@
+"""Load-test a running backend and report request latency percentiles.
+
+Sends ``--requests`` GETs from ``--concurrency`` concurrent clients, cycling
+through ``--path`` (repeatable; defaults to the paginated list endpoints plus
+a couple of in-memory ones). Run it against the same deployment before and
+after a change and compare the p99 columns; with MongoDB and PostgreSQL up,
+slow queries on the list endpoints are what used to hold threadpool workers
+and delay the cheap endpoints.
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.api_latency --base-url http://localhost:8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+import itertools
+import json
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/profiles",
+    "/fingerprints",
+    "/discovery/logs",
+    "/health",
+    "/emulators/templates",
+]
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": round(_percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 2),
+        "max_ms": round(max(samples, default=0.0) * 1000, 2),
+    }
+
+
+async def _load(
+    base_url: str,
+    paths: list[str],
+    requests: int,
+    concurrency: int,
+    api_key: str | None,
+) -> dict[str, object]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    schedule = itertools.islice(itertools.cycle(paths), requests)
+    headers = {"x-api-key": api_key} if api_key else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+
+        async def worker() -> None:
+            for path in schedule:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except httpx.HTTPError:
+                    errors[path] += 1
+                    continue
+                latencies[path].append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors[path] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_second": round(len(everything) / elapsed, 1) if elapsed else 0.0,
+        "overall": _summary(everything),
+        "paths": {path: {**_summary(latencies[path]), "errors": errors[path]} for path in paths},
+    }
+
+
+def run(
+    base_url: str = "http://localhost:8000",
+    paths: list[str] | None = None,
+    requests: int = 5_000,
+    concurrency: int = 200,
+    api_key: str | None = None,
+) -> dict[str, object]:
+    return asyncio.run(_load(base_url, paths or DEFAULT_PATHS, requests, concurrency, api_key))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="endpoint to request (repeatable)")
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--api-key", default=None)
+    args = parser.parse_args()
+    print(json.dumps(run(args.base_url, args.paths, args.requests, args.concurrency, args.api_key), indent=2))
+
+
+if __name__ == "__main__":
+    main()
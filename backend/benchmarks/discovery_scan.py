@@ -0,0 +1,156 @@
+"""Compare the asyncio discovery scanner against the legacy thread-pool probe.
+
+Both paths sweep a loopback range where a handful of addresses have real
+listeners and a block of "silent" addresses never completes the handshake, the
+way an unreachable meter behind cellular backhaul does. Silent hosts are
+simulated with zero-backlog listeners whose accept queue is already full, so
+the kernel drops further SYNs and each probe runs into its connect timeout.
+
+``--sharded`` also runs the sharded scan on a process pool of
+``DISCOVERY_SHARD_WORKERS`` (default: one per core).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ipaddress import ip_network
+import json
+import os
+import socket
+import time
+
+from app.config import settings
+from app.models.core import DiscoveryRequest
+from app.services.discovery import DiscoveryEngine
+from app.services.emulator import EmulatorRegistry, seed_registry
+from app.services.targets import iter_targets
+
+
+def open_listeners(hosts: list[str], port: int, backlog: int = 1024) -> list[socket.socket]:
+    listeners: list[socket.socket] = []
+    for host in hosts:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+        listeners.append(sock)
+    return listeners
+
+
+def open_silent_hosts(hosts: list[str], port: int) -> list[socket.socket]:
+    sockets = open_listeners(hosts, port, backlog=0)
+    for host in hosts:
+        for _ in range(2):
+            filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            filler.setblocking(False)
+            try:
+                filler.connect((host, port))
+            except BlockingIOError:
+                pass
+            sockets.append(filler)
+    time.sleep(0.1)
+    return sockets
+
+
+def threaded_scan(request: DiscoveryRequest) -> int:
+    """The pre-asyncio implementation: one blocking connect per worker thread."""
+
+    def probe(ip_address: str, port: int) -> bool:
+        for _ in range(max(request.retries, 1)):
+            try:
+                with socket.create_connection((ip_address, port), timeout=request.timeout_seconds):
+                    return True
+            except OSError:
+                continue
+        return False
+
+    targets = list(iter_targets(request.ip_range, request.ports))
+    with ThreadPoolExecutor(max_workers=request.max_concurrency) as executor:
+        futures = [executor.submit(probe, ip, port) for ip, port in targets]
+        return sum(1 for future in as_completed(futures) if future.result())
+
+
+def run(
+    ip_range: str = "127.0.0.0/22",
+    port: int = 4059,
+    listeners: int = 16,
+    silent: int = 512,
+    timeout: float = 0.5,
+    sharded: bool = False,
+) -> dict[str, object]:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    engine = DiscoveryEngine(registry, use_mongo=False)
+    hosts = [str(host) for host in ip_network(ip_range, strict=False).hosts()]
+    targets = len(hosts)
+    sockets = open_listeners(hosts[:listeners], port)
+    sockets += open_silent_hosts(hosts[listeners:listeners + silent], port)
+
+    try:
+        threaded_request = DiscoveryRequest(
+            ip_range=ip_range,
+            ports=[port],
+            max_concurrency=200,
+            timeout_seconds=timeout,
+        )
+        started = time.perf_counter()
+        threaded_hits = threaded_scan(threaded_request)
+        threaded_elapsed = time.perf_counter() - started
+
+        async_request = DiscoveryRequest(ip_range=ip_range, ports=[port], timeout_seconds=timeout)
+        started = time.perf_counter()
+        async_hits = len(asyncio.run(engine.scan(async_request)))
+        async_elapsed = time.perf_counter() - started
+
+        sharded_hits = sharded_elapsed = None
+        if sharded:
+            sharded_request = async_request.model_copy(update={"sharded": True})
+            started = time.perf_counter()
+            sharded_hits = len(asyncio.run(engine.scan(sharded_request)))
+            sharded_elapsed = time.perf_counter() - started
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    result: dict[str, object] = {
+        "targets": targets,
+        "silent_hosts": min(silent, max(targets - listeners, 0)),
+        "threaded": {
+            "hits": threaded_hits,
+            "seconds": round(threaded_elapsed, 4),
+            "probes_per_second": round(targets / threaded_elapsed, 1),
+        },
+        "asyncio": {
+            "hits": async_hits,
+            "seconds": round(async_elapsed, 4),
+            "probes_per_second": round(targets / async_elapsed, 1),
+        },
+        "speedup": round(threaded_elapsed / async_elapsed, 2),
+    }
+    if sharded_elapsed is not None:
+        result["sharded"] = {
+            "hits": sharded_hits,
+            "workers": settings.discovery_shard_workers or os.cpu_count(),
+            "seconds": round(sharded_elapsed, 4),
+            "probes_per_second": round(targets / sharded_elapsed, 1),
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ip-range", default="127.0.0.0/22")
+    parser.add_argument("--port", type=int, default=4059)
+    parser.add_argument("--listeners", type=int, default=16)
+    parser.add_argument("--silent", type=int, default=512)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--sharded", action="store_true", help="also run the sharded multi-process scan")
+    args = parser.parse_args()
+    result = run(args.ip_range, args.port, args.listeners, args.silent, args.timeout, args.sharded)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
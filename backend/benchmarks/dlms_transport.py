@@ -0,0 +1,128 @@
+"""Compare DlmsClient adapter transports against a local stub adapter.
+
+The stub is a keep-alive capable HTTP/1.1 server on loopback that answers
+``/associate`` like the external adapter. It runs in a child process so it
+does not compete with the client for the GIL, and it can add a fixed service
+latency to stand in for the adapter's own meter I/O. Three paths are timed: a bare
+``requests.post`` per call (the previous behaviour), the pooled sync session,
+and the pooled async client with concurrent calls.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import time
+
+import requests
+
+from app.services.dlms_client import DlmsClient, _association_payload
+from app.services.emulator import EmulatorRegistry, seed_registry
+
+_RESPONSE = json.dumps(
+    {"status": "success", "authentication": "LLS", "security_suite": 1, "aarq": "60", "aare": "61"}
+).encode()
+
+
+class StubAdapterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; otherwise Nagle plus delayed ACKs
+    # add ~40 ms to every keep-alive response and hide the pooling gain.
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    latency_seconds = 0.0
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(_RESPONSE)
+
+    def log_message(self, format: str, *args: object) -> None:
+        return
+
+
+def _serve(ready: multiprocessing.Queue, latency_seconds: float) -> None:
+    StubAdapterHandler.latency_seconds = latency_seconds
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAdapterHandler)
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_stub_adapter(latency_seconds: float = 0.0) -> tuple[multiprocessing.Process, str]:
+    ready: multiprocessing.Queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(ready, latency_seconds), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get(timeout=10)}"
+
+
+def run(calls: int = 1000, concurrency: int = 50, latency_ms: float = 5.0) -> dict[str, object]:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    template = registry.list_templates()[0]
+    meter = registry.create_instance(template.vendor, template.model, "127.0.0.1", 4059)
+    stub, url = start_stub_adapter(latency_ms / 1000)
+
+    try:
+        started = time.perf_counter()
+        for _ in range(calls):
+            response = requests.post(f"{url}/associate", json=_association_payload(meter), timeout=10)
+            response.raise_for_status()
+        bare_seconds = time.perf_counter() - started
+
+        client = DlmsClient(adapter_url=url)
+        started = time.perf_counter()
+        for _ in range(calls):
+            client.associate(meter)
+        pooled_seconds = time.perf_counter() - started
+        client.close()
+
+        async def concurrent() -> float:
+            async_client = DlmsClient(adapter_url=url)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one() -> None:
+                async with semaphore:
+                    await async_client.associate_async(meter)
+
+            begin = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(calls)))
+            elapsed = time.perf_counter() - begin
+            await async_client.aclose()
+            return elapsed
+
+        async_seconds = asyncio.run(concurrent())
+    finally:
+        stub.terminate()
+        stub.join()
+
+    return {
+        "calls": calls,
+        "adapter_latency_ms": latency_ms,
+        "bare_requests_per_second": round(calls / bare_seconds, 1),
+        "pooled_sync_per_second": round(calls / pooled_seconds, 1),
+        "pooled_async_per_second": round(calls / async_seconds, 1),
+        "async_concurrency": concurrency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls, args.concurrency, args.latency_ms), indent=2))
+
+
+if __name__ == "__main__":
+    main()
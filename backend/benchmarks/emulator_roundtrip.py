@@ -0,0 +1,138 @@
+"""End-to-end scan -> associate -> read benchmark against the local emulator server.
+
+Provisions a loopback fleet, serves it with ``EmulatorServer`` and then
+measures discovery throughput followed by AARQ/AARE plus one GET per
+discovered meter, under configurable latency and loss injection.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.models.core import DiscoveryRequest, EmulatorServerConfig, FleetTemplateShare
+from app.services.discovery import DiscoveryEngine
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.emulator_server import (
+    EmulatorServer,
+    build_get_request,
+    exchange,
+    open_association,
+)
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _run(
+    ip_range: str,
+    latency_ms: float,
+    jitter_ms: float,
+    loss_rate: float,
+    concurrency: int,
+    timeout: float,
+) -> dict[str, object]:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    shares = [FleetTemplateShare(vendor=t.vendor, model=t.model) for t in DEFAULT_TEMPLATES]
+    registry.provision_fleet(shares, ip_range, [4059])
+
+    server = EmulatorServer(registry)
+    await server.start(
+        EmulatorServerConfig(
+            bind_host="0.0.0.0",
+            latency_ms=latency_ms,
+            jitter_ms=jitter_ms,
+            loss_rate=loss_rate,
+        )
+    )
+    engine = DiscoveryEngine(registry, use_mongo=False)
+    try:
+        started = time.perf_counter()
+        hits = await engine.scan(DiscoveryRequest(ip_range=ip_range, ports=[4059]))
+        scan_seconds = time.perf_counter() - started
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: list[float] = []
+        failures = 0
+
+        async def associate_and_read(ip_address: str, port: int) -> None:
+            nonlocal failures
+            meter = registry.find_instance(ip_address, port)
+            template = registry.get_template(meter.vendor, meter.model)
+            async with semaphore:
+                begin = time.perf_counter()
+                try:
+                    reader, writer, _ = await open_association(
+                        ip_address, port, meter.authentication, template.referencing, timeout
+                    )
+                    try:
+                        async with asyncio.timeout(timeout):
+                            await exchange(reader, writer, build_get_request(meter.obis_objects[0].code))
+                    finally:
+                        writer.close()
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    failures += 1
+                    return
+                latencies.append(time.perf_counter() - begin)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(associate_and_read(hit.ip_address, hit.port) for hit in hits))
+        read_seconds = time.perf_counter() - started
+    finally:
+        await server.stop()
+
+    meters = registry.count_instances()
+    return {
+        "meters": meters,
+        "discovered": len(hits),
+        "scan_targets_per_second": round(meters / scan_seconds, 1),
+        "associate_read": {
+            "completed": len(latencies),
+            "failed": failures,
+            "meters_per_second": round(len(latencies) / read_seconds, 1) if read_seconds else 0.0,
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        },
+    }
+
+
+def run(
+    ip_range: str = "127.40.0.0/22",
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    loss_rate: float = 0.0,
+    concurrency: int = 500,
+    timeout: float = 2.0,
+) -> dict[str, object]:
+    return asyncio.run(_run(ip_range, latency_ms, jitter_ms, loss_rate, concurrency, timeout))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ip-range", default="127.40.0.0/22")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loss-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+    result = run(
+        args.ip_range,
+        args.latency_ms,
+        args.jitter_ms,
+        args.loss_rate,
+        args.concurrency,
+        args.timeout,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
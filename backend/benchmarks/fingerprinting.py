@@ -0,0 +1,59 @@
+"""Measure bulk fingerprinting of a provisioned fleet with and without the memo.
+
+Provisions a fleet from the default templates, then fingerprints every meter
+once with the memo disabled (``cache_size=0``) and once with it enabled.
+Reports fingerprints per second and the memo's hit ratio.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from app.models.core import FleetTemplateShare
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.fingerprinting import FingerprintingEngine
+
+
+def _fingerprint_all(engine: FingerprintingEngine, registry: EmulatorRegistry) -> float:
+    started = time.perf_counter()
+    for meter in registry.list_instances():
+        engine.build_fingerprint(meter)
+    return time.perf_counter() - started
+
+
+def run(ip_range: str = "10.0.0.0/18", ports: tuple[int, ...] = (4059,)) -> dict[str, object]:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    shares = [
+        FleetTemplateShare(vendor=template.vendor, model=template.model)
+        for template in DEFAULT_TEMPLATES
+    ]
+    meters = registry.provision_fleet(shares, ip_range, list(ports)).created
+
+    uncached_seconds = _fingerprint_all(FingerprintingEngine(cache_size=0), registry)
+    engine = FingerprintingEngine()
+    registry.add_template_listener(engine.invalidate_template)
+    cached_seconds = _fingerprint_all(engine, registry)
+    return {
+        "meters": meters,
+        "uncached": {"fingerprints_per_second": round(meters / uncached_seconds, 1)},
+        "memoized": {
+            "fingerprints_per_second": round(meters / cached_seconds, 1),
+            "cache": engine.cache_stats().model_dump(),
+        },
+        "speedup": round(uncached_seconds / cached_seconds, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ip-range", default="10.0.0.0/18")
+    parser.add_argument("--ports", type=int, nargs="+", default=[4059])
+    args = parser.parse_args()
+    print(json.dumps(run(args.ip_range, tuple(args.ports)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Measure bytes per meter of the registry and bytes per discovery hit.
+
+The legacy registry is the previous layout: one ``MeterInstance`` per meter
+(sharing its template's ``obis_objects`` list) in three dict indexes, keyed
+by string UUIDs and string IPs. The current registry stores rows in flat
+columns. For discovery, a list of ``DiscoveryResult`` models, as scans used
+to keep per scan, is compared with the ``ResultRecord`` list they keep now.
+Memory is traced with tracemalloc after a full collection.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+import gc
+import json
+import time
+import tracemalloc
+from uuid import uuid4
+
+from app.models.core import DiscoveryResult, FleetTemplateShare, MeterInstance
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.records import ResultRecord, pack_ipv4
+from app.services.targets import iter_targets
+
+
+def _traced(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    keep = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return keep, current
+
+
+def _prefix(meters: int) -> int:
+    return 32 - (meters + 1).bit_length()
+
+
+def run(meters: int = 200_000) -> dict[str, object]:
+    ip_range = f"10.0.0.0/{_prefix(meters)}"
+    shares = [FleetTemplateShare(vendor=t.vendor, model=t.model) for t in DEFAULT_TEMPLATES]
+
+    def legacy_registry() -> tuple[dict, dict, dict]:
+        instances: dict[str, MeterInstance] = {}
+        by_address: dict[tuple[str, int], MeterInstance] = {}
+        by_model: dict[tuple[str, str], dict[str, MeterInstance]] = {}
+        for index, (ip_address, port) in enumerate(iter_targets(ip_range, [4059])):
+            if index == meters:
+                break
+            template = DEFAULT_TEMPLATES[index % len(DEFAULT_TEMPLATES)]
+            instance = MeterInstance.model_construct(
+                meter_id=str(uuid4()),
+                vendor=template.vendor,
+                model=template.model,
+                ip_address=ip_address,
+                port=port,
+                authentication=template.authentication_modes[0],
+                security_suite=template.security_suites[0],
+                obis_objects=template.obis_objects,
+            )
+            instances[instance.meter_id] = instance
+            by_address[(ip_address, port)] = instance
+            by_model.setdefault((instance.vendor, instance.model), {})[instance.meter_id] = instance
+        return instances, by_address, by_model
+
+    def columnar_registry() -> EmulatorRegistry:
+        registry = EmulatorRegistry()
+        seed_registry(registry)
+        registry.provision_fleet(shares, ip_range, [4059])
+        return registry
+
+    legacy, legacy_bytes = _traced(legacy_registry)
+    legacy_count = len(legacy[0])
+    del legacy
+    registry, registry_bytes = _traced(columnar_registry)
+    registry_count = registry.count_instances()
+
+    addresses = list(registry.iter_addresses())[:meters]
+
+    def result_models() -> list[DiscoveryResult]:
+        results = []
+        for ip_address, port in addresses:
+            instance = registry.find_instance(ip_address, port)
+            results.append(
+                DiscoveryResult(
+                    meter_id=instance.meter_id,
+                    ip_address=instance.ip_address,
+                    port=instance.port,
+                    discovered_at=datetime.utcnow(),
+                    vendor=instance.vendor,
+                    model=instance.model,
+                    authentication=instance.authentication,
+                    security_suite=instance.security_suite,
+                )
+            )
+        return results
+
+    def result_records() -> list[ResultRecord]:
+        records = []
+        for ip_address, port in addresses:
+            meter_id, device = registry.find_device(ip_address, port)
+            records.append(ResultRecord(meter_id, pack_ipv4(ip_address), port, time.time(), device))
+        return records
+
+    models, model_bytes = _traced(result_models)
+    del models
+    records, record_bytes = _traced(result_records)
+    del records
+
+    return {
+        "meters": registry_count,
+        "registry": {
+            "legacy_bytes_per_meter": round(legacy_bytes / legacy_count, 1),
+            "columnar_bytes_per_meter": round(registry_bytes / registry_count, 1),
+            "ratio": round((legacy_bytes / legacy_count) / (registry_bytes / registry_count), 2),
+        },
+        "discovery_results": {
+            "model_bytes_per_hit": round(model_bytes / len(addresses), 1),
+            "record_bytes_per_hit": round(record_bytes / len(addresses), 1),
+            "ratio": round(model_bytes / record_bytes, 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meters", type=int, default=200_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.meters), indent=2))
+
+
+if __name__ == "__main__":
+    main()
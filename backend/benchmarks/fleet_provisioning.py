@@ -0,0 +1,100 @@
+"""Measure fleet provisioning rate and memory per emulated meter.
+
+Compares ``EmulatorRegistry.provision_fleet`` (column-wise rows sharing
+interned template data) with a per-meter loop that builds a validated
+``MeterInstance`` for every meter, so each one carries its own copy of the
+``obis_objects`` list, indexed the way the registry used to index them.
+Rates are timed without tracemalloc; memory is measured in a second, traced
+run. ``benchmarks.fleet_memory`` breaks the memory down further.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from uuid import uuid4
+
+from app.models.core import FleetTemplateShare, MeterInstance
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.targets import count_targets, iter_targets
+
+
+def _measure(build) -> tuple[float, int]:
+    gc.collect()
+    started = time.perf_counter()
+    keep = build()
+    elapsed = time.perf_counter() - started
+    del keep
+
+    gc.collect()
+    tracemalloc.start()
+    keep = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return elapsed, current
+
+
+def run(ip_range: str = "10.0.0.0/16", ports: tuple[int, ...] = (4059,)) -> dict[str, object]:
+    meters = count_targets(ip_range, list(ports))
+    shares = [
+        FleetTemplateShare(vendor=template.vendor, model=template.model)
+        for template in DEFAULT_TEMPLATES
+    ]
+
+    def per_meter() -> tuple[dict, dict, dict]:
+        # Mirrors the validated, copy-per-instance path used before bulk provisioning.
+        instances: dict[str, MeterInstance] = {}
+        by_address: dict[tuple[str, int], MeterInstance] = {}
+        by_model: dict[tuple[str, str], dict[str, MeterInstance]] = {}
+        for index, (ip_address, port) in enumerate(iter_targets(ip_range, list(ports))):
+            template = DEFAULT_TEMPLATES[index % len(DEFAULT_TEMPLATES)]
+            instance = MeterInstance(
+                meter_id=str(uuid4()),
+                vendor=template.vendor,
+                model=template.model,
+                ip_address=ip_address,
+                port=port,
+                authentication=template.authentication_modes[0],
+                security_suite=template.security_suites[0],
+                obis_objects=template.obis_objects,
+            )
+            instances[instance.meter_id] = instance
+            by_address[(ip_address, port)] = instance
+            by_model.setdefault((instance.vendor, instance.model), {})[instance.meter_id] = instance
+        return instances, by_address, by_model
+
+    def bulk() -> EmulatorRegistry:
+        registry = EmulatorRegistry()
+        seed_registry(registry)
+        registry.provision_fleet(shares, ip_range, list(ports))
+        return registry
+
+    legacy_seconds, legacy_bytes = _measure(per_meter)
+    bulk_seconds, bulk_bytes = _measure(bulk)
+    return {
+        "meters": meters,
+        "validated_per_meter": {
+            "meters_per_second": round(meters / legacy_seconds, 1),
+            "bytes_per_meter": round(legacy_bytes / meters, 1),
+        },
+        "provision_fleet": {
+            "meters_per_second": round(meters / bulk_seconds, 1),
+            "bytes_per_meter": round(bulk_bytes / meters, 1),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ip-range", default="10.0.0.0/16")
+    parser.add_argument("--ports", type=int, nargs="+", default=[4059])
+    args = parser.parse_args()
+    print(json.dumps(run(args.ip_range, tuple(args.ports)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
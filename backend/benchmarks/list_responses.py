@@ -0,0 +1,93 @@
+"""Measure the server-side cost of one poll of GET /emulators/instances.
+
+``fastapi`` is the previous path: FastAPI validates the returned models
+against ``response_model``, runs ``jsonable_encoder`` and encodes with the
+standard library. ``dump_json`` serializes the models directly with
+pydantic-core, as every list route does now when its data has changed;
+both include building the ``MeterInstance`` models from the registry.
+``cached`` is a poll while the registry version is unchanged (body served
+from ``BodyCache``), and ``not_modified`` one whose ``If-None-Match``
+matches, which only computes the ETag.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+from app.models.core import FleetTemplateShare, MeterInstance
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.responses import BodyCache, versioned_json
+
+
+def _request(headers: dict[str, str]) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/emulators/instances", "headers": raw})
+
+
+def _per_poll_ms(poll, polls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(polls):
+        poll()
+    return round((time.perf_counter() - started) / polls * 1000, 3)
+
+
+def run(meters: int = 20_000, polls: int = 20) -> dict[str, object]:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    shares = [FleetTemplateShare(vendor=t.vendor, model=t.model) for t in DEFAULT_TEMPLATES]
+    registry.provision_fleet(shares, f"10.0.0.0/{32 - (meters + 1).bit_length()}", [4059])
+    field = create_model_field(name="Response_list_instances", type_=list[MeterInstance], mode="serialization")
+    adapter = TypeAdapter(list[MeterInstance])
+    cache = BodyCache()
+
+    def fastapi_poll() -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=registry.list_instances()))
+        return JSONResponse(content).body
+
+    def dump_json_poll() -> bytes:
+        return adapter.dump_json(registry.list_instances())
+
+    def cached_poll() -> bytes:
+        return versioned_json(_request({}), cache, ("instances",), registry.instances_version, dump_json_poll).body
+
+    cached_poll()  # fill the cache
+    etag = cache.etag(("instances",), registry.instances_version)
+    conditional = _request({"If-None-Match": etag})
+
+    def not_modified_poll() -> int:
+        return versioned_json(conditional, cache, ("instances",), registry.instances_version, dump_json_poll).status_code
+
+    results = {
+        "fastapi_ms": _per_poll_ms(fastapi_poll, max(polls // 4, 1)),
+        "dump_json_ms": _per_poll_ms(dump_json_poll, polls),
+        "cached_ms": _per_poll_ms(cached_poll, polls),
+        "not_modified_ms": _per_poll_ms(not_modified_poll, polls),
+    }
+    assert json.loads(fastapi_poll()) == json.loads(dump_json_poll())
+    return {
+        "meters": registry.count_instances(),
+        "body_bytes": len(dump_json_poll()),
+        **results,
+        "dump_json_speedup": round(results["fastapi_ms"] / results["dump_json_ms"], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meters", type=int, default=20_000)
+    parser.add_argument("--polls", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.meters, args.polls), indent=2))
+
+
+if __name__ == "__main__":
+    main()
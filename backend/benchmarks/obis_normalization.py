@@ -0,0 +1,97 @@
+"""Compare string-based OBIS normalization with the compiled rule table.
+
+Builds ``--models`` meter models, each with a random subset of a few thousand
+distinct codes (channels, tariffs and historical values across the common
+energy, voltage and current quantities). ``--meters`` instances are spread
+over those models and share their model's object list, as provisioned
+fleets do. The legacy path is the original per-meter dict lookup with
+chained ``str.replace``; it only knows the four exact codes. The compiled
+path is ``ObisNormalizer.normalize_many`` with wildcard rules.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+import json
+import random
+import time
+from uuid import uuid4
+
+from app.models.core import MeterInstance, ObisNormalizationResult, ObisObject
+from app.services.obis import DEFAULT_NORMALIZATION, DEFAULT_RULE_TABLE, ObisNormalizer, parse_obis
+
+QUANTITIES = ["1.8", "2.8", "32.7", "52.7", "72.7", "31.7", "51.7", "71.7"]
+
+
+def _codes(rng: random.Random, count: int) -> list[str]:
+    codes: set[str] = set()
+    while len(codes) < count:
+        c, d = rng.choice(QUANTITIES).split(".")
+        codes.add(f"1-{rng.randint(0, 64)}:{c}.{d}.{rng.randint(0, 8)}")
+    return sorted(codes)
+
+
+def _legacy(meter: MeterInstance) -> ObisNormalizationResult:
+    normalized = {
+        obj.code: DEFAULT_NORMALIZATION.get(obj.code, obj.code.replace(".", "_").replace(":", "_"))
+        for obj in meter.obis_objects
+    }
+    return ObisNormalizationResult(meter_id=meter.meter_id, normalized=normalized, created_at=datetime.utcnow())
+
+
+def run(meters: int = 20_000, models: int = 200, codes_per_model: int = 40, seed: int = 11) -> dict[str, object]:
+    rng = random.Random(seed)
+    pool = _codes(rng, 4000)
+    object_lists = [
+        [ObisObject(code=code, description=code, data_type="double") for code in rng.sample(pool, codes_per_model)]
+        for _ in range(models)
+    ]
+    fleet = [
+        MeterInstance.model_construct(
+            meter_id=str(uuid4()),
+            vendor="Bench",
+            model=f"M{index % models}",
+            ip_address="10.0.0.1",
+            port=4059,
+            authentication="LLS",
+            security_suite=1,
+            obis_objects=object_lists[index % models],
+        )
+        for index in range(meters)
+    ]
+
+    started = time.perf_counter()
+    for meter in fleet:
+        _legacy(meter)
+    legacy_seconds = time.perf_counter() - started
+
+    normalizer = ObisNormalizer()
+    started = time.perf_counter()
+    normalizer.normalize_many(fleet)
+    compiled_seconds = time.perf_counter() - started
+
+    distinct = {obj.code for objects in object_lists for obj in objects}
+    matched = sum(1 for code in distinct if DEFAULT_RULE_TABLE.lookup(parse_obis(code)) is not None)
+    return {
+        "meters": meters,
+        "distinct_codes": len(distinct),
+        "codes_matched_by_rules": matched,
+        "legacy": {"meters_per_second": round(meters / legacy_seconds, 1)},
+        "compiled": {"meters_per_second": round(meters / compiled_seconds, 1)},
+        "speedup": round(legacy_seconds / compiled_seconds, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meters", type=int, default=20_000)
+    parser.add_argument("--models", type=int, default=200)
+    parser.add_argument("--codes-per-model", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    print(json.dumps(run(args.meters, args.models, args.codes_per_model, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
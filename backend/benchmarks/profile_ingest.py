@@ -0,0 +1,104 @@
+"""Compare per-profile inserts with batched ingest into ``meter_profile_refs``.
+
+The per-row path is ``ProfileRepository.store``, one transaction per profile,
+as ``POST /profiles/{meter_id}`` does. The batched path is
+``ProfileRepository.ingest`` in requests of ``--request-size`` profiles, as
+``POST /profiles/batch`` does; a rejected request is retried after a short
+pause, like a client honouring ``Retry-After``. The timer stops once the
+write buffer has drained. Runs against a throwaway SQLite file by default;
+pass ``--dsn`` to measure a scratch Postgres database (its tables are
+dropped first).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.models.core import FleetTemplateShare
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.profiles import ProfileGenerator, ProfileRepository
+
+
+def _reset(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS meter_profile_refs"))
+        conn.execute(text("DROP TABLE IF EXISTS obis_maps"))
+
+
+def run(
+    meters: int = 20_000,
+    request_size: int = 500,
+    batch_size: int | None = None,
+    queue_size: int | None = None,
+    dsn: str | None = None,
+) -> dict[str, object]:
+    if batch_size is not None:
+        settings.profile_ingest_batch_size = batch_size
+    if queue_size is not None:
+        settings.profile_ingest_queue_size = queue_size
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    shares = [FleetTemplateShare(vendor=t.vendor, model=t.model) for t in DEFAULT_TEMPLATES]
+    registry.provision_fleet(shares, f"10.0.0.0/{32 - (meters + 1).bit_length()}", [4059])
+    generator = ProfileGenerator()
+    profiles = [generator.build_profile(meter) for meter in registry.list_instances()[:meters]]
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(dsn or f"sqlite:///{os.path.join(directory, 'profiles.db')}", future=True)
+
+        _reset(engine)
+        repository = ProfileRepository(engine=engine)
+        started = time.perf_counter()
+        for profile in profiles:
+            repository.store(profile)
+        per_row_seconds = time.perf_counter() - started
+
+        _reset(engine)
+        repository = ProfileRepository(engine=engine)
+        retries = 0
+        started = time.perf_counter()
+        for offset in range(0, len(profiles), request_size):
+            while not repository.ingest(profiles[offset : offset + request_size]):
+                retries += 1
+                time.sleep(0.01)
+        repository.close()
+        batched_seconds = time.perf_counter() - started
+        stats = repository.ingest_stats()
+        with engine.connect() as conn:
+            ref_rows = conn.execute(text("SELECT COUNT(*) FROM meter_profile_refs")).scalar_one()
+        engine.dispose()
+
+    return {
+        "profiles": len(profiles),
+        "per_row": {"rows_per_second": round(len(profiles) / per_row_seconds, 1)},
+        "batched": {
+            "rows_per_second": round(len(profiles) / batched_seconds, 1),
+            "flush_rows_per_second": stats["rows_per_second"],
+            "batches": stats["batches"],
+            "rejected_requests": retries,
+            "ref_rows": ref_rows,
+        },
+        "speedup": round(per_row_seconds / batched_seconds, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meters", type=int, default=20_000)
+    parser.add_argument("--request-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=None, help="override PROFILE_INGEST_BATCH_SIZE")
+    parser.add_argument("--queue-size", type=int, default=None, help="override PROFILE_INGEST_QUEUE_SIZE")
+    parser.add_argument("--dsn", default=None, help="SQLAlchemy DSN of a scratch database")
+    args = parser.parse_args()
+    print(json.dumps(run(args.meters, args.request_size, args.batch_size, args.queue_size, args.dsn), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Compare profile storage size and insert rate: per-row JSON vs content-addressed maps.
+
+Meter models are padded to ``--objects`` OBIS objects each. The legacy schema is the original ``meter_profiles`` table with the full
+``obis_map`` JSON on every row. The current schema is ``ProfileRepository``:
+each distinct map stored once in ``obis_maps`` plus one ``meter_profile_refs``
+row per profile. Both insert one profile per transaction, as the API does.
+
+Runs against a throwaway SQLite file by default; pass ``--dsn`` to measure
+against a scratch Postgres database instead (its tables are dropped first).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import JSON, Column, DateTime, Index, MetaData, String, Table, create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.models.core import FleetTemplateShare, ObisObject
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry
+from app.services.profiles import ProfileGenerator, ProfileRepository
+
+
+def _legacy_table(engine: Engine) -> Table:
+    metadata = MetaData()
+    table = Table(
+        "bench_meter_profiles",
+        metadata,
+        Column("profile_id", String, primary_key=True),
+        Column("meter_id", String, nullable=False),
+        Column("vendor", String, nullable=False),
+        Column("model", String, nullable=False),
+        Column("obis_map", JSON, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Index("ix_bench_meter_profiles_created_at", "created_at", "profile_id"),
+        Index("ix_bench_meter_profiles_meter_id", "meter_id", "created_at"),
+        Index("ix_bench_meter_profiles_vendor", "vendor", "created_at"),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    return table
+
+
+def _table_bytes(engine: Engine, tables: list[str]) -> int:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            return sum(
+                conn.execute(text("SELECT pg_total_relation_size(:name)"), {"name": name}).scalar_one()
+                for name in tables
+            )
+        # Table plus its indexes, from SQLite's dbstat virtual table.
+        statement = text(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = :name)"
+        )
+        return sum(conn.execute(statement, {"name": name}).scalar() or 0 for name in tables)
+
+
+def run(meters: int = 5_000, objects: int = 40, dsn: str | None = None) -> dict[str, object]:
+    registry = EmulatorRegistry()
+    for template in DEFAULT_TEMPLATES:
+        # Pad each model to a realistic object count (profiles, registers, clocks).
+        extra = [
+            ObisObject(code=f"1-{channel}:99.{index % 10}.{index // 10}", description=f"Register {channel}/{index}", data_type="double")
+            for channel, index in ((position % 4, position) for position in range(max(objects - len(template.obis_objects), 0)))
+        ]
+        registry.register_template(template.model_copy(update={"obis_objects": template.obis_objects + extra}))
+    shares = [FleetTemplateShare(vendor=t.vendor, model=t.model) for t in DEFAULT_TEMPLATES]
+    registry.provision_fleet(shares, f"10.0.0.0/{32 - (meters + 1).bit_length()}", [4059])
+    fleet = registry.list_instances()[:meters]
+    generator = ProfileGenerator()
+    profiles = [generator.build_profile(meter) for meter in fleet]
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(dsn or f"sqlite:///{os.path.join(directory, 'profiles.db')}", future=True)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS meter_profile_refs"))
+            conn.execute(text("DROP TABLE IF EXISTS obis_maps"))
+
+        legacy = _legacy_table(engine)
+        started = time.perf_counter()
+        for profile in profiles:
+            with engine.begin() as conn:
+                conn.execute(legacy.insert().values(**profile.model_dump(exclude={"map_hash"})))
+        legacy_seconds = time.perf_counter() - started
+
+        repository = ProfileRepository(engine=engine)
+        started = time.perf_counter()
+        for profile in profiles:
+            repository.store(profile)
+        deduped_seconds = time.perf_counter() - started
+
+        rebuilt = ProfileRepository(engine=engine)
+        for profile in profiles[:100]:
+            rebuilt.store(generator.build_profile(registry.get_instance(profile.meter_id)))
+        with engine.connect() as conn:
+            ref_rows = conn.execute(text("SELECT COUNT(*) FROM meter_profile_refs")).scalar_one()
+            map_rows = conn.execute(text("SELECT COUNT(*) FROM obis_maps")).scalar_one()
+
+        legacy_bytes = _table_bytes(engine, ["bench_meter_profiles"])
+        deduped_bytes = _table_bytes(engine, ["obis_maps", "meter_profile_refs"])
+        engine.dispose()
+
+    return {
+        "profiles": len(profiles),
+        "legacy": {
+            "inserts_per_second": round(len(profiles) / legacy_seconds, 1),
+            "bytes": legacy_bytes,
+        },
+        "content_addressed": {
+            "inserts_per_second": round(len(profiles) / deduped_seconds, 1),
+            "bytes": deduped_bytes,
+            "ref_rows": ref_rows,
+            "map_rows": map_rows,
+        },
+        "storage_ratio": round(legacy_bytes / deduped_bytes, 2) if deduped_bytes else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meters", type=int, default=5_000)
+    parser.add_argument("--objects", type=int, default=40, help="OBIS objects per meter model")
+    parser.add_argument("--dsn", default=None, help="SQLAlchemy DSN of a scratch database")
+    args = parser.parse_args()
+    print(json.dumps(run(args.meters, args.objects, args.dsn), indent=2))
+
+
+if __name__ == "__main__":
+    main()
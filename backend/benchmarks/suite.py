@@ -0,0 +1,275 @@
+"""Benchmark suite for the core service paths, with JSON baselines.
+
+Every case runs offline, whatever MongoDB or PostgreSQL is configured.
+Discovery sweeps loopback ranges in which a few addresses have listeners
+and the rest refuse the connection, with its logs, results and
+reachability cache in memory. The registry, fingerprinting and OBIS cases
+are in memory. Profiles go to an in-memory SQLite database. Each case runs
+``--repeat`` times and reports the median rate in operations per second,
+with the spread ((max - min) / median) of the runs.
+
+    python -m benchmarks.suite --save benchmarks/baselines/local.json
+    python -m benchmarks.suite --compare benchmarks/baselines/local.json
+    python -m benchmarks.suite --case 'discovery.*' --case 'registry.find_instance[n=1000]'
+
+``--case`` takes an exact case name or a glob, and may be repeated.
+``--compare`` flags every case whose median rate fell against the baseline
+by more than ``--threshold`` (default 20%), or by more than the larger
+spread of the two runs when that is wider, so noisy cases are not
+flagged on noise alone. It exits with status 1 if any case was flagged.
+Baselines are only comparable on the same machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from fnmatch import fnmatchcase
+import json
+import os
+from pathlib import Path
+import platform
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.core import DiscoveryRequest, FleetTemplateShare
+from app.services.discovery import DiscoveryEngine
+from app.services.emulator import DEFAULT_TEMPLATES, EmulatorRegistry, seed_registry
+from app.services.fingerprinting import FingerprintingEngine
+from app.services.obis import ObisNormalizer
+from app.services.pagination import PageQuery
+from app.services.profiles import ProfileGenerator, ProfileRepository
+from benchmarks.discovery_scan import open_listeners
+
+# (prefix length, max_concurrency) of the discovery cases.
+SCAN_SHAPES = [(26, 64), (24, 64), (24, 512), (22, 512)]
+REGISTRY_SIZES = [1_000, 100_000]
+LOOKUPS = 50_000
+SCAN_PORT = 47_059
+
+
+def _fleet(meters: int) -> EmulatorRegistry:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    shares = [FleetTemplateShare(vendor=t.vendor, model=t.model) for t in DEFAULT_TEMPLATES]
+    registry.provision_fleet(shares, f"10.0.0.0/{32 - (meters + 1).bit_length()}", [4059])
+    return registry
+
+
+def scan_case(prefix: int, concurrency: int) -> Callable[[], tuple[int, float]]:
+    def case() -> tuple[int, float]:
+        listeners = open_listeners([f"127.77.0.{host}" for host in range(1, 9)], SCAN_PORT)
+        try:
+            engine = DiscoveryEngine(EmulatorRegistry(), use_mongo=False)
+            request = DiscoveryRequest(
+                ip_range=f"127.77.0.0/{prefix}",
+                ports=[SCAN_PORT],
+                max_concurrency=concurrency,
+                timeout_seconds=0.5,
+            )
+            started = time.perf_counter()
+            asyncio.run(engine.scan(request))
+            return 2 ** (32 - prefix) - 2, time.perf_counter() - started
+        finally:
+            for sock in listeners:
+                sock.close()
+
+    return case
+
+
+def find_instance_case(meters: int) -> Callable[[], tuple[int, float]]:
+    registry = _fleet(meters)
+    addresses = list(registry.iter_addresses())
+    sample = [random.Random(meters).choice(addresses) for _ in range(LOOKUPS)]
+
+    def case() -> tuple[int, float]:
+        started = time.perf_counter()
+        for ip_address, port in sample:
+            registry.find_instance(ip_address, port)
+        return len(sample), time.perf_counter() - started
+
+    return case
+
+
+def fingerprint_case(cache_size: int | None) -> Callable[[], tuple[int, float]]:
+    meters = _fleet(20_000).list_instances()
+
+    def case() -> tuple[int, float]:
+        engine = FingerprintingEngine(cache_size=cache_size)
+        started = time.perf_counter()
+        for meter in meters:
+            engine.build_fingerprint(meter)
+        return len(meters), time.perf_counter() - started
+
+    return case
+
+
+def normalize_case() -> Callable[[], tuple[int, float]]:
+    meters = _fleet(20_000).list_instances()
+    normalizer = ObisNormalizer()
+
+    def case() -> tuple[int, float]:
+        started = time.perf_counter()
+        for meter in meters:
+            normalizer.normalize(meter)
+        return len(meters), time.perf_counter() - started
+
+    return case
+
+
+def _sqlite() -> Engine:
+    # One shared connection, so every session sees the same in-memory database.
+    return create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}, future=True)
+
+
+def profile_cases() -> dict[str, Callable[[], tuple[int, float]]]:
+    generator = ProfileGenerator()
+    profiles = [generator.build_profile(meter) for meter in _fleet(2_000).list_instances()]
+
+    def store() -> tuple[int, float]:
+        repository = ProfileRepository(engine=_sqlite())
+        started = time.perf_counter()
+        for profile in profiles:
+            repository.store(profile)
+        return len(profiles), time.perf_counter() - started
+
+    def list_pages() -> tuple[int, float]:
+        repository = ProfileRepository(engine=_sqlite())
+        for profile in profiles:
+            repository.store(profile)
+        pages = 0
+        started = time.perf_counter()
+        for _ in range(20):
+            cursor = None
+            while True:
+                page = repository.list(PageQuery(limit=100, cursor=cursor))
+                pages += 1
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+        return pages, time.perf_counter() - started
+
+    return {"profiles.store": store, "profiles.list[limit=100]": list_pages}
+
+
+def cases(selected: list[str] | None = None) -> dict[str, Callable[[], Callable[[], tuple[int, float]]]]:
+    """Case name -> factory; factories do the setup and return the timed callable."""
+    factories: dict[str, Callable[[], Callable[[], tuple[int, float]]]] = {}
+    for prefix, concurrency in SCAN_SHAPES:
+        factories[f"discovery.scan[/{prefix},concurrency={concurrency}]"] = (
+            lambda prefix=prefix, concurrency=concurrency: scan_case(prefix, concurrency)
+        )
+    for meters in REGISTRY_SIZES:
+        factories[f"registry.find_instance[n={meters}]"] = lambda meters=meters: find_instance_case(meters)
+    factories["fingerprint.build_fingerprint[memoized]"] = lambda: fingerprint_case(None)
+    factories["fingerprint.build_fingerprint[uncached]"] = lambda: fingerprint_case(0)
+    factories["obis.normalize"] = normalize_case
+    for name in ("profiles.store", "profiles.list[limit=100]"):
+        factories[name] = lambda name=name: profile_cases()[name]
+    if selected:
+        factories = {name: factory for name, factory in factories.items() if _selected(name, selected)}
+    return factories
+
+
+def _selected(name: str, patterns: list[str]) -> bool:
+    # Names contain brackets, which fnmatch reads as a character class, so exact names are checked first.
+    return any(name == pattern or fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def run(repeat: int = 5, selected: list[str] | None = None) -> dict[str, object]:
+    results: dict[str, dict[str, float]] = {}
+    for name, factory in cases(selected).items():
+        case = factory()
+        rates = []
+        for _ in range(repeat):
+            operations, seconds = case()
+            rates.append(operations / seconds if seconds else 0.0)
+        median = statistics.median(rates)
+        results[name] = {
+            "ops_per_second": round(median, 1),
+            "min": round(min(rates), 1),
+            "max": round(max(rates), 1),
+            "spread": _spread(min(rates), max(rates), median),
+        }
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "cases": results,
+    }
+
+
+def _spread(low: float, high: float, median: float) -> float:
+    return round((high - low) / median, 3) if median else 0.0
+
+
+def compare(current: dict[str, object], baseline: dict[str, object], threshold: float) -> dict[str, object]:
+    """Median rate change of every case present in both runs.
+
+    A case regressed when it got slower by more than ``threshold`` and by
+    more than the spread of either run, whichever allows more.
+    """
+    report: dict[str, dict[str, object]] = {}
+    for name, result in current["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None or not reference["ops_per_second"]:
+            continue
+        change = result["ops_per_second"] / reference["ops_per_second"] - 1
+        noise = max(
+            _spread(entry["min"], entry["max"], entry["ops_per_second"]) for entry in (reference, result)
+        )
+        allowed = max(threshold, noise)
+        report[name] = {
+            "baseline": reference["ops_per_second"],
+            "current": result["ops_per_second"],
+            "change": round(change, 3),
+            "allowed": round(allowed, 3),
+            "regression": change < -allowed,
+        }
+    regressions = sorted(name for name, entry in report.items() if entry["regression"])
+    return {"threshold": threshold, "cases": report, "regressions": regressions}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--case",
+        action="append",
+        dest="cases",
+        help="run only this case; an exact name or a glob such as 'discovery.*', may be repeated",
+    )
+    parser.add_argument("--save", type=Path, default=None, help="write the results as a baseline")
+    parser.add_argument("--compare", type=Path, default=None, help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging, 0.2 = 20%%")
+    args = parser.parse_args()
+    unmatched = [pattern for pattern in args.cases or [] if not cases([pattern])]
+    if unmatched:
+        parser.error(f"no case matches {', '.join(unmatched)}; cases are: {', '.join(cases())}")
+
+    results = run(args.repeat, args.cases)
+    if args.save is not None:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare is None:
+        print(json.dumps(results, indent=2))
+        return
+    report = compare(results, json.loads(args.compare.read_text()), args.threshold)
+    print(json.dumps(report, indent=2))
+    if report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+from app.config import settings
+from app.models.core import DiscoveryRequest, ScanStats
+from app.services import discovery
+from app.services.discovery import DiscoveryEngine, sweep
+from app.services.emulator import EmulatorRegistry
+from app.services.reachability import ReachabilityCache, plan_targets
+from app.services.rtt import SubnetRttEstimator, retry_delay
+from app.services.sharding import CheckpointStore, LocalWorkQueue, write_json
+from app.services.targets import iter_targets
+
+
+def test_known_alive_targets_are_probed_first_and_dead_ones_back_off() -> None:
+    cache = ReachabilityCache(use_mongo=False)
+    now = time.time()
+    cache.record("10.0.0.3", 4059, True, now=now)
+    cache.record("10.0.0.1", 4059, False, now=now)
+    for _ in range(3):
+        cache.record("10.0.0.2", 4059, False, now=now)
+
+    planned = list(plan_targets(cache, iter_targets("10.0.0.0/29", [4059]), "10.0.0.0/29", [4059], ttl=60))
+    assert planned[0] == ("10.0.0.3", 4059, None)
+    assert ("10.0.0.1", 4059, False) in planned
+    assert [target for target in planned if target[:2] == ("10.0.0.3", 4059)] == [("10.0.0.3", 4059, None)]
+
+    # One miss is trusted for one TTL; three misses back off for four.
+    assert cache.cached_state("10.0.0.1", 4059, 60, now + 61) is None
+    assert cache.cached_state("10.0.0.2", 4059, 60, now + 200) is False
+    assert cache.cached_state("10.0.0.2", 4059, 60, now + 241) is None
+    assert cache.cached_state("10.0.0.3", 4059, 60, now + 1) is None
+
+
+def test_rtt_timeouts_are_clamped_and_doubled_per_retry() -> None:
+    rtt = SubnetRttEstimator(min_timeout=0.02, max_timeout=1.0)
+    subnet = rtt.subnet("10.0.0.7")
+    assert subnet == "10.0.0.0/24"
+    assert rtt.timeout(subnet, 0.5) == 0.5
+
+    rtt.observe(subnet, 0.001)
+    assert rtt.timeout(subnet, 0.5) == 0.02
+    rtt.observe(subnet, 0.1)
+    first = rtt.timeout(subnet, 0.5)
+    assert rtt.backoff_timeout(subnet, 0.5, 1) == pytest.approx(min(first * 2, 1.0))
+    assert rtt.backoff_timeout(subnet, 0.5, 10) == 1.0
+
+
+def test_retry_delay_is_jittered_and_capped() -> None:
+    random.seed(1)
+    delays = [retry_delay(attempt, 0.1, 0.3) for attempt in (1, 2, 3, 4) for _ in range(50)]
+    assert all(0 <= delay <= 0.3 for delay in delays)
+    assert max(delays[:50]) <= 0.1
+    assert len(set(delays)) > 1
+
+
+def test_lost_probes_are_retried_with_longer_timeouts(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "discovery_retry_backoff_seconds", 0.001)
+    calls: list[tuple[str, float]] = []
+
+    async def fake_connect(ip_address: str, port: int, timeout: float) -> tuple[str, float]:
+        calls.append((ip_address, timeout))
+        if ip_address == "10.0.0.1" and len([c for c in calls if c[0] == ip_address]) == 1:
+            return discovery._TIMEOUT, timeout
+        if ip_address == "10.0.0.1":
+            return discovery._OPEN, 0.01
+        return discovery._REFUSED, 0.01
+
+    monkeypatch.setattr(discovery, "_connect", fake_connect)
+    request = DiscoveryRequest(ip_range="10.0.0.0/23", timeout_seconds=0.1, retries=3)
+    stats = ScanStats()
+    outcomes: dict[tuple[str, int], bool] = {}
+
+    async def run() -> list[tuple[str, int]]:
+        # Different /24s, so the refused connect does not adapt the other target's timeout.
+        planned = iter([("10.0.0.1", 4059, None), ("10.0.1.1", 4059, None)])
+        rtt = SubnetRttEstimator(0.02, 3.0)
+        return [target async for target in sweep(planned, request, stats, rtt, 2, record)]
+
+    def record(ip_address: str, port: int, alive: bool) -> None:
+        outcomes[(ip_address, port)] = alive
+
+    assert asyncio.run(run()) == [("10.0.0.1", 4059)]
+    first, retry = [timeout for ip, timeout in calls if ip == "10.0.0.1"]
+    assert retry == pytest.approx(first * 2)
+    assert stats.retries == 1
+    assert stats.timeouts == 1
+    assert stats.completed == 2
+    assert outcomes == {("10.0.0.1", 4059): True, ("10.0.1.1", 4059): False}
+
+
+class RecordingQueue(LocalWorkQueue):
+    put_indexes: list[int] = []
+
+    def put(self, task) -> None:
+        RecordingQueue.put_indexes.append(task.index)
+        super().put(task)
+
+
+def test_resume_replays_finished_shards_and_probes_the_rest(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr(settings, "discovery_checkpoint_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "discovery_shard_workers", 1)
+    RecordingQueue.put_indexes = []
+    engine = DiscoveryEngine(EmulatorRegistry(), work_queue_factory=RecordingQueue, use_mongo=False)
+    request = DiscoveryRequest(ip_range="127.0.0.0/30", sharded=True, timeout_seconds=0.2)
+
+    checkpoints = CheckpointStore(str(tmp_path))
+    checkpoints.create("interrupted", request.model_dump(), ["127.0.0.0/31", "127.0.0.2/31"])
+    write_json(
+        checkpoints.shard_path("interrupted", 0),
+        {
+            "index": 0,
+            "ip_range": "127.0.0.0/31",
+            "alive": [["127.0.0.1", 4059]],
+            "dead": [],
+            "stats": {"probes_sent": 1, "retries": 0, "timeouts": 0, "subnet_timeouts": {}},
+        },
+    )
+
+    stats = ScanStats()
+    results = asyncio.run(engine.resume("interrupted", stats))
+
+    assert [(r.ip_address, r.port) for r in results] == [("127.0.0.1", 4059)]
+    assert RecordingQueue.put_indexes == [1]
+    assert stats.completed == 2
+    assert not engine.has_checkpoint("interrupted")
@@ -0,0 +1,116 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.config import settings
+from app.main import app
+from app.models.core import EmulatorServerConfig, MeterTemplate, ObisObject
+from app.services.emulator import AddressInUseError, EmulatorRegistry, InvalidPortError, seed_registry
+from app.services.emulator_server import (
+    AARQ_TAG,
+    EXCEPTION_RESPONSE_TAG,
+    GET_RESPONSE_TAG,
+    EmulatorServer,
+    build_error_response,
+    build_get_request,
+    exchange,
+    open_association,
+    respond,
+)
+
+
+@pytest.fixture()
+def registry() -> EmulatorRegistry:
+    registry = EmulatorRegistry()
+    seed_registry(registry)
+    return registry
+
+
+def test_instances_are_indexed_by_id_address_and_model(registry: EmulatorRegistry) -> None:
+    first, second = registry.list_templates()[:2]
+    a = registry.create_instance(first.vendor, first.model, "10.1.0.1", 4059)
+    b = registry.create_instance(first.vendor, first.model, "10.1.0.2", 4059)
+    c = registry.create_instance(second.vendor, second.model, "10.1.0.1", 4060)
+
+    assert registry.get_instance(b.meter_id) == b
+    assert registry.find_instance("10.1.0.1", 4060) == c
+    assert registry.find_instance("10.1.0.3", 4059) is None
+    assert [m.meter_id for m in registry.find_by_model(first.vendor, first.model)] == [a.meter_id, b.meter_id]
+
+    assert registry.delete_instance(a.meter_id)
+    assert registry.get_instance(a.meter_id) is None
+    assert registry.find_instance("10.1.0.1", 4059) is None
+    assert [m.meter_id for m in registry.find_by_model(first.vendor, first.model)] == [b.meter_id]
+
+
+def test_occupied_address_and_bad_port_are_rejected(registry: EmulatorRegistry) -> None:
+    template = registry.list_templates()[0]
+    registry.create_instance(template.vendor, template.model, "10.1.1.1", 4059)
+    with pytest.raises(AddressInUseError):
+        registry.create_instance(template.vendor, template.model, "10.1.1.1", 4059)
+    with pytest.raises(InvalidPortError):
+        registry.create_instance(template.vendor, template.model, "10.1.1.2", 70000)
+
+
+def test_create_instance_on_occupied_address_returns_409() -> None:
+    with TestClient(app, headers={"X-API-Key": settings.api_key or ""}) as client:
+        template = client.get("/emulators/templates").json()[0]
+        params = {"vendor": template["vendor"], "model": template["model"], "ip_address": "10.250.1.1", "port": 4059}
+        client.post("/emulators/instances", params=params)
+        response = client.post("/emulators/instances", params=params)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "address_in_use"
+
+
+def test_unknown_and_empty_apdus_get_an_exception_response(registry: EmulatorRegistry) -> None:
+    template = registry.list_templates()[0]
+    meter = registry.create_instance(template.vendor, template.model, "10.1.2.1", 4059)
+
+    assert respond(b"\x42\x00", meter, template) == bytes([EXCEPTION_RESPONSE_TAG, 0x02, 0x03])
+    assert respond(b"", meter, template) == bytes([EXCEPTION_RESPONSE_TAG, 0x02, 0x03])
+    assert respond(bytes([AARQ_TAG, 0x00]), meter, template)[0] != EXCEPTION_RESPONSE_TAG
+
+
+def test_failed_get_keeps_its_invoke_id() -> None:
+    request = build_get_request("1-0:1.8.0")
+    response = build_error_response(request)
+    assert response[0] == GET_RESPONSE_TAG
+    assert response[2] == request[2]
+    assert response[-1] == 0xFA  # data-access-result: other-reason
+
+
+def test_server_answers_errors_without_dropping_the_association() -> None:
+    registry = EmulatorRegistry()
+    registry.register_template(
+        MeterTemplate(
+            vendor="Test",
+            model="Broken",
+            referencing="LN",
+            obis_objects=[
+                ObisObject(code="1-0:1.8.300", description="malformed", data_type="u32"),
+                ObisObject(code="1-0:1.8.0", description="energy", data_type="u32"),
+            ],
+        )
+    )
+    registry.create_instance("Test", "Broken", "127.0.0.1", 45911)
+
+    async def run() -> tuple[list[bytes], int]:
+        server = EmulatorServer(registry)
+        await server.start(EmulatorServerConfig())
+        try:
+            reader, writer, _ = await open_association("127.0.0.1", 45911)
+            replies = [
+                await exchange(reader, writer, b"\x42\x00"),
+                await exchange(reader, writer, build_get_request("1-0:1.8.0")),
+                await exchange(reader, writer, build_get_request("1-0:1.8.0")),
+            ]
+            writer.close()
+            return replies, server.status().errors
+        finally:
+            await server.stop()
+
+    replies, errors = asyncio.run(run())
+    assert replies[0][0] == EXCEPTION_RESPONSE_TAG
+    assert all(reply[0] == GET_RESPONSE_TAG for reply in replies[1:])
+    assert errors == 2
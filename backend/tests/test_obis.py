@@ -0,0 +1,49 @@
+import pytest
+
+from app.services.obis import (
+    DEFAULT_RULE_TABLE,
+    InvalidObisCodeError,
+    ObisRuleTable,
+    format_obis,
+    obis_set,
+    parse_obis,
+    unpack_obis,
+)
+
+
+def test_parse_obis_packs_the_six_value_groups() -> None:
+    packed = parse_obis("1-0:1.8.0")
+    assert unpack_obis(packed) == (1, 0, 1, 8, 0, 255)
+    assert parse_obis("1-0:1.8.0*255") == packed
+    assert parse_obis(" 1-0:1.8.0.255 ") == packed
+    assert format_obis(packed) == "1-0:1.8.0"
+    assert format_obis(parse_obis("0-0:96.1.0*1")) == "0-0:96.1.0*1"
+
+
+@pytest.mark.parametrize("code", ["", "1-0:1.8", "1-0:1.8.256", "1-0:1.8.*", "a-b:c.d.e"])
+def test_parse_obis_rejects_malformed_codes(code: str) -> None:
+    with pytest.raises(InvalidObisCodeError):
+        parse_obis(code)
+
+
+def test_obis_set_ignores_spelling_differences() -> None:
+    assert obis_set(["1-0:1.8.0", "1-0:1.8.0*255"]) == obis_set(["1-0:1.8.0.255"])
+
+
+def test_wildcard_rules_render_the_matched_groups() -> None:
+    assert DEFAULT_RULE_TABLE.name_for("1-0:1.8.0") == "energy_active_import_kwh"
+    assert DEFAULT_RULE_TABLE.name_for("1-2:1.8.3") == "energy_active_import_kwh_t3"
+    assert DEFAULT_RULE_TABLE.name_for("1-1:72.7.0") == "voltage_l3_v"
+
+
+def test_exact_codes_win_over_wildcards_and_unknown_codes_fall_back() -> None:
+    table = ObisRuleTable({"1-*:1.8.*": "tariff_{e}", "1-0:1.8.0": "total"})
+    assert table.name_for("1-0:1.8.0") == "total"
+    assert table.name_for("1-0:1.8.1") == "tariff_1"
+    assert table.name_for("0-0:96.1.0") == "0-0_96_1_0"
+    assert table.name_for("not-a-code") == "not-a-code"
+
+
+def test_rules_must_be_valid_patterns() -> None:
+    with pytest.raises(InvalidObisCodeError):
+        ObisRuleTable({"1-0:1.8.300": "broken"})
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.config import settings
+from app.main import app
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    with TestClient(app, headers={"X-API-Key": settings.api_key or ""}) as client:
+        yield client
+
+
+@pytest.fixture()
+def meter_id(client: TestClient) -> str:
+    template = client.get("/emulators/templates").json()[0]
+    response = client.post(
+        "/emulators/instances",
+        params={"vendor": template["vendor"], "model": template["model"], "ip_address": "10.250.0.1", "port": 4059},
+    )
+    if response.status_code == 409:
+        return client.get("/emulators/instances").json()[0]["meter_id"]
+    return response.json()["meter_id"]
+
+
+@pytest.mark.parametrize("path", ["/fingerprints", "/profiles"])
+def test_utc_suffixed_bounds_are_accepted(client: TestClient, meter_id: str, path: str) -> None:
+    assert client.post(f"{path}/{meter_id}").status_code == 200
+    before = (datetime.utcnow() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    after = (datetime.utcnow() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S+02:00")
+
+    response = client.get(path, params={"meter_id": meter_id, "created_from": before})
+    assert response.status_code == 200
+
+    response = client.get(path, params={"meter_id": meter_id, "created_to": after})
+    assert response.status_code == 200
+    # +02:00 one hour ahead is an hour ago in UTC, before the item was created.
+    assert response.json()["items"] == []
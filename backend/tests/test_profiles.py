@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.core import MeterProfile
+from app.services.profiles import ProfileRepository, obis_map_hash
+
+
+@pytest.fixture()
+def engine() -> Engine:
+    return create_engine("sqlite://", poolclass=StaticPool, future=True)
+
+
+def profile(profile_id: str, meter_id: str, obis_map: dict[str, str]) -> MeterProfile:
+    return MeterProfile(
+        profile_id=profile_id,
+        meter_id=meter_id,
+        vendor="Acme Energy",
+        model="A1000",
+        obis_map=obis_map,
+        created_at=datetime.utcnow(),
+        map_hash=obis_map_hash(obis_map),
+    )
+
+
+def stored_refs(engine: Engine) -> list[tuple[str, str]]:
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text("SELECT meter_id, profile_id FROM meter_profile_refs ORDER BY 1"))]
+
+
+def test_new_profile_replaces_the_meter_reference(engine: Engine) -> None:
+    repository = ProfileRepository(engine=engine)
+    repository.store(profile("p1", "m1", {"1-0:1.8.0": "energy"}))
+    repository.store(profile("p2", "m2", {"1-0:1.8.0": "energy"}))
+    repository.store(profile("p3", "m1", {"1-0:2.8.0": "export"}))
+
+    assert stored_refs(engine) == [("m1", "p3"), ("m2", "p2")]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM obis_maps")).scalar() == 2
+    assert {p.profile_id for p in repository.list().items} == {"p2", "p3"}
+
+
+def test_storing_the_same_profile_twice_is_a_no_op(engine: Engine) -> None:
+    repository = ProfileRepository(engine=engine)
+    first = repository.store(profile("p1", "m1", {"1-0:1.8.0": "energy"}))
+    again = repository.store(profile("p1", "m1", {"1-0:1.8.0": "energy"}))
+    assert again.created_at == first.created_at
+    assert stored_refs(engine) == [("m1", "p1")]
+
+
+def test_failed_write_is_retried_on_the_next_store(engine: Engine) -> None:
+    repository = ProfileRepository(engine=engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE meter_profile_refs RENAME TO refs_offline"))
+    repository.store(profile("p1", "m1", {"1-0:1.8.0": "energy"}))
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE refs_offline RENAME TO meter_profile_refs"))
+
+    assert stored_refs(engine) == []
+    repository.store(profile("p1", "m1", {"1-0:1.8.0": "energy"}))
+    assert stored_refs(engine) == [("m1", "p1")]
+
+
+def test_legacy_profiles_are_copied_once(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE meter_profiles (profile_id VARCHAR PRIMARY KEY, meter_id VARCHAR NOT NULL, "
+                "vendor VARCHAR NOT NULL, model VARCHAR NOT NULL, obis_map JSON NOT NULL, created_at DATETIME NOT NULL)"
+            )
+        )
+        for profile_id, meter_id, obis_map, day in [
+            ("a", "m1", '{"x": "1"}', 1),
+            ("b", "m1", '{"x": "2"}', 2),
+            ("c", "m2", '{"x": "1"}', 1),
+        ]:
+            conn.execute(
+                text("INSERT INTO meter_profiles VALUES (:p, :m, 'V', 'M', :o, :t)"),
+                {"p": profile_id, "m": meter_id, "o": obis_map, "t": datetime(2024, 1, day)},
+            )
+
+    ProfileRepository(engine=engine)
+    assert stored_refs(engine) == [("m1", "b"), ("m2", "c")]
+    ProfileRepository(engine=engine)
+    assert stored_refs(engine) == [("m1", "b"), ("m2", "c")]
+    with engine.connect() as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    assert "meter_profiles" not in tables
+    assert "meter_profiles_legacy" in tables